@@ -0,0 +1,176 @@
+'''
+Crawl many delivery areas of zomato and swiggy in one go. The areas file is a csv with a site and
+an area column, the area is a listing url for zomato and a location for swiggy:
+
+site,area
+zomato,https://www.zomato.com/ncr/delivery-in-connaught-place
+zomato,https://www.zomato.com/ncr/delivery-in-janpath
+swiggy,Connaught place
+
+run from the repo root:
+python batchCrawl.py --areas areas.csv --num 30 --workers 3
+python batchCrawl.py --areas areas.csv --num 30 --workers 3 --resume --stream
+python batchCrawl.py --areas areas.csv --num 30 --workers 3 --recrawl
+
+The areas of a site are discovered one after the other by one listing browser and their
+restaurants scraped by one CrawlEngine pool. Neighbouring areas list many of the same restaurants,
+the CrawlIndex (crawl_index.db) hands every restaurant out once per crawl and keeps which areas
+listed it apart, in area_restaurants.csv. The records go to the usual stores
+(restaurant_data.jsonl, swiggy_restaurant_data.jsonl).
+
+With --recrawl every restaurant page is fingerprinted first (pageFingerprint.py) and its dishes are
+only extracted when the fingerprint differs from the one the index kept from the last crawl. The
+new and changed restaurants are appended to the stores and to the delta of the crawl
+(<site>_delta_<crawl id>.jsonl), the unchanged ones are only marked as checked.
+'''
+import argparse
+import functools
+import json
+import pandas as pd
+from crawlEngine import CrawlEngine
+from crawlIndex import CrawlIndex
+from resultStore import ResultStore
+from streamingCleaner import StreamingCleaner, iter_store_records
+from utils import setup_logger
+
+
+# site -> the store its records are appended to
+SITE_STORES = {
+    'zomato': 'restaurant_data.jsonl',
+    'swiggy': 'swiggy_restaurant_data.jsonl',
+}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Crawl many zomato listings and swiggy locations, every restaurant once.')
+    parser.add_argument('--areas', type=str, required=True, help='Csv with site (zomato / swiggy) and area (listing url / location) columns')
+    parser.add_argument('--num', type=int, default=30, help='Number of restaurants taken from each area')
+    parser.add_argument('--workers', type=int, default=2, help='Browsers scraping restaurant pages at once')
+    parser.add_argument('--rate', type=float, default=None, help='At most this many restaurant page requests per second to a site')
+    parser.add_argument('--block_requests', action='store_true', help='Drop images, fonts, media and tracking requests in chrome')
+    parser.add_argument('--index', type=str, default='crawl_index.db', help='Sqlite file of the restaurant index')
+    parser.add_argument('--resume', action='store_true', help='Continue the last crawl of the index, its scraped restaurants are skipped')
+    parser.add_argument('--membership', type=str, default='area_restaurants.csv', help='Csv the area / restaurant pairs of the crawl are written to')
+    parser.add_argument('--stream', action='store_true', help='Also clean every restaurant as it is scraped into the cleaned csv of its site')
+    parser.add_argument('--recrawl', action='store_true', help='Only extract the restaurants whose page fingerprint changed and write them to a delta file')
+    return parser.parse_args()
+
+
+'''
+read_areas - {site: [areas]} from the areas csv, in file order without repeats
+'''
+def read_areas(path):
+    df = pd.read_csv(path, dtype=str).dropna()
+    areas = {}
+    for site, area in zip(df['site'].str.strip().str.lower(), df['area'].str.strip()):
+        if site not in SITE_STORES:
+            raise ValueError(f"Unknown site '{site}' in {path}, use zomato or swiggy")
+        if area not in areas.setdefault(site, []):
+            areas[site].append(area)
+    return areas
+
+
+'''
+discover_area - the restaurant urls of one area, on_urls gets them after every scroll
+for swiggy the first suggestion of the location search is selected first
+'''
+def discover_area(scraper, site, area, num, on_urls):
+    if site == 'zomato':
+        return scraper.get_restaurant_urls(area, num, on_urls=on_urls)
+    location_dict = scraper.get_location(area)
+    if not location_dict:
+        scraper.logger.warning(f"No swiggy location found for '{area}'")
+        return []
+    scraper.select_location(location_dict, next(iter(location_dict)))
+    return scraper.get_restaurant_urls(num, on_urls=on_urls)
+
+
+'''
+delta_path - the jsonl the new and changed restaurants of a re-crawl are written to
+'''
+def delta_path(site, crawl_id):
+    return f'{site}_delta_{crawl_id}.jsonl'
+
+
+'''
+crawl_site - discover all the areas of a site with one listing browser and scrape the restaurants
+no area of the crawl has listed before with one CrawlEngine
+recrawl - fingerprint the pages and only extract, store and clean the new or changed restaurants,
+          they also go to the delta file of the crawl
+'''
+def crawl_site(site, areas, index, num, workers = 2, rate = None, block_requests = False, cleaner = None, recrawl = False):
+    logger = setup_logger()
+    store = ResultStore(SITE_STORES[site])
+    delta = ResultStore(delta_path(site, index.crawl_id)) if recrawl else None
+    if site == 'zomato':
+        from zomatoScraper import RestaurantScraper as scraper_class
+    else:
+        from swiggyScraper import swiggyScraper as scraper_class
+    scraper = scraper_class(headless=True, block_requests=block_requests)
+
+    def discover(on_urls):
+        for area in areas:
+            try:
+                urls = discover_area(scraper, site, area, num, lambda found: on_urls(index.claim_new(site, area, found)))
+                # urls the scroll callback did not report
+                on_urls(index.claim_new(site, area, urls))
+                logger.info(f"{site} area '{area}': {len(urls)} restaurants listed")
+            except Exception as e:
+                logger.error(f"An error occurred discovering {site} area '{area}': {str(e)}")
+        return []
+
+    def on_result(url, data):
+        if store.append(url, data):
+            index.mark_scraped(site, url)
+            if cleaner is not None:
+                cleaner.add(url, data)
+
+    unchanged = []
+
+    def on_delta(url, result):
+        if not result:
+            return
+        if not result['changed']:
+            index.mark_unchanged(site, url)
+            unchanged.append(url)
+        elif store.append(url, result['data']):
+            delta.append(url, result['data'])
+            index.mark_scraped(site, url, result['fingerprint'])
+            if cleaner is not None:
+                cleaner.add(url, result['data'])
+
+    if recrawl:
+        engine_kwargs = {'method_name': 'get_restaurant_delta', 'fingerprints': functools.partial(index.fingerprint, site)}
+    else:
+        engine_kwargs = {}
+    try:
+        with CrawlEngine(scraper_class, workers=workers, rate=rate, headless=True, block_requests=block_requests, **engine_kwargs) as engine:
+            engine.run(discover=discover, on_result=on_delta if recrawl else on_result)
+    finally:
+        scraper.close_driver()
+    if recrawl:
+        logger.info(f"{site} re-crawl: {len(unchanged)} restaurants unchanged, the changed ones are in {delta.path}")
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    areas = read_areas(args.areas)
+    with CrawlIndex(args.index, resume=args.resume) as index:
+        index.logger.info(f"Crawl {index.crawl_id} of {sum(len(a) for a in areas.values())} areas")
+        for site, site_areas in areas.items():
+            if args.stream:
+                # a re-crawl cleans only its delta
+                csv_path = f'{site}_delta_{index.crawl_id}_cleaned.csv' if args.recrawl else None
+                with StreamingCleaner(site, csv_path=csv_path) as cleaner:
+                    # restaurants the interrupted crawl already scraped go to the cleaned outputs first
+                    if args.recrawl:
+                        cleaner.add_many(iter_store_records(delta_path(site, index.crawl_id)))
+                    else:
+                        scraped = index.scraped_urls(site)
+                        cleaner.add_many((url, data) for url, data in iter_store_records(SITE_STORES[site]) if url in scraped)
+                    crawl_site(site, site_areas, index, args.num, args.workers, args.rate, args.block_requests, cleaner, args.recrawl)
+            else:
+                crawl_site(site, site_areas, index, args.num, args.workers, args.rate, args.block_requests, recrawl=args.recrawl)
+        index.finish()
+        index.memberships().to_csv(args.membership, index=False)
+        index.logger.info(f"Crawl {index.crawl_id}: {json.dumps(index.summary())}")
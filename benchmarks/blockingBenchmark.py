@@ -0,0 +1,75 @@
+'''
+Benchmark the request blocking of the scrapers: load the same pages without and with the
+render-light profile and report the requests and bytes saved per page.
+
+run from the repo root:
+python -m benchmarks.blockingBenchmark --site zomato --url "https://www.zomato.com/ncr/haldirams-janpath-new-delhi/order"
+python -m benchmarks.blockingBenchmark --site swiggy --url "https://www.swiggy.com/restaurants/subway-m-block-connaught-place-delhi-16418"
+'''
+import argparse
+import json
+from time import perf_counter
+from zomatoScraper import RestaurantScraper
+from swiggyScraper import swiggyScraper
+from waits import zomato_restaurant_ready, swiggy_restaurant_ready
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compare page loads with and without request blocking.')
+    parser.add_argument('--site', type=str, required=True, choices=['zomato', 'swiggy'], help='Which scraper to load the pages with')
+    parser.add_argument('--url', type=str, required=True, action='append', help='URL of a restaurant page, can be given more than once')
+    parser.add_argument('--output', type=str, default=None, help='Optional json file for the results')
+    return parser.parse_args()
+
+
+'''
+load_pages - open every url with one scraper and return the blocker report of each page
+block_requests - dict of RequestBlocker arguments, empty lists only measure the traffic
+'''
+def load_pages(site, urls, block_requests):
+    if site == 'zomato':
+        scraper = RestaurantScraper(headless=True, block_requests=block_requests)
+    else:
+        scraper = swiggyScraper(headless=True, block_requests=block_requests)
+    reports = []
+    try:
+        for url in urls:
+            start = perf_counter()
+            if site == 'zomato':
+                scraper.driver.get(url)
+                scraper.waiter.until('restaurant_page', zomato_restaurant_ready)
+                report = scraper.blocker.page_report(scraper.driver, url)
+            else:
+                scraper.open_website(url, swiggy_restaurant_ready, 'restaurant_page')
+                report = scraper.blocker.reports[-1]
+            report['seconds'] = perf_counter() - start
+            reports.append(report)
+    finally:
+        scraper.close_driver()
+    return reports
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    baseline = load_pages(args.site, args.url, {'resource_types': [], 'url_patterns': []})
+    blocked = load_pages(args.site, args.url, True)
+
+    pages = []
+    for before, after in zip(baseline, blocked):
+        pages.append({
+            'url': before['url'],
+            'requests_saved': before['requests_loaded'] - after['requests_loaded'],
+            'bytes_saved': before['bytes_loaded'] - after['bytes_loaded'],
+            'seconds_saved': before['seconds'] - after['seconds'],
+            'without_blocking': before,
+            'with_blocking': after,
+        })
+    results = {
+        'site': args.site,
+        'pages': pages,
+        'total_bytes_saved': sum(page['bytes_saved'] for page in pages),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
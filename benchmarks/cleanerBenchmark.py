@@ -0,0 +1,187 @@
+'''
+Benchmark the cleaners on a synthetic frame against the row-by-row implementations
+they replaced, and check both give the same output.
+
+run from the repo root:
+python -m benchmarks.cleanerBenchmark --rows 100000
+python -m benchmarks.cleanerBenchmark --site swiggy --rows 1000
+python -m benchmarks.cleanerBenchmark --site swiggy --rows 300 --unique_menus
+the synthetic zomato rows are copies of the saved restaurant in restaurant_data_uncleaned.csv,
+with a share of them missing ratings or hours so the edge cases are timed too. The swiggy rows
+cycle through the 10 saved restaurants of swiggy_uncleaned_restaurant_data.csv (175 dishes each on average)
+'''
+import argparse
+import ast
+import json
+import logging
+from time import perf_counter
+import pandas as pd
+from zomatoCleaner import DataCleaner
+from swiggyCleaner import swiggyCleaner
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compare the vectorized and row-by-row zomato cleaning.')
+    parser.add_argument('--site', type=str, default='zomato', choices=['zomato', 'swiggy'], help='Which cleaner to benchmark')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of synthetic restaurants')
+    parser.add_argument('--unique_menus', action='store_true', help='swiggy: give every restaurant its own dish names instead of repeating the saved chain menus')
+    parser.add_argument('--repeat', type=int, default=5, help='swiggy: run both cleaners this many times, one after the other, and keep the best time of each')
+    parser.add_argument('--output', type=str, default=None, help='Optional json file for the results')
+    return parser.parse_args()
+
+
+# Class RowWiseDataCleaner is the Series.apply based DataCleaner, kept here as the baseline
+class RowWiseDataCleaner(DataCleaner):
+    def convert_dict_column(self, column_name):
+        expanded_df = self.df[column_name].apply(pd.Series)
+        self.df = pd.concat([self.df.drop(columns=column_name), expanded_df], axis=1)
+
+    def clean_ratings(self):
+        def ratings(rating):
+            try:
+                return {"dining_ratings": rating[0], "dining_votes": rating[1],
+                        "delivery_ratings": rating[3], "delivery_votes": rating[4]}
+            except IndexError:
+                return {"dining_ratings": None, "dining_votes": None,
+                        "delivery_ratings": None, "delivery_votes": None}
+        self.df['rating'] = self.df['rating'].apply(ratings)
+        df_ratings = self.df['rating'].apply(pd.Series)
+        self.df = pd.concat([self.df.drop(columns='rating'), df_ratings], axis=1)
+
+    def process_time_column(self):
+        self.df['days'] = self.df['time'].apply(lambda x: x.replace('Opening Hours\n','').split(':')[0])
+        self.df['opening and closing time'] = self.df['time'].apply(lambda x: ":".join(x.replace('Opening Hours\n','').split(':')[1:]))
+        self.df.drop(columns = 'time', inplace = True)
+
+
+# Class RowWiseSwiggyCleaner is the swiggyCleaner that cleaned the dishes one at a time with
+# string splits, kept here as the baseline
+class RowWiseSwiggyCleaner(swiggyCleaner):
+    def dish_info(self, paragraph):
+        data_list = paragraph.split('. ')
+        items = paragraph.split(', ', 1)
+        data_dict = {}
+        for item in items:
+            if ': ' in item:
+                key, value = item.split(': ', 1)
+                data_dict[key.strip()] = value.strip()
+            else:
+                data_dict[item.strip()] = None
+        data_dict['veg_status'] = data_list[0] if len(data_list) > 0 else None
+        data_dict['dish_name'] = data_list[1] if len(data_list) > 1 else None
+        return data_dict
+
+    def clean_rating_reviews(self, text):
+        parts = text.replace('\n', ' ').replace('(', '').replace(')', '').split()
+        if len(parts) == 2:
+            return {"rating": parts[0], "reviews": parts[1]}
+        return {"rating": None, "reviews": None}
+
+    def dish_card_clean(self, dish_data):
+        return [self.dish_info(dish['dish_content']) | self.clean_rating_reviews(dish['ratings_content']) for dish in dish_data]
+
+    def apply_transformations(self):
+        self.convert_restaurant_data('restaurant_data')
+        self.df['ratings'] = self.df['ratings'].apply(self.clean_ratings)
+        self.convert_restaurant_data('ratings')
+        self.df['categories'] = self.df['categories'].apply(self.clean_category)
+        self.df['offers'] = self.df['offers'].apply(self.clean_offer)
+        self.df['dish_data'] = self.df['dish_data'].apply(self.dish_card_clean)
+
+
+'''
+synthetic_frame - `rows` restaurants built from the saved one, every 10th without ratings
+and every 7th with hours that have no ':'
+'''
+def synthetic_frame(rows):
+    record = ast.literal_eval(pd.read_csv('restaurant_data_uncleaned.csv')['restaurant_data'][0])
+    records = []
+    for i in range(rows):
+        data = dict(record, name=f"{record['name']} {i}")
+        if i % 10 == 0:
+            data['rating'] = ['Not found']
+        if i % 7 == 0:
+            data['time'] = 'Opening Hours\nClosed'
+        records.append(data)
+    return pd.DataFrame({'Web_link': [f'https://www.zomato.com/ncr/r{i}/order' for i in range(rows)], 'restaurant_data': records})
+
+
+def synthetic_swiggy_frame(rows, unique_menus = False):
+    saved = pd.read_csv('swiggy_uncleaned_restaurant_data.csv')
+    records = [ast.literal_eval(value) for value in saved['restaurant_data']]
+    restaurants = []
+    for i in range(rows):
+        record = records[i % len(records)]
+        dishes = record['dish_data']
+        if unique_menus:
+            dishes = [dict(dish, dish_content=dish['dish_content'].replace('. ', f'. R{i} ', 1)) for dish in dishes]
+        restaurants.append(dict(record, dish_data=dishes))
+    return pd.DataFrame({'url': [f'https://swiggy.com/restaurants/r-{i}' for i in range(rows)], 'restaurant_data': restaurants})
+
+
+'''
+clean_swiggy - time apply_transformations() with its default arguments, the dish names are
+returned to compare the two cleaners
+'''
+def clean_swiggy(cleaner_class, df):
+    cleaner = cleaner_class(df.copy())
+    start = perf_counter()
+    cleaner.apply_transformations()
+    seconds = perf_counter() - start
+    if cleaner_class is RowWiseSwiggyCleaner:
+        names = [dish['dish_name'] for dishes in cleaner.df['dish_data'] for dish in dishes]
+    else:
+        names = cleaner.get_dishes_dataframe()['dish_name'].tolist()
+    return names, {'apply_transformations': seconds}
+
+
+def clean(cleaner_class, df):
+    cleaner = cleaner_class(df.copy())
+    timings = {}
+    for step, call in (('convert_dict_column', lambda: cleaner.convert_dict_column('restaurant_data')),
+                       ('clean_ratings', cleaner.clean_ratings),
+                       ('process_time_column', cleaner.process_time_column)):
+        start = perf_counter()
+        call()
+        timings[step] = perf_counter() - start
+    timings['total'] = sum(timings.values())
+    return cleaner.get_cleaned_dataframe(), timings
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    # the cleaners log every step, keep the output to the results
+    logging.disable(logging.ERROR)
+    if args.site == 'zomato':
+        df = synthetic_frame(args.rows)
+        row_wise_df, row_wise = clean(RowWiseDataCleaner, df)
+        vectorized_df, vectorized = clean(DataCleaner, df)
+        pd.testing.assert_frame_equal(row_wise_df, vectorized_df)
+    else:
+        # the dish fields changed shape, the dish names are compared. The row-wise split cuts
+        # names having '. ' in them ('B.M.T. Salad' -> 'B.M.T'), those are the only differences
+        df = synthetic_swiggy_frame(args.rows, args.unique_menus)
+        # a single run is noisy at this size, the two cleaners take turns and the best run of each is kept
+        row_wise, vectorized = {}, {}
+        for _ in range(max(args.repeat, 1)):
+            row_wise_names, timings = clean_swiggy(RowWiseSwiggyCleaner, df)
+            row_wise = {step: min(seconds, row_wise.get(step, seconds)) for step, seconds in timings.items()}
+            vectorized_names, timings = clean_swiggy(swiggyCleaner, df)
+            vectorized = {step: min(seconds, vectorized.get(step, seconds)) for step, seconds in timings.items()}
+        assert len(row_wise_names) == len(vectorized_names)
+        assert all(new.startswith(old) for old, new in zip(row_wise_names, vectorized_names))
+        distinct = len({dish['dish_content'] for record in df['restaurant_data'] for dish in record['dish_data']})
+
+    results = {
+        'site': args.site,
+        'rows': args.rows,
+        'distinct_dishes': None if args.site == 'zomato' else distinct,
+        'row_wise_seconds': row_wise,
+        'vectorized_seconds': vectorized,
+        'speedup': {step: row_wise[step] / max(vectorized[step], 1e-9) for step in row_wise},
+        'same_output': True if args.site == 'zomato' else f"{sum(old != new for old, new in zip(row_wise_names, vectorized_names))} dish names fixed",
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
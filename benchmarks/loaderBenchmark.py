@@ -0,0 +1,55 @@
+'''
+Benchmark reading the restaurant_data column of an uncleaned csv: the python repr cells with
+ast.literal_eval, and json after the one-time migration. Both must give the same records.
+
+run from the repo root:
+python -m benchmarks.loaderBenchmark --input swiggy_uncleaned_restaurant_data.csv --repeat 20
+'''
+import argparse
+import ast
+import json
+import os
+import tempfile
+from time import perf_counter
+import pandas as pd
+from uncleanedLoader import parse_value, migrate_to_json
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compare literal_eval and json for uncleaned csv files.')
+    parser.add_argument('--input', type=str, default='swiggy_uncleaned_restaurant_data.csv', help='Uncleaned csv to read')
+    parser.add_argument('--repeat', type=int, default=20, help='Times the rows of the file are parsed')
+    parser.add_argument('--output', type=str, default=None, help='Optional json file for the results')
+    return parser.parse_args()
+
+
+def timed(parse, texts):
+    start = perf_counter()
+    records = [parse(text) for text in texts]
+    return records, perf_counter() - start
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    texts = pd.read_csv(args.input)['restaurant_data'].tolist()
+    with tempfile.TemporaryDirectory() as directory:
+        migrated = os.path.join(directory, 'migrated.csv')
+        migrate_to_json(args.input, migrated)
+        json_texts = pd.read_csv(migrated)['restaurant_data'].tolist()
+
+    literal_records, literal_seconds = timed(ast.literal_eval, texts * args.repeat)
+    json_records, json_seconds = timed(parse_value, json_texts * args.repeat)
+    # json has no tuples, the scraped records only hold dicts, lists, strings and numbers
+    assert literal_records == json_records
+
+    results = {
+        'input': args.input,
+        'rows': len(texts) * args.repeat,
+        'literal_eval_seconds': literal_seconds,
+        'json_seconds': json_seconds,
+        'speedup_json': literal_seconds / max(json_seconds, 1e-9),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,116 @@
+'''
+Benchmark the element-by-element (driver) path of RestaurantScraper against the
+single page_source (source) path on the same loaded restaurant page.
+
+run from the repo root:
+python -m benchmarks.parseBenchmark --url "https://www.zomato.com/ncr/haldirams-janpath-new-delhi/order"
+--url also accepts a saved html file, it is opened as file://
+'''
+import argparse
+import json
+import os
+from time import perf_counter, sleep
+from zomatoScraper import RestaurantScraper
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compare driver and page_source parsing of a zomato restaurant page.')
+    parser.add_argument('--url', type=str, required=True, help='URL of a zomato restaurant page or path of a saved page')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs for each path')
+    parser.add_argument('--output', type=str, default=None, help='Optional json file for the results')
+    return parser.parse_args()
+
+
+'''
+count_commands - wrap driver.execute so every webdriver round trip is counted
+'''
+def count_commands(driver):
+    counter = {'commands': 0}
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        counter['commands'] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    return counter
+
+
+def driver_path(scraper):
+    data = scraper.get_head_info()
+    data['dish_data'] = [scraper.extract_dish_card(dish) for dish in scraper.extract_order_sections()]
+    return data
+
+
+def source_path(scraper):
+    return scraper.parse_page_source()
+
+
+'''
+time_path - run one extraction path `repeat` times and return timing and command counts
+'''
+def time_path(name, func, scraper, counter, repeat):
+    timings = []
+    commands = []
+    result = None
+    for _ in range(repeat):
+        counter['commands'] = 0
+        start = perf_counter()
+        result = func(scraper)
+        timings.append(perf_counter() - start)
+        commands.append(counter['commands'])
+    return result, {
+        'path': name,
+        'best_seconds': min(timings),
+        'mean_seconds': sum(timings) / len(timings),
+        'webdriver_commands': commands[-1],
+        'dishes': len(result.get('dish_data', [])),
+    }
+
+
+'''
+compare - count the dish fields that differ between the two paths
+'''
+def compare(driver_data, source_data):
+    mismatches = []
+    for key in ('name', 'rating', 'category', 'location', 'time', 'coordinates'):
+        if driver_data.get(key) != source_data.get(key):
+            mismatches.append(key)
+    for i, (a, b) in enumerate(zip(driver_data['dish_data'], source_data['dish_data'])):
+        for key in a:
+            if a[key] != b.get(key):
+                mismatches.append(f'dish_data[{i}].{key}')
+    if len(driver_data['dish_data']) != len(source_data['dish_data']):
+        mismatches.append('dish_data length')
+    return mismatches
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    url = args.url
+    if os.path.exists(url):
+        url = 'file://' + os.path.abspath(url)
+
+    scraper = RestaurantScraper(headless=True)
+    try:
+        scraper.driver.get(url)
+        sleep(10)
+        counter = count_commands(scraper.driver)
+
+        driver_data, driver_stats = time_path('driver', driver_path, scraper, counter, args.repeat)
+        source_data, source_stats = time_path('source', source_path, scraper, counter, args.repeat)
+        mismatches = compare(driver_data, source_data)
+
+        results = {
+            'url': args.url,
+            'driver': driver_stats,
+            'source': source_stats,
+            'speedup': driver_stats['best_seconds'] / max(source_stats['best_seconds'], 1e-9),
+            'mismatches': mismatches,
+        }
+        print(json.dumps(results, indent=2))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        scraper.close_driver()
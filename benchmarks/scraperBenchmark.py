@@ -0,0 +1,235 @@
+'''
+Benchmark the scrapers offline in headless chrome, against the saved pages in fixtures/ served by
+localServer.FixtureServer: the listing scroll (get_restaurant_urls), the restaurant pages
+(get_restaurant_data in every parse / capture mode) and the dish extraction of both sites.
+Every scenario reports wall time, webdriver commands and the peak resident memory of the
+chromedriver process tree (chromedriver, chrome and its renderers, read from /proc) per
+restaurant, and the results are saved as json so commits can be compared.
+
+run from the repo root:
+python -m benchmarks.scraperBenchmark --output bench.json
+python -m benchmarks.scraperBenchmark --site zomato --restaurants 5 --compare bench.json
+the swiggy scenarios need selenium-wire (seleniumwire2), like swiggyScraper itself
+'''
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from time import perf_counter
+from browserPool import process_tree_rss_mb
+from localServer import FixtureServer, SITE_ROUTES
+from waits import swiggy_listing_ready, swiggy_restaurant_ready, zomato_restaurant_ready, SWIGGY_DISH_XPATH
+from utils import try_element
+from benchmarks.parseBenchmark import count_commands
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against the local fixtures.')
+    parser.add_argument('--site', type=str, default=None, choices=['zomato', 'swiggy'], help='Only run the scenarios of one site')
+    parser.add_argument('--restaurants', type=int, default=5, help='Restaurant pages loaded per scenario')
+    parser.add_argument('--listing', type=int, default=36, help='Restaurant urls collected from the listing')
+    parser.add_argument('--output', type=str, default=None, help='Optional json file for the results')
+    parser.add_argument('--compare', type=str, default=None, help='Json results of an earlier run to compare with')
+    return parser.parse_args()
+
+
+# Class RssSampler reads the resident memory of the chromedriver process tree every `interval`
+# seconds while a call runs, peak_mb is the largest reading (None where there is no /proc)
+class RssSampler:
+    def __init__(self, driver, interval = 0.05):
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        self.pid = process.pid if process is not None else None
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def _sample(self):
+        rss = process_tree_rss_mb(self.pid)
+        if rss is not None:
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+
+    def __enter__(self):
+        if self.pid is not None:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+
+# Class Scenario times one scraper call at a time and keeps a row per call
+# counter - the count_commands counter of the scraper's driver, the memory is read from /proc
+# and sends no webdriver commands
+class Scenario:
+    def __init__(self, scraper, counter):
+        self.scraper = scraper
+        self.counter = counter
+        self.rows = []
+
+
+    def measure(self, call):
+        commands = self.counter['commands']
+        with RssSampler(self.scraper.driver) as sampler:
+            start = perf_counter()
+            result = call()
+            seconds = perf_counter() - start
+        self.rows.append({
+            'seconds': seconds,
+            'commands': self.counter['commands'] - commands,
+            'peak_rss_mb': sampler.peak_mb,
+        })
+        return result
+
+
+    '''
+    summary - totals and per call averages, `items` is what a call produced (urls, dishes)
+    '''
+    def summary(self, items):
+        seconds = sum(row['seconds'] for row in self.rows)
+        commands = sum(row['commands'] for row in self.rows)
+        peaks = [row['peak_rss_mb'] for row in self.rows if row['peak_rss_mb'] is not None]
+        return {
+            'calls': len(self.rows),
+            'items': items,
+            'seconds': seconds,
+            'commands': commands,
+            'seconds_per_call': seconds / max(len(self.rows), 1),
+            'commands_per_call': commands / max(len(self.rows), 1),
+            'peak_rss_mb': max(peaks, default=None),
+            'rows': self.rows,
+        }
+
+
+# the scrapers are imported in their scenarios, so --site zomato runs without selenium-wire
+def zomato_scenarios(base_url, restaurants, listing):
+    from zomatoScraper import RestaurantScraper
+    urls = [f"{base_url}/ncr/restaurant-{i}/order" for i in range(restaurants)]
+    results = {}
+
+    scraper = RestaurantScraper(headless=True)
+    counter = count_commands(scraper.driver)
+    try:
+        scenario = Scenario(scraper, counter)
+        found = scenario.measure(lambda: scraper.get_restaurant_urls(f"{base_url}/ncr/delivery-in-connaught-place?total={listing}", listing))
+        results['zomato_listing'] = scenario.summary(len(found))
+
+        for parse_mode in ('driver', 'source'):
+            scraper.parse_mode = parse_mode
+            scenario = Scenario(scraper, counter)
+            data = [scenario.measure(lambda url=url: scraper.get_restaurant_data(url)) for url in urls]
+            results[f'zomato_restaurant_{parse_mode}'] = scenario.summary(sum(len(d.get('dish_data', [])) for d in data))
+
+        # the dish cards alone, on a page that is already loaded
+        scenario = Scenario(scraper, counter)
+        dishes = 0
+        for url in urls:
+            scraper.driver.get(url)
+            scraper.waiter.until('restaurant_page', zomato_restaurant_ready)
+            cards = scenario.measure(lambda: [scraper.extract_dish_card(dish) for dish in scraper.extract_order_sections()])
+            dishes += len(cards)
+        results['zomato_dishes'] = scenario.summary(dishes)
+    finally:
+        scraper.close_driver()
+    return results
+
+
+def swiggy_scenarios(base_url, restaurants, listing):
+    from swiggyScraper import swiggyScraper
+    urls = [f"{base_url}/restaurants/restaurant-{i}-connaught-place-delhi-{16000 + i}" for i in range(restaurants)]
+    results = {}
+
+    scraper = swiggyScraper(headless=True)
+    # the slugs found on the listing are joined to the local server instead of swiggy.com
+    scraper.base_url = f"{base_url}/restaurants/"
+    counter = count_commands(scraper.driver)
+    try:
+        scenario = Scenario(scraper, counter)
+        scraper.open_website(f"{base_url}/?total={listing}", swiggy_listing_ready, 'listing_page')
+        found = scenario.measure(lambda: scraper.get_restaurant_urls(listing))
+        results['swiggy_listing'] = scenario.summary(len(found))
+
+        for capture_mode in ('dom', 'api'):
+            scraper.capture_mode = capture_mode
+            scenario = Scenario(scraper, counter)
+            data = [scenario.measure(lambda url=url: scraper.get_restaurant_data(url)) for url in urls]
+            results[f'swiggy_restaurant_{capture_mode}'] = scenario.summary(sum(len(d.get('dish_data', [])) for d in data))
+
+        scenario = Scenario(scraper, counter)
+        dishes = 0
+        for url in urls:
+            scraper.open_website(url, swiggy_restaurant_ready, 'restaurant_page')
+            elements = try_element('xpath', SWIGGY_DISH_XPATH, driver=scraper.driver, logger=scraper.logger, element=False)
+            dishes += len(scenario.measure(lambda: scraper.process_dish_element(elements)))
+        results['swiggy_dishes'] = scenario.summary(dishes)
+    finally:
+        scraper.close_driver()
+    return results
+
+
+'''
+compare - seconds and commands per call and peak rss of this run against an earlier one (< 1 is better)
+'''
+def compare(results, earlier):
+    ratios = {}
+    for name, scenario in results['scenarios'].items():
+        before = earlier.get('scenarios', {}).get(name)
+        if before:
+            ratios[name] = {
+                'seconds': scenario['seconds_per_call'] / max(before['seconds_per_call'], 1e-9),
+                'commands': scenario['commands_per_call'] / max(before['commands_per_call'], 1e-9),
+            }
+            if scenario.get('peak_rss_mb') and before.get('peak_rss_mb'):
+                ratios[name]['peak_rss_mb'] = scenario['peak_rss_mb'] / before['peak_rss_mb']
+    return ratios
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    output = os.path.abspath(args.output) if args.output else None
+    results = {'commit': git_commit(), 'restaurants': args.restaurants, 'listing': args.listing, 'scenarios': {}}
+    cwd = os.getcwd()
+    # the scrapers save screenshots to the working directory, keep them out of the repo
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            for site, scenarios in (('zomato', zomato_scenarios), ('swiggy', swiggy_scenarios)):
+                if args.site in (None, site):
+                    with FixtureServer(SITE_ROUTES[site]) as server:
+                        results['scenarios'].update(scenarios(server.base_url, args.restaurants, args.listing))
+                        results[f'{site}_requests_served'] = server.requests_served
+        finally:
+            os.chdir(cwd)
+    if args.compare:
+        with open(args.compare) as f:
+            earlier = json.load(f)
+        results['compared_to'] = earlier.get('commit')
+        results['ratios'] = compare(results, earlier)
+
+    print(json.dumps({name: {key: value for key, value in scenario.items() if key != 'rows'}
+                      for name, scenario in results['scenarios'].items()} | {'ratios': results.get('ratios')}, indent=2))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,375 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+from time import monotonic
+from selenium.webdriver.remote.command import Command
+from utils import setup_logger
+
+
+'''
+process_tree_rss_mb - resident memory of a process and all its children (chromedriver -> chrome ->
+renderers) in MB, read from /proc, None where there is no /proc
+'''
+def process_tree_rss_mb(pid):
+    if not os.path.exists(f'/proc/{pid}/status'):
+        return None
+    total_kb = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            # the process ended while it was read
+            continue
+    return total_kb / 1024
+
+
+'''
+driver_memory_mb - memory used by the chrome of a driver, None when it can not be measured
+'''
+def driver_memory_mb(driver):
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process is None:
+        return None
+    return process_tree_rss_mb(process.pid)
+
+
+'''
+is_healthy - the browser of the scraper still answers and has a window
+'''
+def is_healthy(scraper):
+    try:
+        return scraper.driver.execute_script('return 1') == 1 and bool(scraper.driver.window_handles)
+    except Exception:
+        return False
+
+
+# Class LeasedScraper is a scraper leased from a BrowserPool, it behaves like the scraper but
+# close_driver() hands the browser back to the pool instead of quitting it, so ScraperPool and
+# CrawlEngine can use pooled browsers unchanged (see BrowserPool.leased)
+# a job keeps its browsers until it ends, so the limits are also checked between pages: before a
+# restaurant page is loaded (PAGE_CALLS), once the browser loaded a page since the last check and is
+# over max_pages or max_memory_mb, the page goes to a new browser of the same kind and the old one is quit
+# other attributes (waiter, driver, ...) are read from the current browser without a check, so reading
+# them never restarts it
+class LeasedScraper:
+    PAGE_CALLS = ('get_restaurant_data', 'get_restaurant_delta')
+
+    def __init__(self, pool, scraper, scraper_class, scraper_kwargs):
+        self._pool = pool
+        self._scraper = scraper
+        self._scraper_class = scraper_class
+        self._scraper_kwargs = scraper_kwargs
+        self._pages_checked = 0
+
+
+    def __getattr__(self, name):
+        if name not in self.PAGE_CALLS:
+            return getattr(self._scraper, name)
+
+        def page_call(*args, **kwargs):
+            if self._scraper is not None:
+                self._renew()
+            return getattr(self._scraper, name)(*args, **kwargs)
+        return page_call
+
+
+    def _renew(self):
+        pages = self._pool.pages(self._scraper)
+        if pages == self._pages_checked:
+            return
+        self._pages_checked = pages
+        if self._pool._recycle_reason(self._scraper) is None:
+            return
+        scraper, self._scraper = self._scraper, None
+        self._pool.release(scraper)
+        self._scraper = self._pool.acquire(self._scraper_class, **self._scraper_kwargs)
+        self._pages_checked = self._pool.pages(self._scraper)
+
+
+    def close_driver(self):
+        scraper, self._scraper = self._scraper, None
+        if scraper is not None:
+            self._pool.release(scraper)
+
+
+# Class BrowserPool is a process wide pool of scraper browsers, shared by every Streamlit session
+# max_size - most browsers alive at once, leased or idle, a lease waits for a free one beyond that
+# max_pages - a browser is quit and replaced after loading this many pages
+# max_memory_mb - a browser whose chrome processes use more memory than this is quit and replaced
+# both are checked when a browser is returned, and between pages for the leased() scrapers
+# lease_timeout - seconds a lease waits for a free browser before TimeoutError, None waits as long as it takes
+# the browsers are keyed by scraper class and arguments, an idle browser is checked to still answer
+# before it is leased again, and an idle browser of another kind is quit to make room when the pool is full
+# a job leasing more than one browser at a time books them first with reserve()
+class BrowserPool:
+    def __init__(self, max_size = 4, max_pages = 50, max_memory_mb = None, lease_timeout = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.lease_timeout = lease_timeout
+        self.logger = setup_logger()
+        self._condition = threading.Condition()
+        # (key, scraper) of the idle browsers, the last returned is leased first
+        self._idle = []
+        # id(scraper) -> key of every browser alive
+        self._keys = {}
+        # id(scraper) -> pages loaded by the browser
+        self._pages = {}
+        # browsers booked by the running jobs, see reserve
+        self._reserved = 0
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0}
+
+
+    @staticmethod
+    def _key(scraper_class, scraper_kwargs):
+        return (scraper_class, tuple(sorted((name, repr(value)) for name, value in scraper_kwargs.items())))
+
+
+    '''
+    _count_pages - count the pages the driver of the scraper loads, for max_pages
+    '''
+    def _count_pages(self, scraper):
+        driver = scraper.driver
+        execute = driver.execute
+        scraper_id = id(scraper)
+
+        def counted_execute(driver_command, params=None):
+            if driver_command == Command.GET:
+                self._pages[scraper_id] = self._pages.get(scraper_id, 0) + 1
+            return execute(driver_command, params)
+
+        driver.execute = counted_execute
+
+
+    '''
+    pages - pages the browser of the scraper loaded so far
+    '''
+    def pages(self, scraper):
+        return self._pages.get(id(scraper), 0)
+
+
+    def _quit(self, scraper):
+        self._pages.pop(id(scraper), None)
+        try:
+            scraper.close_driver()
+        except Exception as e:
+            self.logger.warning(f"Error closing driver: {str(e)}")
+
+
+    '''
+    _recycle_reason - why the browser should be quit instead of reused, None when it can be reused
+    '''
+    def _recycle_reason(self, scraper):
+        pages = self.pages(scraper)
+        if self.max_pages and pages >= self.max_pages:
+            return f"{pages} pages loaded"
+        if self.max_memory_mb:
+            memory = driver_memory_mb(scraper.driver)
+            if memory is not None and memory > self.max_memory_mb:
+                return f"{memory:.0f} MB used"
+        return None
+
+
+    '''
+    acquire - lease a browser of the scraper class started with these arguments, an idle one when
+    there is one, a new one while the pool is not full, else wait for one to be returned
+    return - the scraper, give it back with release()
+    '''
+    def acquire(self, scraper_class, **scraper_kwargs):
+        key = self._key(scraper_class, scraper_kwargs)
+        deadline = None if self.lease_timeout is None else monotonic() + self.lease_timeout
+        while True:
+            scraper, to_quit, placeholder = None, None, object()
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("BrowserPool is closed")
+                    idle = [i for i, (idle_key, _) in enumerate(self._idle) if idle_key == key]
+                    if idle:
+                        scraper = self._idle.pop(idle[-1])[1]
+                        break
+                    if len(self._keys) < self.max_size:
+                        break
+                    if self._idle:
+                        # the pool is full of browsers of another kind, the one idle longest makes room
+                        to_quit = self._idle.pop(0)[1]
+                        del self._keys[id(to_quit)]
+                        break
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No browser free in the pool after {self.lease_timeout}s")
+                    self._condition.wait(remaining)
+                if scraper is None:
+                    # the place is booked before the browser starts, so concurrent leases can not overfill the pool
+                    self._keys[placeholder] = key
+
+            if to_quit is not None:
+                self._quit(to_quit)
+            if scraper is not None:
+                if is_healthy(scraper):
+                    self.stats['reused'] += 1
+                    return scraper
+                self.logger.warning(f"Replacing unresponsive {scraper_class.__name__} browser")
+                self.stats['unhealthy'] += 1
+                self._quit(scraper)
+                with self._condition:
+                    del self._keys[id(scraper)]
+                    self._condition.notify_all()
+                continue
+            return self._start(scraper_class, scraper_kwargs, key, placeholder)
+
+
+    def _start(self, scraper_class, scraper_kwargs, key, placeholder):
+        try:
+            scraper = scraper_class(**scraper_kwargs)
+        except Exception:
+            with self._condition:
+                self._keys.pop(placeholder, None)
+                self._condition.notify_all()
+            raise
+        self._count_pages(scraper)
+        with self._condition:
+            self._keys.pop(placeholder, None)
+            self._keys[id(scraper)] = key
+            self.stats['created'] += 1
+            alive = len(self._keys)
+        self.logger.info(f"Started pooled {scraper_class.__name__} browser {alive}/{self.max_size}")
+        return scraper
+
+
+    '''
+    release - give a leased browser back, it is quit instead when it loaded max_pages pages,
+    uses more than max_memory_mb or the pool is closed
+    '''
+    def release(self, scraper):
+        reason = 'the pool is closed' if self._closed else self._recycle_reason(scraper)
+        with self._condition:
+            key = self._keys.get(id(scraper))
+            if key is None:
+                # not from this pool
+                reason = reason or 'not a pooled browser'
+            elif reason is None:
+                self._idle.append((key, scraper))
+            else:
+                del self._keys[id(scraper)]
+            self._condition.notify_all()
+        if reason is not None:
+            self.logger.info(f"Recycling pooled {type(scraper).__name__} browser: {reason}")
+            self.stats['recycled'] += 1
+            self._quit(scraper)
+
+
+    '''
+    lease - acquire as a context manager, the browser is released when the block ends
+    with pool.lease(RestaurantScraper, headless=True) as scraper:
+        scraper.get_restaurant_urls(url, num)
+    '''
+    @contextmanager
+    def lease(self, scraper_class, **scraper_kwargs):
+        scraper = self.acquire(scraper_class, **scraper_kwargs)
+        try:
+            yield scraper
+        finally:
+            self.release(scraper)
+
+
+    '''
+    reserve - book browsers for a job before it leases them, waiting until that many are free
+    a ScraperPool or CrawlEngine keeps its browsers until it is closed, two jobs each holding some
+    and waiting for more would wait for each other forever, booking all of them at once can not
+    browsers - most browsers the job leases at the same time, at most max_size
+    '''
+    @contextmanager
+    def reserve(self, browsers):
+        if not 1 <= browsers <= self.max_size:
+            raise ValueError(f"A job can reserve 1 to {self.max_size} browsers, not {browsers}")
+        deadline = None if self.lease_timeout is None else monotonic() + self.lease_timeout
+        with self._condition:
+            while self._reserved + browsers > self.max_size:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{browsers} browsers not free in the pool after {self.lease_timeout}s")
+                self._condition.wait(remaining)
+            self._reserved += browsers
+        try:
+            yield browsers
+        finally:
+            with self._condition:
+                self._reserved -= browsers
+                self._condition.notify_all()
+
+
+    '''
+    leased - a stand-in for the scraper class whose instances are leased from the pool, for
+    ScraperPool and CrawlEngine: ScraperPool(pool.leased(RestaurantScraper), workers=3, headless=True)
+    '''
+    def leased(self, scraper_class):
+        def factory(**scraper_kwargs):
+            return LeasedScraper(self, self.acquire(scraper_class, **scraper_kwargs), scraper_class, scraper_kwargs)
+        factory.__name__ = scraper_class.__name__
+        return factory
+
+
+    '''
+    summary - browsers alive, idle and leased with the lifetime counters
+    '''
+    def summary(self):
+        with self._condition:
+            alive, idle = len(self._keys), len(self._idle)
+        return {'max_size': self.max_size, 'alive': alive, 'idle': idle, 'leased': alive - idle, 'reserved': self._reserved, **self.stats}
+
+
+    '''
+    close - quit the idle browsers, the leased ones are quit when they are returned
+    '''
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for _, scraper in idle:
+                del self._keys[id(scraper)]
+            self._condition.notify_all()
+        for _, scraper in idle:
+            self._quit(scraper)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+'''
+shared_pool - the BrowserPool of this process, made on first use and closed at exit
+the size and limits come from the environment: BROWSER_POOL_SIZE (4), BROWSER_POOL_MAX_PAGES (50)
+and BROWSER_POOL_MAX_MEMORY_MB (no limit)
+'''
+def shared_pool():
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            max_memory_mb = os.environ.get('BROWSER_POOL_MAX_MEMORY_MB')
+            _shared_pool = BrowserPool(max_size=int(os.environ.get('BROWSER_POOL_SIZE', 4)),
+                                       max_pages=int(os.environ.get('BROWSER_POOL_MAX_PAGES', 50)),
+                                       max_memory_mb=float(max_memory_mb) if max_memory_mb else None)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
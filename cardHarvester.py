@@ -0,0 +1,103 @@
+from waits import StableCount
+from utils import setup_logger
+
+
+# number of scrolls in a row without a new card before the feed is treated as finished
+STALL_LIMIT = 3
+
+# runs inside the page: remembers the card nodes it already returned (so only new cards come back
+# over the wire), collects their hrefs and optionally scrolls the last card into view, all in one call
+HARVEST_SCRIPT = """
+const xpath = arguments[0], key = arguments[1], scroll = arguments[2];
+const state = window[key] || (window[key] = {nodes: new WeakSet(), seen: 0});
+const snap = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const hrefs = [];
+let last = null;
+for (let i = 0; i < snap.snapshotLength; i++) {
+    const node = snap.snapshotItem(i);
+    last = node;
+    if (state.nodes.has(node)) continue;
+    state.nodes.add(node);
+    state.seen++;
+    const anchor = node.href ? node : (node.closest('a') || node.querySelector('a'));
+    hrefs.push(anchor ? anchor.href : null);
+}
+if (scroll && last) last.scrollIntoView();
+return {seen: state.seen, present: snap.snapshotLength, hrefs: hrefs};
+"""
+
+
+# Class CardHarvester collects restaurant card hrefs from an infinite scroll listing
+# it only pulls the cards that appeared since the last scroll, dedupes the hrefs in a set and
+# stops when the number of cards has not grown for `stall_limit` scrolls in a row
+class CardHarvester:
+    def __init__(self, driver, card_xpath, waiter, logger = None, stall_limit = STALL_LIMIT):
+        self.driver = driver
+        self.card_xpath = card_xpath
+        self.waiter = waiter
+        self.logger = logger or setup_logger()
+        self.stall_limit = stall_limit
+        self.key = f"__harvester_{abs(hash(card_xpath))}"
+        self.hrefs = []
+        self.seen_hrefs = set()
+        self.cards_seen = 0
+        self.cards_present = 0
+
+
+    '''
+    harvest - pull the new cards from the page and optionally scroll to the last one
+    return - number of new cards found
+    '''
+    def harvest(self, scroll = False):
+        result = self.driver.execute_script(HARVEST_SCRIPT, self.card_xpath, self.key, scroll)
+        new_cards = result['seen'] - self.cards_seen
+        self.cards_seen = result['seen']
+        self.cards_present = result['present']
+        for href in result['hrefs']:
+            if href and href not in self.seen_hrefs:
+                self.seen_hrefs.add(href)
+                self.hrefs.append(href)
+        return new_cards
+
+
+    '''
+    run - scroll the listing until enough cards are found or the feed stops growing
+    params:-
+    num - number of restaurant hrefs wanted
+    enough - optional callable returning True once the caller has what it needs,
+             by default when `num` hrefs have been harvested
+    on_new - optional callback(hrefs) called after every harvest with the hrefs found since the
+             last call (at most num in all), so they can be scraped while the listing still scrolls
+    return - list of at most num hrefs in the order they appeared
+    '''
+    def run(self, num, enough = None, on_new = None):
+        enough = enough or (lambda: len(self.hrefs) >= num)
+        stalls = 0
+        reported = 0
+
+        def report():
+            nonlocal reported
+            new_hrefs = self.hrefs[reported:num]
+            if on_new is not None and new_hrefs:
+                on_new(new_hrefs)
+            reported += len(new_hrefs)
+
+        self.harvest()
+        report()
+        while not enough():
+            if self.cards_present == 0:
+                self.logger.warning("No restaurant cards found.")
+                break
+            # scroll in the same call as the harvest, then wait for the new cards to settle
+            present = self.cards_present
+            new_cards = self.harvest(scroll=True)
+            self.waiter.until('scroll', StableCount(self.card_xpath, previous=present))
+            new_cards += self.harvest()
+            report()
+            self.logger.info(f"{self.cards_seen} number of restaurants cards found")
+
+            stalls = 0 if new_cards else stalls + 1
+            if stalls >= self.stall_limit:
+                self.logger.info(f"No new cards after {stalls} scrolls, end of the feed reached")
+                break
+        return self.hrefs[:num]
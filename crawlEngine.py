@@ -0,0 +1,226 @@
+import asyncio
+import functools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from utils import setup_logger
+
+
+'''
+backoff_delay - full jitter exponential backoff, a random delay between 0 and base * 2**attempt
+(capped), so the retries of many workers do not hit the site at the same moment
+'''
+def backoff_delay(attempt, base = 2.0, cap = 60.0):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Class DomainRateLimiter spaces the requests to each domain at least 1 / rate seconds apart
+# rate - requests per second per domain, None for no limit
+class DomainRateLimiter:
+    def __init__(self, rate = None):
+        self.interval = 1 / rate if rate else 0
+        self._next = {}
+
+
+    '''
+    wait - sleep until the domain of the url may be requested again, booking the next slot
+    '''
+    async def wait(self, url):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        domain = urlparse(url).netloc
+        slot = max(now, self._next.get(domain, now))
+        self._next[domain] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# Class Frontier is the queue of urls waiting to be scraped
+# urls are deduped against everything added before and `skip` (e.g. ResultStore.done_urls()),
+# failed urls come back after their backoff delay, and once discovery is over and no url is
+# left the workers get a None each to stop
+class Frontier:
+    def __init__(self, workers, skip = ()):
+        self.queue = asyncio.Queue()
+        self.workers = workers
+        self.seen = set(skip)
+        self.urls = []
+        self.pending = 0
+        self.discovering = True
+
+
+    '''
+    add - queue the urls not seen yet
+    return - number of urls queued
+    '''
+    def add(self, urls):
+        added = 0
+        for url in urls:
+            if url and url not in self.seen:
+                self.seen.add(url)
+                self.urls.append(url)
+                self.pending += 1
+                self.queue.put_nowait((url, 0))
+                added += 1
+        return added
+
+
+    def retry(self, url, attempt, delay):
+        asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, (url, attempt))
+
+
+    '''
+    done - a url got its final result (data, or {} after the last retry)
+    '''
+    def done(self):
+        self.pending -= 1
+        self._stop_when_finished()
+
+
+    '''
+    close - no more urls will be discovered
+    '''
+    def close(self):
+        self.discovering = False
+        self._stop_when_finished()
+
+
+    def _stop_when_finished(self):
+        if not self.discovering and self.pending == 0:
+            for _ in range(self.workers):
+                self.queue.put_nowait(None)
+
+
+# Class CrawlEngine scrapes restaurant pages with asyncio while their urls are still being discovered
+# every worker task owns one scraper (scraper_class(**scraper_kwargs), started on its first url) and
+# runs its blocking calls in a thread, so `workers` pages load at once. Requests to a domain are
+# spaced by `rate` (per second), a page without data is tried again `retries` times after a
+# jittered backoff, and every final result goes to on_result as soon as it is in, e.g. the
+# ResultStore and a StreamingCleaner, so discovery, scraping and cleaning overlap.
+# on_result and progress are called in the thread running the crawl (safe for streamlit)
+class CrawlEngine:
+    def __init__(self, scraper_class, workers = 2, rate = None, retries = 2, backoff = 2.0, method_name = 'get_restaurant_data', **scraper_kwargs):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.scraper_class = scraper_class
+        self.workers = workers
+        self.limiter = DomainRateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.method_name = method_name
+        self.scraper_kwargs = scraper_kwargs
+        self.logger = setup_logger()
+        self._scrapers = []
+        self.stats = {'scraped': 0, 'failed': 0, 'retries': 0}
+
+
+    async def _worker(self, frontier, executor, on_result, progress):
+        loop = asyncio.get_running_loop()
+        scraper = None
+        while True:
+            item = await frontier.queue.get()
+            if item is None:
+                return
+            url, attempt = item
+            if scraper is None:
+                scraper = await loop.run_in_executor(executor, functools.partial(self.scraper_class, **self.scraper_kwargs))
+                self._scrapers.append(scraper)
+                self.logger.info(f"Started {self.scraper_class.__name__} worker {len(self._scrapers)}/{self.workers}")
+
+            await self.limiter.wait(url)
+            try:
+                result = await loop.run_in_executor(executor, getattr(scraper, self.method_name), url)
+            except Exception as e:
+                self.logger.error(f"An error occurred for {url}: {str(e)}")
+                result = {}
+
+            if not result and attempt < self.retries:
+                delay = backoff_delay(attempt, self.backoff)
+                self.stats['retries'] += 1
+                self.logger.warning(f"No data for {url}, retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+                frontier.retry(url, attempt + 1, delay)
+                continue
+
+            self.stats['scraped' if result else 'failed'] += 1
+            if on_result is not None:
+                on_result(url, result or {})
+            frontier.done()
+            if progress is not None:
+                progress(len(frontier.urls) - frontier.pending, len(frontier.urls))
+
+
+    '''
+    crawl - scrape the urls, and the ones `discover` finds while it runs
+    params:-
+    urls - urls known before the crawl
+    discover - optional blocking callable(on_urls) returning the list of urls it found, it is run in
+               a thread and calls on_urls(new_urls) as it goes, e.g.
+               lambda on_urls: scraper.get_restaurant_urls(link, num, on_urls=on_urls)
+    skip - urls not to scrape (already in the store)
+    on_result - optional callback(url, result) called as each url finishes
+    progress - optional callback(done, total), total grows while the discovery runs
+    return - the known urls followed by the discovered ones, skipped ones included
+    '''
+    async def crawl(self, urls = (), discover = None, skip = (), on_result = None, progress = None):
+        loop = asyncio.get_running_loop()
+        urls = list(urls)
+        frontier = Frontier(self.workers, skip)
+        frontier.add(urls)
+        # a thread per worker and one for the discovery
+        executor = ThreadPoolExecutor(max_workers=self.workers + 1)
+        tasks = [asyncio.create_task(self._worker(frontier, executor, on_result, progress)) for _ in range(self.workers)]
+        try:
+            try:
+                if discover is not None:
+                    found = await loop.run_in_executor(executor, discover, lambda new_urls: loop.call_soon_threadsafe(frontier.add, list(new_urls)))
+                    found = list(found or [])
+                    # a discover that does not call on_urls still gets its urls scraped
+                    frontier.add(found)
+                    known = set(urls)
+                    urls += [url for url in found if url not in known]
+            finally:
+                frontier.close()
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            executor.shutdown(wait=True)
+        self.logger.info(f"Crawl finished: {self.stats['scraped']} scraped, {self.stats['failed']} failed, {self.stats['retries']} retries")
+        return urls
+
+
+    '''
+    run - crawl from synchronous code, same params and return as crawl
+    '''
+    def run(self, urls = (), discover = None, skip = (), on_result = None, progress = None):
+        return asyncio.run(self.crawl(urls, discover, skip, on_result, progress))
+
+
+    '''
+    wait_records - adaptive wait records of every worker, see waits.summarize_waits
+    '''
+    def wait_records(self):
+        return [record for scraper in self._scrapers for record in getattr(getattr(scraper, 'waiter', None), 'records', [])]
+
+
+    '''
+    close - quit every driver (or http session) started by the workers
+    '''
+    def close(self):
+        scrapers, self._scrapers = self._scrapers, []
+        for scraper in scrapers:
+            try:
+                close = getattr(scraper, 'close_driver', None) or scraper.close
+                close()
+            except Exception as e:
+                self.logger.warning(f"Error closing scraper: {str(e)}")
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
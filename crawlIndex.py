@@ -0,0 +1,200 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import pandas as pd
+from utils import setup_logger
+
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS indexed_restaurants (
+    site TEXT NOT NULL,
+    restaurant_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_crawl TEXT,
+    last_scraped_at TEXT,
+    fingerprint TEXT,
+    changed_crawl TEXT,
+    PRIMARY KEY (site, restaurant_key)
+);
+CREATE TABLE IF NOT EXISTS area_restaurants (
+    crawl_id TEXT NOT NULL,
+    site TEXT NOT NULL,
+    area TEXT NOT NULL,
+    restaurant_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (crawl_id, site, area, restaurant_key)
+);
+CREATE INDEX IF NOT EXISTS idx_area_restaurants_key ON area_restaurants(site, restaurant_key);
+'''
+# columns added to indexed_restaurants after the first version of the index, for the older files
+ADDED_COLUMNS = {
+    'fingerprint': 'TEXT',
+    'changed_crawl': 'TEXT',
+}
+
+# the last part of a zomato restaurant url is the tab of the page (/order, /info ...), not the restaurant
+ZOMATO_PAGE_SUFFIX = re.compile(r'/(?:order|info|reviews|menu|photos)$')
+SWIGGY_SLUG_PATTERN = re.compile(r'restaurants/([\w-]+)')
+
+
+'''
+restaurant_key - the same key for every url of a restaurant
+zomato - the path without the page tab: /ncr/haldirams-janpath-new-delhi
+swiggy - the slug, it ends with the restaurant id: subway-m-block-connaught-place-delhi-16418
+'''
+def restaurant_key(site, url):
+    if site == 'swiggy':
+        match = SWIGGY_SLUG_PATTERN.search(url)
+        if match:
+            return match.group(1).lower()
+    path = urlparse(url).path.rstrip('/').lower()
+    return ZOMATO_PAGE_SUFFIX.sub('', path) or url
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+# Class CrawlIndex is the persistent index of the restaurants found by the batch crawls (batchCrawl.py)
+# indexed_restaurants - one row per restaurant and site, with the last crawl that scraped it
+# area_restaurants - which restaurants every area listed in every crawl, kept apart from the data
+# a restaurant listed by many areas is handed out by claim_new once per crawl, so it is scraped once.
+# the page fingerprint of every restaurant is kept for the re-crawls (see pageFingerprint.py), changed_crawl
+# is the last crawl that found the restaurant new or changed
+# resume - continue the last crawl of the index instead of starting a new one
+class CrawlIndex:
+    def __init__(self, path = 'crawl_index.db', resume = False):
+        self.path = path
+        self.logger = setup_logger()
+        # discovery and the results of the crawl engine come from different threads
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(INDEX_SCHEMA)
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(indexed_restaurants)')}
+        with self.connection:
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE indexed_restaurants ADD COLUMN {column} {column_type}')
+        self.crawl_id = (resume and self.last_crawl_id()) or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO crawls (crawl_id, started_at) VALUES (?, ?)', (self.crawl_id, now()))
+        # keys handed out by claim_new in this crawl, the ones a resumed crawl already scraped included
+        self._claimed = {(site, key) for site, key in self.connection.execute(
+            'SELECT site, restaurant_key FROM indexed_restaurants WHERE last_crawl = ?', (self.crawl_id,))}
+
+
+    '''
+    last_crawl_id - the crawl started last, None for an empty index
+    '''
+    def last_crawl_id(self):
+        row = self.connection.execute('SELECT crawl_id FROM crawls ORDER BY started_at DESC, crawl_id DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+
+    '''
+    claim_new - record that the area lists the urls and return the ones no other area of this
+    crawl has listed yet, in their order (these are the ones to scrape)
+    '''
+    def claim_new(self, site, area, urls):
+        new_urls = []
+        seen_at = now()
+        with self._lock, self.connection:
+            position = self.connection.execute('SELECT COUNT(*) FROM area_restaurants WHERE crawl_id = ? AND site = ? AND area = ?',
+                                               (self.crawl_id, site, area)).fetchone()[0]
+            for url in urls:
+                key = restaurant_key(site, url)
+                self.connection.execute('INSERT OR IGNORE INTO indexed_restaurants (site, restaurant_key, url, first_seen) VALUES (?, ?, ?, ?)',
+                                        (site, key, url, seen_at))
+                cursor = self.connection.execute('INSERT OR IGNORE INTO area_restaurants (crawl_id, site, area, restaurant_key, position) VALUES (?, ?, ?, ?, ?)',
+                                                 (self.crawl_id, site, area, key, position))
+                position += cursor.rowcount
+                if (site, key) not in self._claimed:
+                    self._claimed.add((site, key))
+                    new_urls.append(url)
+        return new_urls
+
+
+    '''
+    mark_scraped - the restaurant got its data in this crawl, with the fingerprint of its page when there is one
+    '''
+    def mark_scraped(self, site, url, fingerprint = None):
+        with self._lock, self.connection:
+            self.connection.execute('''UPDATE indexed_restaurants SET last_crawl = ?, last_scraped_at = ?, url = ?,
+                                       fingerprint = COALESCE(?, fingerprint), changed_crawl = ? WHERE site = ? AND restaurant_key = ?''',
+                                    (self.crawl_id, now(), url, fingerprint, self.crawl_id, site, restaurant_key(site, url)))
+
+
+    '''
+    mark_unchanged - the restaurant was checked in this crawl and its fingerprint had not changed
+    '''
+    def mark_unchanged(self, site, url):
+        with self._lock, self.connection:
+            self.connection.execute('UPDATE indexed_restaurants SET last_crawl = ?, url = ? WHERE site = ? AND restaurant_key = ?',
+                                    (self.crawl_id, url, site, restaurant_key(site, url)))
+
+
+    '''
+    fingerprint - the page fingerprint stored for the restaurant of the url, None when it has none
+    '''
+    def fingerprint(self, site, url):
+        with self._lock:
+            row = self.connection.execute('SELECT fingerprint FROM indexed_restaurants WHERE site = ? AND restaurant_key = ?',
+                                          (site, restaurant_key(site, url))).fetchone()
+        return row[0] if row else None
+
+
+    '''
+    scraped_urls - urls of the restaurants of a site this crawl has scraped (or found unchanged)
+    '''
+    def scraped_urls(self, site):
+        return {url for (url,) in self.connection.execute('SELECT url FROM indexed_restaurants WHERE site = ? AND last_crawl = ?', (site, self.crawl_id))}
+
+
+    '''
+    memberships - dataframe of the area / restaurant pairs of a crawl (this one by default) with the restaurant urls
+    '''
+    def memberships(self, crawl_id = None):
+        return pd.read_sql_query('''
+            SELECT a.site, a.area, a.position, a.restaurant_key, r.url
+            FROM area_restaurants a JOIN indexed_restaurants r ON r.site = a.site AND r.restaurant_key = a.restaurant_key
+            WHERE a.crawl_id = ? ORDER BY a.site, a.area, a.position''', self.connection, params=(crawl_id or self.crawl_id,))
+
+
+    '''
+    summary - per site: areas, listings (area / restaurant pairs), unique restaurants, how many were
+    scraped (or found unchanged) and how many were new or changed
+    '''
+    def summary(self):
+        rows = self.connection.execute('''
+            SELECT a.site, COUNT(DISTINCT a.area), COUNT(*), COUNT(DISTINCT a.restaurant_key),
+                   COUNT(DISTINCT CASE WHEN r.last_crawl = a.crawl_id THEN a.restaurant_key END),
+                   COUNT(DISTINCT CASE WHEN r.changed_crawl = a.crawl_id THEN a.restaurant_key END)
+            FROM area_restaurants a JOIN indexed_restaurants r ON r.site = a.site AND r.restaurant_key = a.restaurant_key
+            WHERE a.crawl_id = ? GROUP BY a.site''', (self.crawl_id,)).fetchall()
+        return {site: {'areas': areas, 'listings': listings, 'restaurants': restaurants, 'scraped': scraped, 'changed': changed}
+                for site, areas, listings, restaurants, scraped, changed in rows}
+
+
+    def finish(self):
+        with self._lock, self.connection:
+            self.connection.execute('UPDATE crawls SET finished_at = ? WHERE crawl_id = ?', (now(), self.crawl_id))
+
+
+    def close(self):
+        self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
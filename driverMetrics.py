@@ -0,0 +1,222 @@
+import functools
+import json
+import math
+import random
+import threading
+from time import perf_counter
+from selenium.webdriver.remote.command import Command
+
+
+# webdriver command -> kind of call it is counted as, the other commands keep their own name
+COMMAND_KINDS = {
+    Command.FIND_ELEMENT: 'find_element',
+    Command.FIND_CHILD_ELEMENT: 'find_element',
+    Command.FIND_ELEMENTS: 'find_elements',
+    Command.FIND_CHILD_ELEMENTS: 'find_elements',
+    Command.W3C_EXECUTE_SCRIPT: 'execute_script',
+    Command.W3C_EXECUTE_SCRIPT_ASYNC: 'execute_script',
+    Command.GET_ELEMENT_TEXT: 'text',
+    Command.GET_ELEMENT_ATTRIBUTE: 'get_attribute',
+    Command.GET_ELEMENT_PROPERTY: 'get_attribute',
+}
+# WebElement.get_attribute runs this script through execute_script
+GET_ATTRIBUTE_SCRIPT = '/* getAttribute */'
+# quantile label -> summary field
+QUANTILES = {'0.5': 'p50', '0.95': 'p95'}
+# durations kept per phase for the quantiles, a long crawl runs a phase many times more often
+RESERVOIR_SIZE = 1024
+
+# the DriverMetrics whose phase is running in each thread, see record_call
+_active = threading.local()
+
+
+def command_kind(driver_command, params):
+    if driver_command == Command.W3C_EXECUTE_SCRIPT and str((params or {}).get('script', '')).startswith(GET_ATTRIBUTE_SCRIPT):
+        return 'get_attribute'
+    return COMMAND_KINDS.get(driver_command, driver_command)
+
+
+'''
+quantile - nearest rank quantile of a sorted list
+'''
+def quantile(values, q):
+    if not values:
+        return None
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+'''
+record_call - add a call to the metrics of the phase running in this thread, nothing when there is none
+(used by utils.try_element and AdaptiveWaiter, which do not know about the scraper)
+'''
+def record_call(kind, seconds, miss = False):
+    metrics = getattr(_active, 'metrics', None)
+    if metrics is not None:
+        metrics.record(kind, seconds, miss)
+
+
+# Class DriverMetrics times the webdriver calls of a scraper and rolls them up per phase
+# attach() wraps driver.execute, so every find_element(s), execute_script, .text and get_attribute
+# round trip is timed, try_element and the adaptive waits add their own calls
+# a phase is a scraper method (get_head_info, extract_dish_card ...), a call is counted in the
+# innermost phase running in its thread, calls outside every phase go to 'other'
+# one DriverMetrics can be shared by the scrapers of a ScraperPool
+# the count and total seconds of a phase are exact, p50 / p95 come from a uniform sample of at
+# most reservoir_size of its durations (reservoir sampling), so the memory does not grow with the crawl
+class DriverMetrics:
+    def __init__(self, reservoir_size = RESERVOIR_SIZE):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reservoir_size = reservoir_size
+        # phase -> {'count', 'seconds', 'sample'}, sample is the list of kept durations
+        self.phases = {}
+        # (phase, kind) -> {'count', 'seconds', 'misses', 'miss_seconds'}
+        self.calls = {}
+
+
+    '''
+    attach - time every command sent through this driver
+    '''
+    def attach(self, driver):
+        execute = driver.execute
+
+        def timed_execute(driver_command, params=None):
+            start = perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.record(command_kind(driver_command, params), perf_counter() - start)
+
+        driver.execute = timed_execute
+        return driver
+
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+    def record(self, kind, seconds, miss = False):
+        stack = self._stack()
+        key = (stack[-1] if stack else 'other', kind)
+        with self._lock:
+            row = self.calls.setdefault(key, {'count': 0, 'seconds': 0.0, 'misses': 0, 'miss_seconds': 0.0})
+            row['count'] += 1
+            row['seconds'] += seconds
+            if miss:
+                row['misses'] += 1
+                row['miss_seconds'] += seconds
+
+
+    '''
+    run_phase - call fn as a phase and record how long it took
+    '''
+    def run_phase(self, name, fn, *args, **kwargs):
+        stack = self._stack()
+        stack.append(name)
+        previous = getattr(_active, 'metrics', None)
+        _active.metrics = self
+        start = perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = perf_counter() - start
+            stack.pop()
+            _active.metrics = previous
+            with self._lock:
+                self._add_duration(name, seconds)
+
+
+    def _add_duration(self, name, seconds):
+        row = self.phases.setdefault(name, {'count': 0, 'seconds': 0.0, 'sample': []})
+        row['count'] += 1
+        row['seconds'] += seconds
+        if len(row['sample']) < self.reservoir_size:
+            row['sample'].append(seconds)
+        else:
+            # the n-th duration replaces a kept one with probability size / n
+            slot = random.randrange(row['count'])
+            if slot < self.reservoir_size:
+                row['sample'][slot] = seconds
+
+
+    '''
+    summary - per phase: count, total seconds, p50 / p95 and the calls made in it by kind
+    '''
+    def summary(self):
+        with self._lock:
+            phases = {name: (row['count'], row['seconds'], sorted(row['sample'])) for name, row in self.phases.items()}
+            calls = {key: dict(row) for key, row in self.calls.items()}
+        summary = {}
+        for name, (count, seconds, sample) in phases.items():
+            summary[name] = {
+                'count': count,
+                'seconds': seconds,
+                'p50': quantile(sample, 0.5),
+                'p95': quantile(sample, 0.95),
+                'calls': {},
+            }
+        for (phase, kind), row in sorted(calls.items()):
+            summary.setdefault(phase, {'count': 0, 'seconds': 0.0, 'p50': None, 'p95': None, 'calls': {}})
+            summary[phase]['calls'][kind] = row
+        return summary
+
+
+    def to_json(self, path = None):
+        text = json.dumps(self.summary(), indent=2)
+        if path:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+    '''
+    to_prometheus - the summary in the prometheus text exposition format
+    written out here rather than with prometheus_client (pinned in requirements.txt): its Summary
+    exports only _count and _sum, not the p50 / p95, and the metrics go to a file once per run,
+    not to a registry served over http
+    '''
+    def to_prometheus(self, path = None, prefix = 'scraper'):
+        summary = self.summary()
+        lines = [
+            f'# HELP {prefix}_phase_seconds Wall time of the scraper phases.',
+            f'# TYPE {prefix}_phase_seconds summary',
+        ]
+        for phase, row in summary.items():
+            if not row['count']:
+                continue
+            for label, field in QUANTILES.items():
+                lines.append(f'{prefix}_phase_seconds{{phase="{phase}",quantile="{label}"}} {row[field]}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {row["seconds"]}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {row["count"]}')
+        for metric, field, help_text in (('webdriver_calls_total', 'count', 'Webdriver calls by phase and kind.'),
+                                         ('webdriver_call_seconds_total', 'seconds', 'Time spent in webdriver calls by phase and kind.'),
+                                         ('webdriver_misses_total', 'misses', 'Element lookups that found nothing, by phase and kind.'),
+                                         ('webdriver_miss_seconds_total', 'miss_seconds', 'Time spent in element lookups that found nothing, by phase and kind.')):
+            lines.append(f'# HELP {prefix}_{metric} {help_text}')
+            lines.append(f'# TYPE {prefix}_{metric} counter')
+            for phase, row in summary.items():
+                for kind, call in row['calls'].items():
+                    lines.append(f'{prefix}_{metric}{{phase="{phase}",kind="{kind}"}} {call[field]}')
+        text = '\n'.join(lines) + '\n'
+        if path:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+'''
+phase - decorator for scraper methods, the call is a phase of self.metrics when the scraper has one
+'''
+def phase(name):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            return metrics.run_phase(name, method, self, *args, **kwargs)
+        return wrapper
+    return decorator
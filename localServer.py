@@ -0,0 +1,113 @@
+'''
+Local stand-in server for the saved pages and api responses in fixtures/, so the scrapers can be run offline.
+
+run from the repo root:
+python localServer.py --site swiggy --port 8000
+then open http://127.0.0.1:8000/restaurants/subway-m-block-connaught-place-delhi-16418
+(for --site zomato, http://127.0.0.1:8000/ncr/haldirams-janpath-new-delhi/order)
+the listings are http://127.0.0.1:8000/ (swiggy) and http://127.0.0.1:8000/ncr/delivery-in-connaught-place (zomato)
+'''
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import argparse
+import os
+import re
+import threading
+from utils import setup_logger
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# url path pattern -> fixture file (relative to fixtures/) served for it
+SITE_ROUTES = {
+    'zomato': [
+        (r'^/[\w-]+/[\w-]+/order$', 'zomato/restaurant.html'),
+        (r'^/[\w-]+/delivery-in-[\w-]+$', 'zomato/listing.html'),
+    ],
+    'swiggy': [
+        (r'^/restaurants/[\w-]+$', 'swiggy/restaurant.html'),
+        (r'^/dapi/menu/pl', 'swiggy/menu.json'),
+        (r'^/dapi/restaurants/list', 'swiggy/listing_update.json'),
+        (r'^/(?:city/[\w-]+)?$', 'swiggy/listing.html'),
+    ],
+}
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json; charset=utf-8',
+}
+
+
+# Class FixtureServer serves fixture files on 127.0.0.1 from a background thread
+# routes - list of (url path regex, fixture file) pairs, the first matching route wins
+class FixtureServer:
+    def __init__(self, routes, port = 0, fixtures_dir = FIXTURES_DIR):
+        self.routes = [(re.compile(pattern), os.path.join(fixtures_dir, path)) for pattern, path in routes]
+        self.logger = setup_logger()
+        self.requests_served = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.thread = None
+
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+    def _handler(self):
+        fixture_server = self
+
+        class FixtureHandler(SimpleHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                for pattern, file_path in fixture_server.routes:
+                    if pattern.search(path):
+                        with open(file_path, 'rb') as f:
+                            body = f.read()
+                        fixture_server.requests_served += 1
+                        self.send_response(200)
+                        self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(file_path)[1], 'application/octet-stream'))
+                        self.send_header('Content-Length', str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                        return
+                self.send_error(404, 'No fixture for this path')
+
+            def log_message(self, format, *args):
+                fixture_server.logger.debug(format % args)
+
+        return FixtureHandler
+
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Serving fixtures on {self.base_url}")
+        return self.base_url
+
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Serve saved pages and api responses for offline scraping.')
+    parser.add_argument('--site', type=str, required=True, choices=sorted(SITE_ROUTES), help='Which site fixtures to serve')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    server = FixtureServer(SITE_ROUTES[args.site], port=args.port)
+    server.logger.info(f"Serving {args.site} fixtures on {server.base_url}")
+    server.server.serve_forever()
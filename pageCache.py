@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from utils import setup_logger
+
+
+# Class PageCache keeps raw page snapshots on disk so the parsers can be rerun without a browser
+# the content is stored gzip compressed under its sha256 (identical snapshots are stored once),
+# and every url has a small index entry pointing at the content of each kind it was saved as
+# kind - 'html' for the rendered page, 'menu_api' for the captured swiggy menu response
+# ttl - seconds a snapshot stays fresh, None keeps them forever
+#
+# layout:
+# <directory>/objects/ab/abcdef...gz - content
+# <directory>/entries/<sha256 of url>.json - {"url": ..., "kinds": {kind: {"digest": ..., "saved_at": ...}}}
+class PageCache:
+    def __init__(self, directory = 'page_cache', ttl = 7 * 24 * 3600):
+        self.directory = directory
+        self.ttl = ttl
+        self.logger = setup_logger()
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'entries'), exist_ok=True)
+
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest + '.gz')
+
+
+    def _entry_path(self, url):
+        return os.path.join(self.directory, 'entries', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+
+    def _read_entry(self, url):
+        path = self._entry_path(url)
+        if not os.path.exists(path):
+            return {"url": url, "kinds": {}}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+    '''
+    _write_atomic - write to a temporary file and rename it, so a crash never leaves half a file
+    '''
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+    '''
+    put - save a snapshot of a url
+    params:-
+    url - page url
+    kind - what the content is ('html', 'menu_api')
+    content - text of the snapshot
+    return - sha256 digest of the content
+    '''
+    def put(self, url, kind, content):
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_atomic(object_path, gzip.compress(data))
+        entry = self._read_entry(url)
+        entry["kinds"][kind] = {"digest": digest, "saved_at": time.time()}
+        self._write_atomic(self._entry_path(url), json.dumps(entry).encode('utf-8'))
+        self.logger.info(f"Cached {kind} of {url} ({len(data)} bytes)")
+        return digest
+
+
+    def is_fresh(self, saved_at):
+        return self.ttl is None or time.time() - saved_at <= self.ttl
+
+
+    '''
+    get - the snapshot of a url, None if it is missing or older than the ttl
+    '''
+    def get(self, url, kind):
+        info = self._read_entry(url)["kinds"].get(kind)
+        if info is None or not self.is_fresh(info["saved_at"]):
+            return None
+        object_path = self._object_path(info["digest"])
+        if not os.path.exists(object_path):
+            return None
+        with open(object_path, 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+
+    '''
+    entries - yield the index entry of every cached url
+    '''
+    def entries(self):
+        entries_dir = os.path.join(self.directory, 'entries')
+        for name in sorted(os.listdir(entries_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(entries_dir, name), encoding='utf-8') as f:
+                    yield json.load(f)
+
+
+    '''
+    urls - urls having a fresh snapshot of this kind
+    '''
+    def urls(self, kind):
+        return [entry["url"] for entry in self.entries()
+                if kind in entry["kinds"] and self.is_fresh(entry["kinds"][kind]["saved_at"])]
+
+
+    '''
+    prune - drop expired snapshots and the content no entry points at any more
+    return - number of content files removed
+    '''
+    def prune(self):
+        referenced = set()
+        for entry in list(self.entries()):
+            kinds = {kind: info for kind, info in entry["kinds"].items() if self.is_fresh(info["saved_at"])}
+            if not kinds:
+                os.remove(self._entry_path(entry["url"]))
+                continue
+            if kinds != entry["kinds"]:
+                entry["kinds"] = kinds
+                self._write_atomic(self._entry_path(entry["url"]), json.dumps(entry).encode('utf-8'))
+            referenced.update(info["digest"] for info in kinds.values())
+
+        removed = 0
+        objects_dir = os.path.join(self.directory, 'objects')
+        for root, _, files in os.walk(objects_dir):
+            for name in files:
+                if name.endswith('.gz') and name[:-3] not in referenced:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        self.logger.info(f"Pruned {removed} cached snapshots")
+        return removed
@@ -0,0 +1,97 @@
+import hashlib
+import json
+
+
+# cyrb53, a fast 53 bit string hash, so the menu is hashed in the page and only the
+# number comes back over the wire
+HASH_FUNCTION = """
+const hash = (str, seed = 0) => {
+    let h1 = 0xdeadbeef ^ seed, h2 = 0x41c6ce57 ^ seed;
+    for (let i = 0, ch; i < str.length; i++) {
+        ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return 4294967296 * (2097151 & h2) + (h1 >>> 0);
+};
+const first = (path, root) => document.evaluate(path, root || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const all = path => {
+    const snap = document.evaluate(path, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    return Array.from({length: snap.snapshotLength}, (_, i) => snap.snapshotItem(i));
+};
+"""
+
+# only the signals that change when the restaurant data does go in: no "Open now" text, ratings
+# or vote counts, those change between two loads of the same page
+
+# zomato - name, cuisines, locality and opening hours from the page state (the head block when
+# there is no state), the dish cards (one h4 each) and their marker colour, name, price and
+# description as the page shows it, read before any "read more" is clicked (the long ones are cut short)
+ZOMATO_FINGERPRINT_SCRIPT = HASH_FUNCTION + """
+const text = node => node ? node.innerText.trim() : '';
+let head = null;
+try {
+    const pages = window.__PRELOADED_STATE__.pages;
+    const sections = pages.restaurant[pages.current.resId].sections;
+    head = {
+        name: sections.SECTION_BASIC_INFO.name,
+        categories: sections.SECTION_BASIC_INFO.cuisine_string,
+        location: sections.SECTION_RES_CONTACT.locality_verbose,
+        opening_hours: sections.SECTION_BASIC_INFO.timing.customised_timings.opening_hours,
+    };
+} catch (e) {
+    let block = first('//div[contains(text(),"Ratings")]');
+    for (let i = 0; i < 6 && block; i++) block = block.parentElement;
+    const section = block && first('./section[1]', block);
+    head = {
+        name: text(block && block.querySelector('h1')),
+        categories: text(section && first('./div', section)),
+        location: text(section && first('./a', section)),
+        opening_hours: null,
+    };
+}
+const sections = all('//h2[contains(text(),"Order Online")]/../../../section');
+const cards = sections.flatMap(section => Array.from(section.querySelectorAll('h4'), h4 => h4.parentElement));
+return {
+    head: head,
+    dishes: cards.length,
+    menu: hash(cards.map(card => {
+        const marker = card.querySelector('i[color]');
+        const price = Array.from(card.querySelectorAll('span')).find(span => span.innerText.trim().startsWith('₹'));
+        const description = card.querySelector('p');
+        return [marker ? marker.getAttribute('color') : '', text(card.querySelector('h4')), text(price),
+                text(description)].join('\\t');
+    }).join('\\n')),
+};
+"""
+
+# swiggy - the name, the cuisine links under the ratings box and the dish texts of the
+# normal-dish-item elements (name, price, offer, description), not their rating blocks
+SWIGGY_FINGERPRINT_SCRIPT = HASH_FUNCTION + """
+const name = document.querySelector('h1');
+const box = first('//div[contains(text(),"for")]/../..');
+const dishes = Array.from(document.querySelectorAll('div[data-testid="normal-dish-item"]'));
+return {
+    head: {
+        name: name ? name.innerText.trim() : '',
+        categories: box ? Array.from(box.querySelectorAll('a'), link => link.innerText.trim()).join(' ') : '',
+    },
+    dishes: dishes.length,
+    menu: hash(dishes.map(dish => {
+        const content = dish.querySelector('p');
+        return content ? content.innerText : '';
+    }).join('\\n')),
+};
+"""
+
+
+'''
+page_fingerprint - fingerprint of the restaurant page open in the driver, from the cheap signals
+the script returns (stable head fields, dish count, menu hash), in one script call
+return - 16 hex characters, the same as long as none of the signals change
+'''
+def page_fingerprint(driver, script):
+    signals = driver.execute_script(script)
+    return hashlib.sha1(json.dumps(signals, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
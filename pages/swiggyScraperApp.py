@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 from swiggyScraper import swiggyScraper
 from swiggyCleaner import swiggyCleaner
+from scraperPool import ScraperPool
+from crawlEngine import CrawlEngine
+from resultStore import ResultStore
+from browserPool import shared_pool
 
 
 # Function to scrape restaurant URLs
@@ -16,15 +20,39 @@ def scrape_restaurant_urls(scraper, num, progress_bar, status_message):
     progress_bar.progress(33)
     return df
 
+# Function to scrape the restaurant urls and data at the same time with the CrawlEngine
+def crawl_restaurants(scraper, pool, num, progress_bar, status_message, workers=1, capture_mode='dom', block_requests=False, resume=False):
+    status_message.write('Scraping restaurant URLs and data, please wait...')
+    store = ResultStore('swiggy_restaurant_data.jsonl')
+    if not resume:
+        store.clear()
+    with CrawlEngine(pool.leased(swiggyScraper), workers=workers, headless=True, capture_mode=capture_mode, block_requests=block_requests) as engine:
+        restaurant_urls = engine.run(discover=lambda on_urls: scraper.get_restaurant_urls(num, on_urls=on_urls),
+                                     skip=store.done_urls(), on_result=store.append,
+                                     progress=lambda done, total: progress_bar.progress(int(66 * done / max(total, num))))
+    pd.DataFrame(restaurant_urls, columns=['url']).to_csv('swiggy_restaurant_url.csv', index=False)
+    df = store.load(restaurant_urls, url_column='url')
+    df.to_csv('swiggy_uncleaned_restaurant_data.csv', index=False)
+    return df
+
 # Function to scrape restaurant data
-def scrape_restaurant_data(df, scraper, progress_bar, status_message):
-    status_message.write('Scraping restaurant data, please wait...')
-    df['restaurant_data'] = None
+def scrape_restaurant_data(df, scraper, pool, progress_bar, status_message, workers=1, capture_mode='dom', block_requests=False, resume=False):
+    # every record goes to the store as soon as it is scraped
+    store = ResultStore('swiggy_restaurant_data.jsonl')
+    if not resume:
+        store.clear()
+    pending = store.pending(df['url'])
+    status_message.write(f'Scraping restaurant data ({len(df) - len(pending)} already done), please wait...')
     
-    for i, url in enumerate(df['url']):
-        df.at[i, 'restaurant_data'] = scraper.get_restaurant_data(url)
-        progress_bar.progress(33 + int(33 * (i + 1) / len(df)))  # Incrementally update progress
+    if workers > 1:
+        with ScraperPool(pool.leased(swiggyScraper), workers=workers, headless=True, capture_mode=capture_mode, block_requests=block_requests) as scraper_pool:
+            scraper_pool.map(pending, progress=lambda done, total: progress_bar.progress(33 + int(33 * done / total)), on_result=store.append)
+    else:
+        for i, url in enumerate(pending):
+            store.append(url, scraper.get_restaurant_data(url))
+            progress_bar.progress(33 + int(33 * (i + 1) / len(pending)))  # Incrementally update progress
     
+    df = store.load(df['url'], url_column='url')
     df.to_csv('swiggy_uncleaned_restaurant_data.csv', index=False)
     return df
 
@@ -34,7 +62,7 @@ def clean_data(df, progress_bar, status_message):
     cleaner = swiggyCleaner(df)
     
     # Perform data cleaning
-    cleaner.apply_transformations()
+    cleaner.apply_transformations(nest_dishes=True)
     
     # Update progress bar incrementally during cleaning process
     progress_bar.progress(70)
@@ -47,6 +75,9 @@ def clean_data(df, progress_bar, status_message):
 st.set_page_config(page_title="Swiggy Scraper", page_icon="")
 # def app():
 
+# the browsers are leased from the pool shared by every session when they are needed, a session does not keep one
+pool = shared_pool()
+
 # Initialize session state variables if they don't exist
 if 'result_df' not in st.session_state:
     st.session_state['result_df'] = None
@@ -56,8 +87,6 @@ if 'location_selected' not in st.session_state:
     st.session_state['location_selected'] = False
 if 'option' not in st.session_state:
     st.session_state['option'] = None
-if 'scraper' not in st.session_state:
-    st.session_state['scraper'] = swiggyScraper()
 # Streamlit app interface
 st.title('Swiggy Restaurant Scraper')
 st.markdown('Enter the location you want to scrape.')
@@ -67,17 +96,18 @@ location = st.text_input('Restaurant location', 'Connaught place')
 # Button to fetch location
 if st.button('Fetch location'):
     st.write('Fetching location...')
-    scraper = st.session_state['scraper']
-    location_dict = scraper.get_location(location)
-    st.session_state['location_dict'] = location_dict  # Store in session state
+    with pool.reserve(1), pool.lease(swiggyScraper, headless=True) as scraper:
+        # only the names are kept, the suggestion elements belong to the leased browser
+        location_list = list(scraper.get_location(location))
+    st.session_state['location_list'] = location_list  # Store in session state
+    st.session_state['location'] = location
     st.session_state['option'] = None  # Reset the option when a new location is fetched
     st.write("Locations fetched successfully.")
     st.session_state['fetch_location_done'] = True  # Indicate that location fetching is done
 
-# Ensure 'location_dict' exists in session state
-if 'location_dict' in st.session_state:
-    location_dict = st.session_state['location_dict']
-    location_list = list(location_dict.keys())  # Convert dict_keys to a list
+# Ensure 'location_list' exists in session state
+if 'location_list' in st.session_state:
+    location_list = st.session_state['location_list']
 
     # Dropdown to select location
     option = st.selectbox(
@@ -90,11 +120,14 @@ if 'location_dict' in st.session_state:
     # Button to confirm location selection
     if st.button('Confirm Location') and option and option != '':
         st.session_state['option'] = option  # Store the selected option in session state
-        scraper = st.session_state['scraper']
-        scraper.select_location(location_dict, option)
         st.session_state['location_selected'] = True  # Indicate location selection done
 
 num = st.number_input('Number of Restaurants', min_value=1, value=25)
+workers = st.number_input('Parallel browsers', min_value=1, max_value=8, value=1)
+block_requests = st.checkbox('Block images, fonts and trackers', value=False)
+capture_mode = st.selectbox('Read restaurant data from', ['dom', 'api'], help="'dom' reads the rendered page, 'api' decodes the menu api response the page fetches")
+engine = st.checkbox('Scrape pages while the listing scrolls', value=False, help='Start scraping restaurant pages as soon as their urls are found instead of after the whole listing')
+resume = st.checkbox('Resume previous run', value=False, help='Skip the restaurants already scraped into swiggy_restaurant_data.jsonl')
 
 # Create message and progress bar
 status_message = st.empty()
@@ -109,21 +142,41 @@ if st.button('Start Scraping'):
         st.write("Please select a location first.")
     else:
         st.write('Starting to scrape...')
-        scraper = st.session_state['scraper']
-        
-        # Step 1: Scrape URLs
-        url_df = scrape_restaurant_urls(scraper, num, progress_bar, status_message)
-        
-        # Step 2: Scrape restaurant data
-        data_df = scrape_restaurant_data(url_df, scraper, progress_bar, status_message)
-        
-        # Step 3: Clean the data
-        result_df = clean_data(data_df, progress_bar, status_message)
-        
-        # Store the result in session state
-        st.session_state.result_df = result_df
+        # the listing browser is kept while the workers scrape, so they are booked together
+        if pool.max_size < 2:
+            workers, engine = 1, False
+        if workers > 1 or engine:
+            workers = min(workers, pool.max_size - 1)
+            browsers = workers + 1
+        else:
+            browsers = 1
+        status_message.write('Waiting for a free browser...')
+        with pool.reserve(browsers), pool.lease(swiggyScraper, headless=True, capture_mode=capture_mode, block_requests=block_requests) as scraper:
+            # the location is selected again in the leased browser
+            location_dict = scraper.get_location(st.session_state['location'])
+            if st.session_state['option'] not in location_dict:
+                data_df = None
+                status_message.write('The selected location is not suggested any more, please fetch the location again.')
+            else:
+                scraper.select_location(location_dict, st.session_state['option'])
+                if engine:
+                    # Step 1 and 2 together: restaurant data is scraped while the urls are found
+                    data_df = crawl_restaurants(scraper, pool, num, progress_bar, status_message, workers, capture_mode, block_requests, resume)
+                else:
+                    # Step 1: Scrape URLs
+                    url_df = scrape_restaurant_urls(scraper, num, progress_bar, status_message)
+
+                    # Step 2: Scrape restaurant data
+                    data_df = scrape_restaurant_data(url_df, scraper, pool, progress_bar, status_message, workers, capture_mode, block_requests, resume)
         
-        status_message.write('Data is ready to download!')
+        if data_df is not None:
+            # Step 3: Clean the data
+            result_df = clean_data(data_df, progress_bar, status_message)
+            
+            # Store the result in session state
+            st.session_state.result_df = result_df
+            
+            status_message.write('Data is ready to download!')
 
 # Display the results if available
 if st.session_state.result_df is not None:
@@ -2,29 +2,84 @@ import streamlit as st
 import pandas as pd
 from zomatoScraper import RestaurantScraper
 from zomatoCleaner import DataCleaner
+from scraperPool import ScraperPool
+from crawlEngine import CrawlEngine
+from zomatoHttpFetcher import ZomatoHttpFetcher
+from resultStore import ResultStore
+from browserPool import shared_pool
 import time
 
+# Function to scrape the restaurant links and pages at the same time with the CrawlEngine
+def crawl_restaurants(url, num, progress_bar, status_message, store, pool, workers=1, fetch_mode='browser', block_requests=False):
+    status_message.write('Restaurant links and data scraping, please wait...')
+    if fetch_mode == 'http':
+        engine = CrawlEngine(ZomatoHttpFetcher, workers=workers)
+    else:
+        engine = CrawlEngine(pool.leased(RestaurantScraper), workers=workers, headless=True, block_requests=block_requests)
+    with pool.lease(RestaurantScraper, headless=True, block_requests=block_requests) as scraper, engine:
+        restaurant_urls = engine.run(discover=lambda on_urls: scraper.get_restaurant_urls(url, num, on_urls=on_urls),
+                                     skip=store.done_urls(), on_result=store.append,
+                                     progress=lambda done, total: progress_bar.progress(int(66 * done / max(total, num))))
+    pd.DataFrame(restaurant_urls, columns=['Web_link']).to_csv('web_links.csv', index=False)
+    return restaurant_urls
+
 # Function to scrape data
-def scrape_data(url, num, progress_bar, status_message):
+# the browsers are leased from the pool shared by every session, the ones the run needs at the same time are booked first
+def scrape_data(url, num, progress_bar, status_message, workers=1, fetch_mode='browser', block_requests=False, resume=False, engine=False):
+    pool = shared_pool()
+    if fetch_mode == 'http':
+        browsers = 1
+    else:
+        if engine and pool.max_size < 2:
+            # the listing and the restaurant pages need two browsers at once
+            engine = False
+        workers = min(workers, pool.max_size - 1 if engine else pool.max_size)
+        browsers = workers + 1 if engine else workers
+    status_message.write('Waiting for a free browser...')
+    with pool.reserve(browsers):
+        return scrape_with_pool(url, num, progress_bar, status_message, pool, workers, fetch_mode, block_requests, resume, engine)
+
+def scrape_with_pool(url, num, progress_bar, status_message, pool, workers, fetch_mode, block_requests, resume, engine):
+    # every record goes to the store as soon as it is scraped
+    store = ResultStore('restaurant_data.jsonl')
+    if not resume:
+        store.clear()
+
+    if engine:
+        restaurant_urls = crawl_restaurants(url, num, progress_bar, status_message, store, pool, workers, fetch_mode, block_requests)
+        df = store.load(restaurant_urls)
+        df.to_csv('uncleaned_restaurant_data.csv', index=False)
+        return df
+
     # Step 1: Scrape restaurant URLs
     status_message.write('Restaurant links scraping, please wait...')
-    scraper = RestaurantScraper(headless=True)
-    restaurant_urls = scraper.get_restaurant_urls(url, num)
-    
-    df = pd.DataFrame(restaurant_urls, columns=['Web_link'])
-    df.to_csv('web_links.csv', index=False)
-    
-    # Update progress to 33% after link scraping
-    progress_bar.progress(33)
-    
-    # Step 2: Fetch restaurant data
-    status_message.write('Restaurant data scraping, please wait...')
-    df['restaurant_data'] = None
+    with pool.lease(RestaurantScraper, headless=True, block_requests=block_requests) as scraper:
+        restaurant_urls = scraper.get_restaurant_urls(url, num)
+        
+        df = pd.DataFrame(restaurant_urls, columns=['Web_link'])
+        df.to_csv('web_links.csv', index=False)
+        
+        # Update progress to 33% after link scraping
+        progress_bar.progress(33)
+        
+        # Step 2: Fetch restaurant data, only for the restaurants not in the store yet
+        pending = store.pending(restaurant_urls)
+        status_message.write(f'Restaurant data scraping ({len(restaurant_urls) - len(pending)} already done), please wait...')
+        
+        if fetch_mode == 'browser' and workers == 1:
+            for i, link in enumerate(pending):
+                store.append(link, scraper.get_restaurant_data(link))
+                progress_bar.progress(33 + int(33 * (i + 1) / len(pending)))  # Incrementally update progress
     
-    for i, link in enumerate(df['Web_link']):
-        df.at[i, 'restaurant_data'] = scraper.get_restaurant_data(link)
-        progress_bar.progress(33 + int(33 * (i + 1) / len(df)))  # Incrementally update progress
+    # the listing browser is back in the pool before the workers lease theirs
+    if fetch_mode == 'http':
+        with ZomatoHttpFetcher(workers=workers) as fetcher:
+            fetcher.get_many(pending, progress=lambda done, total: progress_bar.progress(33 + int(33 * done / total)), on_result=store.append)
+    elif workers > 1:
+        with ScraperPool(pool.leased(RestaurantScraper), workers=workers, headless=True, block_requests=block_requests) as scraper_pool:
+            scraper_pool.map(pending, progress=lambda done, total: progress_bar.progress(33 + int(33 * done / total)), on_result=store.append)
     
+    df = store.load(restaurant_urls)
     df.to_csv('uncleaned_restaurant_data.csv', index=False)
     return df
 
@@ -59,6 +114,11 @@ st.markdown('Enter the URL and number of restaurants to scrape.')
 
 url = st.text_input('Restaurant Listing URL', 'https://www.zomato.com/ncr/delivery-in-connaught-place')
 num = st.number_input('Number of Restaurants', min_value=1, value=25)
+workers = st.number_input('Parallel browsers', min_value=1, max_value=8, value=1)
+block_requests = st.checkbox('Block images, fonts and trackers', value=False)
+fetch_mode = st.selectbox('Fetch restaurant pages with', ['browser', 'http'], help="'http' skips chrome for restaurant pages and reads the page state embedded in the html")
+engine = st.checkbox('Scrape pages while the listing scrolls', value=False, help='Start scraping restaurant pages as soon as their links are found instead of after the whole listing')
+resume = st.checkbox('Resume previous run', value=False, help='Skip the restaurants already scraped into restaurant_data.jsonl')
 
 # Initialize or clear session state
 if 'result_df' not in st.session_state:
@@ -74,7 +134,7 @@ if st.button('Start Scraping'):
 
     
     # Scrape data
-    data_df = scrape_data(url, num, progress_bar, status_message)
+    data_df = scrape_data(url, num, progress_bar, status_message, workers, fetch_mode, block_requests, resume, engine)
     
     # Clean data
     result_df = clean_data(data_df, progress_bar, status_message)
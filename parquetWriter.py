@@ -0,0 +1,182 @@
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import setup_logger
+
+
+# low cardinality text (categories, dish types, days ...) is stored dictionary encoded
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+ZOMATO_DISH = pa.struct([
+    ('name', pa.string()),
+    ('price', pa.float64()),
+    ('votes', pa.int64()),
+    ('rating', pa.float64()),
+    ('dish_type', CATEGORY),
+    ('description', pa.string()),
+])
+
+ZOMATO_SCHEMA = pa.schema([
+    ('Web_link', pa.string()),
+    ('name', pa.string()),
+    ('category', pa.list_(CATEGORY)),
+    ('location', pa.list_(CATEGORY)),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('dining_ratings', pa.float64()),
+    ('dining_votes', pa.int64()),
+    ('delivery_ratings', pa.float64()),
+    ('delivery_votes', pa.int64()),
+    ('days', CATEGORY),
+    ('opening and closing time', pa.string()),
+    ('dish_data', pa.list_(ZOMATO_DISH)),
+])
+
+SWIGGY_DISH = pa.struct([
+    ('dish_name', pa.string()),
+    ('veg_status', CATEGORY),
+    ('price', pa.float64()),
+    ('rating', pa.float64()),
+    ('reviews', pa.int64()),
+    ('bestseller', pa.bool_()),
+    ('customizable', pa.bool_()),
+    ('offer', pa.string()),
+    ('description', pa.string()),
+])
+
+SWIGGY_SCHEMA = pa.schema([
+    ('url', pa.string()),
+    ('name', pa.string()),
+    ('categories', pa.list_(CATEGORY)),
+    ('offers', pa.list_(pa.struct([('offer', pa.string()), ('details', pa.string())]))),
+    ('rating', pa.float64()),
+    ('reviews', pa.int64()),
+    ('dish_data', pa.list_(SWIGGY_DISH)),
+])
+
+NUMBER_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kK])?')
+
+
+'''
+to_float - number from a cleaned value ('4.2', '₹973.72', '338 rupees'), None for 'Not found' and the like
+'''
+def to_float(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)
+    match = NUMBER_PATTERN.search(str(value))
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+'''
+to_count - vote / review counts ('4,018', '57 votes', '10K+' -> 10000), None when there is no number
+'''
+def to_count(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return None if value != value else int(value)
+    match = NUMBER_PATTERN.search(str(value)) if value is not None else None
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', ''))
+    return int(number * 1000 if match.group(2) else number)
+
+
+def to_text(value):
+    if value is None or value != value or value == 'Not found':
+        return None
+    return str(value)
+
+
+def to_list(value):
+    return [str(v) for v in value] if isinstance(value, (list, tuple)) else []
+
+
+'''
+zomato_table - arrow table of the DataCleaner output
+'''
+def zomato_table(df):
+    rows = []
+    for record in df.to_dict('records'):
+        coordinates = record.get('coordinates')
+        coordinates = coordinates if isinstance(coordinates, dict) else {}
+        dishes = record.get('dish_data')
+        rows.append({
+            'Web_link': to_text(record.get('Web_link')),
+            'name': to_text(record.get('name')),
+            'category': to_list(record.get('category')),
+            'location': to_list(record.get('location')),
+            'latitude': to_float(coordinates.get('latitude')),
+            'longitude': to_float(coordinates.get('longitude')),
+            'dining_ratings': to_float(record.get('dining_ratings')),
+            'dining_votes': to_count(record.get('dining_votes')),
+            'delivery_ratings': to_float(record.get('delivery_ratings')),
+            'delivery_votes': to_count(record.get('delivery_votes')),
+            'days': to_text(record.get('days')),
+            'opening and closing time': to_text(record.get('opening and closing time')),
+            'dish_data': [{
+                'name': to_text(dish.get('name')),
+                'price': to_float(dish.get('price')),
+                'votes': to_count(dish.get('votes')),
+                'rating': to_float(dish.get('rating')),
+                'dish_type': to_text(dish.get('dish_type')),
+                'description': to_text(dish.get('description')),
+            } for dish in (dishes if isinstance(dishes, list) else [])],
+        })
+    return pa.Table.from_pylist(rows, schema=ZOMATO_SCHEMA)
+
+
+'''
+swiggy_dish - typed dish from a swiggyCleaner dish dict (see swiggyCleaner.clean_dishes)
+'''
+def swiggy_dish(dish):
+    return {
+        'dish_name': to_text(dish.get('dish_name')),
+        'veg_status': to_text(dish.get('veg_status')),
+        'price': to_float(dish.get('price')),
+        'rating': to_float(dish.get('rating')),
+        'reviews': to_count(dish.get('reviews')),
+        'bestseller': bool(dish.get('bestseller')),
+        'customizable': bool(dish.get('customizable')),
+        'offer': to_text(dish.get('offer')),
+        'description': to_text(dish.get('description')),
+    }
+
+
+'''
+swiggy_table - arrow table of the swiggyCleaner output
+'''
+def swiggy_table(df):
+    rows = []
+    for record in df.to_dict('records'):
+        offers = record.get('offers')
+        dishes = record.get('dish_data')
+        rows.append({
+            'url': to_text(record.get('url')),
+            'name': to_text(record.get('name')),
+            'categories': to_list(record.get('categories')),
+            'offers': [{'offer': k, 'details': v} for k, v in (offers.items() if isinstance(offers, dict) else [])],
+            'rating': to_float(record.get('rating')),
+            'reviews': to_count(record.get('reviews')),
+            'dish_data': [swiggy_dish(dish) for dish in (dishes if isinstance(dishes, list) else [])],
+        })
+    return pa.Table.from_pylist(rows, schema=SWIGGY_SCHEMA)
+
+
+'''
+write_parquet - write a table as zstd compressed parquet
+'''
+def write_parquet(table, path):
+    pq.write_table(table, path, compression='zstd')
+    setup_logger().info(f"Wrote {table.num_rows} rows to {path}")
+    return path
+
+
+'''
+read_parquet - load a parquet output back as a dataframe
+params:-
+columns - optional list of columns to read, the others are not decoded at all
+filters - optional pyarrow filters, e.g. [('rating', '>=', 4.0)]
+'''
+def read_parquet(path, columns = None, filters = None):
+    return pq.read_table(path, columns=columns, filters=filters).to_pandas()
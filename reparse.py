@@ -0,0 +1,92 @@
+'''
+Rebuild the datasets from the page cache without a browser, e.g. after a parser or cleaner fix.
+
+run from the repo root:
+python reparse.py --site zomato --cache page_cache
+python reparse.py --site swiggy --cache page_cache
+
+zomato pages are parsed from the cached rendered html with ZomatoPageParser, swiggy restaurants
+from the cached menu api response with SwiggyMenuParser. The records are written to a result
+store of their own (zomato_reparsed.jsonl / swiggy_reparsed.jsonl, --store for another one) and
+cleaned into the same csv files as the scraping pipelines. The store is emptied first, so the
+live store of a pipeline is never used, the records scraped since the pages were cached stay there.
+'''
+import argparse
+import os
+from pageCache import PageCache
+from resultStore import ResultStore
+from zomatoParser import ZomatoPageParser
+from swiggyApiParser import SwiggyMenuParser
+from swiggyCleaner import swiggyCleaner
+from sqliteStore import SqliteStore
+from zomatoMain import clean_data
+from utils import setup_logger
+
+
+# per site: cached kind read, parser class, store file written and url column
+SITES = {
+    'zomato': ('html', ZomatoPageParser, 'zomato_reparsed.jsonl', 'Web_link'),
+    'swiggy': ('menu_api', SwiggyMenuParser, 'swiggy_reparsed.jsonl', 'url'),
+}
+# the stores the scraping pipelines append to, reparse refuses to empty them
+LIVE_STORES = ('restaurant_data.jsonl', 'swiggy_restaurant_data.jsonl')
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Re-parse cached restaurant pages without a browser.')
+    parser.add_argument('--site', type=str, required=True, choices=sorted(SITES), help='Which site to re-parse')
+    parser.add_argument('--cache', type=str, default='page_cache', help='Directory of the page cache')
+    parser.add_argument('--ttl', type=float, default=None, help='Only use snapshots younger than this many seconds (default: all)')
+    parser.add_argument('--store', type=str, default=None, help='Result store to write, emptied first (default: <site>_reparsed.jsonl, never the store of a pipeline)')
+    parser.add_argument('--parquet', type=str, default=None, help='Also write the cleaned data to this parquet file')
+    parser.add_argument('--sqlite', type=str, default=None, help='Also load the cleaned data into this sqlite database')
+    args = parser.parse_args()
+    if args.store and os.path.basename(os.path.abspath(args.store)) in LIVE_STORES:
+        parser.error(f"--store {args.store} is the store of a scraping pipeline, reparse empties its store first")
+    return args
+
+
+'''
+reparse - run the parser over every cached snapshot of a site and write the records to the store,
+the store is emptied first
+return - dataframe of the records, same columns as the scraping pipeline
+'''
+def reparse(site, cache, store, logger):
+    kind, parser_class, _, url_column = SITES[site]
+    store.clear()
+    urls = cache.urls(kind)
+    for url in urls:
+        try:
+            store.append(url, parser_class(cache.get(url, kind), logger=logger).get_restaurant_data())
+        except Exception as e:
+            logger.error(f"Could not parse cached {kind} of {url}: {e}")
+    logger.info(f"Re-parsed {len(urls)} cached {site} pages")
+    return store.load(urls, url_column=url_column)
+
+
+def clean_swiggy_data(df, parquet_path=None, sqlite_path=None):
+    cleaner = swiggyCleaner(df)
+    cleaner.apply_transformations(nest_dishes=True)
+    cleaned_df = cleaner.get_cleaned_dataframe()
+    cleaned_df.to_csv('swiggy_cleaned_restaurant_data.csv', index=False)
+    if parquet_path:
+        cleaner.to_parquet(parquet_path)
+    if sqlite_path:
+        with SqliteStore(sqlite_path) as db:
+            db.load_swiggy(cleaned_df)
+    return cleaned_df
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    logger = setup_logger()
+    cache = PageCache(args.cache, ttl=args.ttl)
+    store = ResultStore(args.store or SITES[args.site][2])
+
+    df = reparse(args.site, cache, store, logger)
+    if args.site == 'zomato':
+        df.to_csv('restaurant_data_uncleaned.csv', index=False)
+        clean_data(df, args.parquet, args.sqlite)
+    else:
+        df.to_csv('swiggy_uncleaned_restaurant_data.csv', index=False)
+        clean_swiggy_data(df, args.parquet, args.sqlite)
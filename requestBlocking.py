@@ -0,0 +1,195 @@
+import json
+import re
+from collections import Counter
+from utils import setup_logger
+
+
+'''
+fnmatch_to_regex - chrome's `*` wildcard url pattern as a regex
+'''
+def fnmatch_to_regex(pattern):
+    return '^' + '.*'.join(re.escape(part) for part in pattern.split('*')) + '$'
+
+
+# url patterns (chrome's `*` wildcard syntax) for each resource type we can drop
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.ico*'],
+    'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*'],
+}
+RESOURCE_TYPE_REGEX = {
+    resource_type: re.compile('|'.join(fnmatch_to_regex(p) for p in patterns))
+    for resource_type, patterns in RESOURCE_TYPE_PATTERNS.items()
+}
+
+TRACKING_PATTERNS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*connect.facebook.net*', '*clarity.ms*', '*hotjar.com*', '*branch.io*', '*nr-data.net*', '*mixpanel.com*',
+]
+
+# per site defaults. we only read text, hrefs and inline svg attributes, the <img alt="Restaurant Card">
+# nodes of the zomato listing stay in the DOM when their image is blocked and the rating stars of
+# both sites are inline svg, so none of the selectors depend on what is blocked here
+SITE_BLOCKLISTS = {
+    'zomato': {
+        'resource_types': ['image', 'font', 'media'],
+        'url_patterns': TRACKING_PATTERNS,
+    },
+    'swiggy': {
+        'resource_types': ['image', 'font', 'media'],
+        # lottie animations and the image cdn are the heaviest downloads on swiggy pages
+        'url_patterns': TRACKING_PATTERNS + ['*media-assets.swiggy.com*', '*lottie*'],
+    },
+}
+
+# chrome arguments for a render-light profile
+RENDER_LIGHT_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--mute-audio',
+    '--autoplay-policy=user-gesture-required',
+    '--disable-background-networking',
+]
+
+ACCEPT_TYPES = {'image/': 'image', 'font/': 'font', 'video/': 'media', 'audio/': 'media'}
+
+
+# Class RequestBlocker drops requests by resource type or url pattern and reports per page
+# what was blocked and how many bytes the page still loaded.
+# RestaurantScraper applies it through chrome devtools (Network.setBlockedURLs), swiggyScraper
+# through the selenium-wire request interceptor it already runs on.
+# site - 'zomato' / 'swiggy' for the default blocklist, None to start empty
+# resource_types / url_patterns - override the site defaults
+class RequestBlocker:
+    def __init__(self, site = None, resource_types = None, url_patterns = None):
+        defaults = SITE_BLOCKLISTS.get(site, {'resource_types': [], 'url_patterns': []})
+        self.resource_types = list(defaults['resource_types'] if resource_types is None else resource_types)
+        self.url_patterns = list(defaults['url_patterns'] if url_patterns is None else url_patterns)
+        self.logger = setup_logger()
+        self.reports = []
+        self.backend = None
+        # selenium-wire state: blocked requests since the last report, their ids and cursor into driver.requests
+        self._blocked = Counter()
+        self._aborted_ids = set()
+        self._request_cursor = 0
+
+
+    '''
+    blocked_patterns - every url pattern blocked, the patterns of the resource types included
+    '''
+    def blocked_patterns(self):
+        patterns = list(self.url_patterns)
+        for resource_type in self.resource_types:
+            patterns += RESOURCE_TYPE_PATTERNS.get(resource_type, [])
+        return patterns
+
+
+    '''
+    apply_options - add the render-light arguments to the chrome options
+    performance logging is switched on so page_report can read the network events
+    (an empty blocker only measures, it leaves the profile as it is)
+    images dropped by the profile are never requested, so they do not show up in requests_blocked
+    '''
+    def apply_options(self, chrome_options):
+        for argument in RENDER_LIGHT_ARGUMENTS:
+            if not (self.resource_types or self.url_patterns):
+                break
+            if argument.startswith('--blink-settings=imagesEnabled') and 'image' not in self.resource_types:
+                continue
+            chrome_options.add_argument(argument)
+        if 'image' in self.resource_types:
+            chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return chrome_options
+
+
+    '''
+    attach_cdp - block the patterns through chrome devtools, for a plain selenium driver
+    '''
+    def attach_cdp(self, driver):
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_patterns()})
+        self.backend = 'cdp'
+
+
+    '''
+    attach_seleniumwire - block through the selenium-wire request interceptor
+    '''
+    def attach_seleniumwire(self, driver):
+        patterns = [re.compile(fnmatch_to_regex(p)) for p in self.url_patterns]
+
+        def interceptor(request):
+            resource_type = self.classify(request.url, request.headers.get('Accept', ''))
+            if resource_type in self.resource_types or any(p.match(request.url) for p in patterns):
+                self._blocked[resource_type] += 1
+                self._aborted_ids.add(request.id)
+                request.abort()
+
+        driver.request_interceptor = interceptor
+        self.backend = 'wire'
+
+
+    '''
+    classify - resource type of a request from its url extension or Accept header
+    '''
+    def classify(self, url, accept = ''):
+        for resource_type, regex in RESOURCE_TYPE_REGEX.items():
+            if regex.match(url):
+                return resource_type
+        for prefix, resource_type in ACCEPT_TYPES.items():
+            if accept.startswith(prefix):
+                return resource_type
+        return 'other'
+
+
+    '''
+    requests_cleared - call after deleting driver.requests, the next report reads them from the start again
+    '''
+    def requests_cleared(self):
+        self._request_cursor = 0
+
+
+    '''
+    page_report - what was blocked and loaded since the last report (call it once per page)
+    return - dict with requests_blocked, blocked_by_type, requests_loaded and bytes_loaded
+    '''
+    def page_report(self, driver, url = None):
+        if self.backend == 'wire':
+            report = self._wire_report(driver)
+        else:
+            report = self._cdp_report(driver)
+        report['url'] = url
+        self.reports.append(report)
+        self.logger.info(f"Blocked {report['requests_blocked']} requests, loaded {report['requests_loaded']} requests / {report['bytes_loaded']} bytes")
+        return report
+
+
+    def _cdp_report(self, driver):
+        types = {}
+        blocked = Counter()
+        loaded = 0
+        bytes_loaded = 0
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message['method'] == 'Network.requestWillBeSent':
+                types[params['requestId']] = params.get('type', 'Other').lower()
+            elif message['method'] == 'Network.loadingFailed' and params.get('blockedReason'):
+                blocked[types.get(params['requestId'], params.get('type', 'other').lower())] += 1
+            elif message['method'] == 'Network.loadingFinished':
+                loaded += 1
+                bytes_loaded += int(params.get('encodedDataLength', 0))
+        return {'requests_blocked': sum(blocked.values()), 'blocked_by_type': dict(blocked),
+                'requests_loaded': loaded, 'bytes_loaded': bytes_loaded}
+
+
+    def _wire_report(self, driver):
+        requests = driver.requests
+        new_requests = requests[self._request_cursor:]
+        self._request_cursor = len(requests)
+        loaded = [r for r in new_requests if r.response and r.id not in self._aborted_ids]
+        blocked, self._blocked = self._blocked, Counter()
+        self._aborted_ids.clear()
+        return {'requests_blocked': sum(blocked.values()), 'blocked_by_type': dict(blocked),
+                'requests_loaded': len(loaded), 'bytes_loaded': sum(len(r.response.body or b'') for r in loaded)}
+
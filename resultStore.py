@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+import pandas as pd
+from utils import setup_logger
+
+
+# Class ResultStore keeps scraped restaurant records in an append-only jsonl file
+# every record is written and synced to disk as soon as it is scraped, so a crashed or
+# blocked crawl keeps everything done so far and a rerun only scrapes the missing urls
+# one line per record - {"url": ..., "scraped_at": ..., "data": {...}}
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.logger = setup_logger()
+        self._lock = threading.Lock()
+
+
+    '''
+    append - write one record to the end of the store
+    empty results (failed pages) are not stored, so resume tries them again
+    return - True if the record was stored
+    '''
+    def append(self, url, data):
+        if not data:
+            self.logger.warning(f"Not storing empty result for {url}")
+            return False
+        line = json.dumps({
+            "url": url,
+            "scraped_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "data": data
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if f.tell() and not self._ends_with_newline():
+                    # the last write was cut off, start a new line so only that record is lost
+                    f.write('\n')
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return True
+
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+
+    '''
+    records - yield every stored record, a line cut off by a crash is skipped
+    '''
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Skipping unreadable line {line_number} of {self.path}")
+
+
+    '''
+    done_urls - set of urls already in the store
+    '''
+    def done_urls(self):
+        return {record['url'] for record in self.records()}
+
+
+    '''
+    pending - the urls not in the store yet, in the given order
+    '''
+    def pending(self, urls):
+        done = self.done_urls()
+        return [url for url in urls if url not in done]
+
+
+    '''
+    load - dataframe of the stored records for the cleaners
+    params:-
+    urls - optional list of urls, rows come in this order and missing urls get an empty record
+    url_column - name of the url column (Web_link for zomato, url for swiggy)
+    '''
+    def load(self, urls = None, url_column = 'Web_link'):
+        # the latest record of a url wins
+        data = {record['url']: record['data'] for record in self.records()}
+        if urls is None:
+            urls = list(data)
+        return pd.DataFrame({url_column: list(urls), 'restaurant_data': [data.get(url, {}) for url in urls]})
+
+
+    '''
+    clear - remove the store, used when a crawl starts from scratch
+    '''
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from utils import setup_logger
+
+
+# Class ScraperPool runs a scraper method over a list of urls on N browsers at once
+# every worker thread gets its own scraper instance (and so its own chrome driver)
+# results are returned in the same order as the input urls
+class ScraperPool:
+    def __init__(self, scraper_class, workers = 2, **scraper_kwargs):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.scraper_class = scraper_class
+        self.workers = workers
+        self.scraper_kwargs = scraper_kwargs
+        self.logger = setup_logger()
+        self._local = threading.local()
+        self._scrapers = []
+        self._lock = threading.Lock()
+
+
+    '''
+    _get_scraper - return the scraper of the current worker thread, starting it on first use
+    '''
+    def _get_scraper(self):
+        scraper = getattr(self._local, 'scraper', None)
+        if scraper is None:
+            scraper = self.scraper_class(**self.scraper_kwargs)
+            self._local.scraper = scraper
+            with self._lock:
+                self._scrapers.append(scraper)
+            self.logger.info(f"Started {self.scraper_class.__name__} worker {len(self._scrapers)}/{self.workers}")
+        return scraper
+
+
+    def _run(self, method_name, url):
+        return getattr(self._get_scraper(), method_name)(url)
+
+
+    '''
+    map - fan the urls out over the workers
+    params:-
+    urls - list of restaurant urls
+    method_name - scraper method called with each url
+    progress - optional callback(done, total) called as each url finishes
+    on_result - optional callback(url, result) called as each url finishes, e.g. ResultStore.append
+    keep_results - False drops every result once on_result has it, so a long crawl does not hold them all
+    return - list of results in the same order as urls (None for each with keep_results False)
+    '''
+    def map(self, urls, method_name = 'get_restaurant_data', progress = None, on_result = None, keep_results = True):
+        urls = list(urls)
+        results = [None] * len(urls)
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(len(urls), 1))) as executor:
+            futures = {executor.submit(self._run, method_name, url): i for i, url in enumerate(urls)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self.logger.error(f"An error occurred for {urls[i]}: {str(e)}")
+                    results[i] = {}
+                if on_result is not None:
+                    on_result(urls[i], results[i])
+                if not keep_results:
+                    results[i] = None
+                if progress is not None:
+                    progress(done, len(urls))
+        return results
+
+
+    '''
+    wait_records - adaptive wait records of every worker, see waits.summarize_waits
+    '''
+    def wait_records(self):
+        with self._lock:
+            return [record for scraper in self._scrapers for record in scraper.waiter.records]
+
+
+    '''
+    close - quit every driver started by the pool
+    '''
+    def close(self):
+        with self._lock:
+            scrapers, self._scrapers = self._scrapers, []
+        for scraper in scrapers:
+            try:
+                scraper.close_driver()
+            except Exception as e:
+                self.logger.warning(f"Error closing driver: {str(e)}")
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
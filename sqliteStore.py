@@ -0,0 +1,157 @@
+import sqlite3
+from datetime import datetime, timezone
+import pandas as pd
+from parquetWriter import zomato_table, swiggy_table
+from utils import setup_logger
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS restaurants (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT,
+    rating REAL,
+    reviews INTEGER,
+    dining_rating REAL,
+    dining_votes INTEGER,
+    categories TEXT,
+    location TEXT,
+    latitude REAL,
+    longitude REAL,
+    opening_hours TEXT,
+    loaded_at TEXT NOT NULL,
+    UNIQUE (site, url)
+);
+CREATE TABLE IF NOT EXISTS dishes (
+    id INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    name TEXT,
+    dish_type TEXT,
+    price REAL,
+    rating REAL,
+    votes INTEGER,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_restaurants_name ON restaurants(name);
+CREATE INDEX IF NOT EXISTS idx_dishes_restaurant ON dishes(restaurant_id);
+CREATE INDEX IF NOT EXISTS idx_dishes_name ON dishes(name);
+CREATE INDEX IF NOT EXISTS idx_dishes_type ON dishes(dish_type);
+CREATE INDEX IF NOT EXISTS idx_dishes_price ON dishes(price);
+CREATE INDEX IF NOT EXISTS idx_dishes_rating ON dishes(rating);
+'''
+
+# swiggy marks dishes 'Veg Item' / 'Non-veg item', zomato 'veg' / 'non-veg'
+DISH_TYPES = {'veg item': 'veg', 'non-veg item': 'non-veg', 'veg': 'veg', 'non-veg': 'non-veg'}
+
+RESTAURANT_COLUMNS = ['site', 'url', 'name', 'rating', 'reviews', 'dining_rating', 'dining_votes', 'categories',
+                      'location', 'latitude', 'longitude', 'opening_hours', 'loaded_at']
+DISH_COLUMNS = ['restaurant_id', 'name', 'dish_type', 'price', 'rating', 'votes', 'description']
+
+
+'''
+dish_type - the common veg / non-veg value of both sites
+'''
+def dish_type(value):
+    return DISH_TYPES.get(value.lower(), value) if value else None
+
+
+# Class SqliteStore loads the cleaned data of both sites into one normalized database
+# restaurants - one row per (site, url), reloading a restaurant replaces it and its dishes
+# dishes - one row per dish, linked to its restaurant
+# the values are typed the same way as the parquet output (see parquetWriter)
+class SqliteStore:
+    def __init__(self, path = 'restaurants.db'):
+        self.path = path
+        self.logger = setup_logger()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+
+    '''
+    _load - insert restaurants with their dishes in one transaction
+    params - list of (restaurant row dict, list of dish row dicts)
+    '''
+    def _load(self, site, restaurants):
+        loaded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        insert_restaurant = f"INSERT INTO restaurants ({', '.join(RESTAURANT_COLUMNS)}) VALUES ({', '.join('?' * len(RESTAURANT_COLUMNS))})"
+        insert_dish = f"INSERT INTO dishes ({', '.join(DISH_COLUMNS)}) VALUES ({', '.join('?' * len(DISH_COLUMNS))})"
+        dish_count = 0
+        with self.connection:
+            # the previous load of the same restaurants goes, their dishes with them (on delete cascade)
+            self.connection.executemany('DELETE FROM restaurants WHERE site = ? AND url = ?',
+                                        [(site, restaurant['url']) for restaurant, _ in restaurants])
+            for restaurant, dishes in restaurants:
+                restaurant = dict(restaurant, site=site, loaded_at=loaded_at)
+                cursor = self.connection.execute(insert_restaurant, [restaurant.get(c) for c in RESTAURANT_COLUMNS])
+                self.connection.executemany(insert_dish, [
+                    [cursor.lastrowid] + [dish.get(c) for c in DISH_COLUMNS[1:]] for dish in dishes
+                ])
+                dish_count += len(dishes)
+        self.logger.info(f"Loaded {len(restaurants)} {site} restaurants and {dish_count} dishes into {self.path}")
+
+
+    '''
+    load_zomato - load the DataCleaner output
+    '''
+    def load_zomato(self, df):
+        restaurants = []
+        for row in zomato_table(df).to_pylist():
+            restaurants.append(({
+                'url': row['Web_link'],
+                'name': row['name'],
+                'rating': row['delivery_ratings'],
+                'reviews': row['delivery_votes'],
+                'dining_rating': row['dining_ratings'],
+                'dining_votes': row['dining_votes'],
+                'categories': ', '.join(row['category']),
+                'location': ', '.join(row['location']),
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'opening_hours': ': '.join(v for v in (row['days'], row['opening and closing time']) if v),
+            }, [dict(dish, dish_type=dish_type(dish['dish_type'])) for dish in row['dish_data']]))
+        self._load('zomato', restaurants)
+
+
+    '''
+    load_swiggy - load the swiggyCleaner output
+    '''
+    def load_swiggy(self, df):
+        restaurants = []
+        for row in swiggy_table(df).to_pylist():
+            restaurants.append(({
+                'url': row['url'],
+                'name': row['name'],
+                'rating': row['rating'],
+                'reviews': row['reviews'],
+                'categories': ', '.join(row['categories']),
+            }, [{
+                'name': dish['dish_name'],
+                'dish_type': dish_type(dish['veg_status']),
+                'price': dish['price'],
+                'rating': dish['rating'],
+                'votes': dish['reviews'],
+                'description': dish['description'],
+            } for dish in row['dish_data']]))
+        self._load('swiggy', restaurants)
+
+
+    '''
+    query - run a select and return a dataframe
+    e.g. store.query("SELECT r.name, d.name, d.price FROM dishes d JOIN restaurants r ON r.id = d.restaurant_id WHERE d.dish_type = ? AND d.price < ?", ('veg', 200))
+    '''
+    def query(self, sql, params = ()):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+
+    def close(self):
+        self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
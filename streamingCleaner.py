@@ -0,0 +1,195 @@
+'''
+Clean restaurant records as they come in and append them to the cleaned outputs, so the memory
+used stays the same however large the crawl is.
+
+run from the repo root, to clean an existing store or uncleaned csv chunk by chunk:
+python streamingCleaner.py --site zomato --input restaurant_data.jsonl
+python streamingCleaner.py --site swiggy --input swiggy_uncleaned_restaurant_data.csv --parquet swiggy.parquet
+
+zomatoMain.py --stream cleans every restaurant while the crawl is still running.
+'''
+import argparse
+import os
+import threading
+import pandas as pd
+import pyarrow.parquet as pq
+from zomatoCleaner import DataCleaner
+from swiggyCleaner import swiggyCleaner
+from resultStore import ResultStore
+from uncleanedLoader import read_uncleaned
+from sqliteStore import SqliteStore
+from parquetWriter import zomato_table, swiggy_table, ZOMATO_SCHEMA, SWIGGY_SCHEMA
+from utils import setup_logger
+
+
+# the columns of the cleaned csv files, every chunk is written with exactly these
+ZOMATO_COLUMNS = ['Web_link', 'name', 'category', 'location', 'coordinates', 'dish_data', 'dining_ratings',
+                  'dining_votes', 'delivery_ratings', 'delivery_votes', 'days', 'opening and closing time']
+SWIGGY_COLUMNS = ['url', 'name', 'categories', 'offers', 'dish_data', 'rating', 'reviews']
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Clean a result store or uncleaned csv chunk by chunk.')
+    parser.add_argument('--site', type=str, required=True, choices=['zomato', 'swiggy'], help='Which cleaner to use')
+    parser.add_argument('--input', type=str, required=True, help='Result store (.jsonl) or uncleaned csv to clean')
+    parser.add_argument('--output', type=str, default=None, help='Cleaned csv to write (default: the csv of the pipeline)')
+    parser.add_argument('--parquet', type=str, default=None, help='Also write the cleaned data to this parquet file')
+    parser.add_argument('--sqlite', type=str, default=None, help='Also load the cleaned data into this sqlite database')
+    parser.add_argument('--chunk_size', type=int, default=500, help='Restaurants cleaned and written together')
+    return parser.parse_args()
+
+
+'''
+clean_zomato_chunk - run the DataCleaner steps over a frame of Web_link / restaurant_data rows
+'''
+def clean_zomato_chunk(df):
+    cleaner = DataCleaner(df)
+    cleaner.convert_dict_column('restaurant_data')
+    cleaner.clean_ratings()
+    cleaner.process_time_column()
+    return cleaner.get_cleaned_dataframe()
+
+
+'''
+clean_swiggy_chunk - run the swiggyCleaner transformations over a frame of url / restaurant_data rows
+'''
+def clean_swiggy_chunk(df):
+    # json_normalize gives a fresh range index, the chunk has to have one too
+    cleaner = swiggyCleaner(df.reset_index(drop=True))
+    cleaner.apply_transformations(nest_dishes=True)
+    return cleaner.get_cleaned_dataframe()
+
+
+# per site: url column, csv columns, chunk cleaning, arrow table / schema, sqlite loader and default csv
+SITES = {
+    'zomato': ('Web_link', ZOMATO_COLUMNS, clean_zomato_chunk, zomato_table, ZOMATO_SCHEMA, 'load_zomato', 'cleaned_restaurant_data.csv'),
+    'swiggy': ('url', SWIGGY_COLUMNS, clean_swiggy_chunk, swiggy_table, SWIGGY_SCHEMA, 'load_swiggy', 'swiggy_cleaned_restaurant_data.csv'),
+}
+
+
+# Class StreamingCleaner cleans restaurant records a chunk at a time and appends them to the outputs
+# add() takes the same (url, data) as ResultStore.append, so it can be used as an on_result callback
+# records are buffered up to chunk_size, cleaned with the site cleaner and written to the csv (and
+# the parquet file / sqlite database when given), then dropped. chunk_size = 1 cleans every record
+# on its own, a few hundred keeps the vectorized cleaning fast at a memory cost of one chunk
+class StreamingCleaner:
+    def __init__(self, site, csv_path = None, parquet_path = None, sqlite_path = None, chunk_size = 500):
+        self.site = site
+        self.url_column, self.columns, self.clean_chunk, self.to_table, self.schema, self.sqlite_loader, default_csv = SITES[site]
+        self.csv_path = csv_path or default_csv
+        self.parquet_path = parquet_path
+        self.sqlite_path = sqlite_path
+        self.chunk_size = max(chunk_size, 1)
+        self.logger = setup_logger()
+        self.cleaned = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._parquet_writer = None
+        self._db = SqliteStore(sqlite_path) if sqlite_path else None
+        # a new run starts a new csv, the chunks are appended after the header
+        if os.path.exists(self.csv_path):
+            os.remove(self.csv_path)
+
+
+    '''
+    add - queue one scraped record, cleaning and writing the chunk once it is full
+    empty results are skipped, the same as in the result store
+    '''
+    def add(self, url, data):
+        if not data:
+            return False
+        with self._lock:
+            self._buffer.append((url, data))
+            if len(self._buffer) >= self.chunk_size:
+                self._flush()
+        return True
+
+
+    def add_many(self, records):
+        for url, data in records:
+            self.add(url, data)
+
+
+    '''
+    _flush - clean the buffered records and append them to every output
+    '''
+    def _flush(self):
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        df = pd.DataFrame({self.url_column: [url for url, _ in records], 'restaurant_data': [data for _, data in records]})
+        cleaned_df = self.clean_chunk(df)
+        extra = [column for column in cleaned_df.columns if column not in self.columns]
+        if extra:
+            self.logger.warning(f"Dropping unexpected columns {extra} from the cleaned {self.site} chunk")
+        cleaned_df = cleaned_df.reindex(columns=self.columns)
+
+        cleaned_df.to_csv(self.csv_path, mode='a', header=not os.path.exists(self.csv_path), index=False)
+        if self.parquet_path:
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.parquet_path, self.schema, compression='zstd')
+            self._parquet_writer.write_table(self.to_table(cleaned_df))
+        if self._db is not None:
+            getattr(self._db, self.sqlite_loader)(cleaned_df)
+        self.cleaned += len(cleaned_df)
+        self.logger.info(f"Cleaned {len(cleaned_df)} {self.site} restaurants ({self.cleaned} so far) into {self.csv_path}")
+
+
+    '''
+    close - clean what is left in the buffer and close the outputs
+    '''
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+                self._parquet_writer = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        return self.cleaned
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+'''
+iter_store_records - (url, data) of every url in a result store, the latest record of a url wins
+the store is read twice, the first pass only keeps the line number of each url
+'''
+def iter_store_records(path):
+    store = ResultStore(path)
+    latest = {record['url']: i for i, record in enumerate(store.records())}
+    for i, record in enumerate(store.records()):
+        if latest[record['url']] == i:
+            yield record['url'], record['data']
+
+
+'''
+iter_csv_records - (url, data) of every row of an uncleaned csv, read chunk_size rows at a time
+(see uncleanedLoader, repr and json encoded restaurant_data are both read)
+'''
+def iter_csv_records(path, chunk_size = 500):
+    for chunk in read_uncleaned(path, chunk_size):
+        yield from zip(chunk.iloc[:, 0], chunk['restaurant_data'])
+
+
+'''
+iter_records - records of a result store (.jsonl) or an uncleaned csv
+'''
+def iter_records(path, chunk_size = 500):
+    if path.endswith('.jsonl'):
+        return iter_store_records(path)
+    return iter_csv_records(path, chunk_size)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    with StreamingCleaner(args.site, args.output, args.parquet, args.sqlite, args.chunk_size) as cleaner:
+        cleaner.add_many(iter_records(args.input, args.chunk_size))
+    setup_logger().info(f"Cleaned {cleaner.cleaned} {args.site} restaurants from {args.input}")
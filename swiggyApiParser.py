@@ -0,0 +1,132 @@
+import json
+import re
+from utils import setup_logger
+
+
+# captured request urls of the swiggy menu api (one response per restaurant page)
+MENU_API_PATTERN = re.compile(r'/dapi/menu/')
+
+RESTAURANT_CARD = 'type.googleapis.com/swiggy.presentation.food.v2.Restaurant'
+OFFER_CARD = 'type.googleapis.com/swiggy.presentation.food.v2.OfferInfoWithStyle'
+ITEM_CATEGORY_CARD = 'type.googleapis.com/swiggy.presentation.food.v2.ItemCategory'
+NESTED_ITEM_CATEGORY_CARD = 'type.googleapis.com/swiggy.presentation.food.v2.NestedItemCategory'
+
+
+'''
+format_price - price from the api is in paise, the page shows whole rupees without decimals (338)
+and the rest with two decimals (66.67, 220.50)
+'''
+def format_price(paise):
+    paise = int(paise)
+    return str(paise // 100) if paise % 100 == 0 else f"{paise / 100:.2f}"
+
+
+# Class SwiggyMenuParser builds the restaurant record straight from the menu api json
+# the record has the same shape as swiggyScraper.get_restaurant_data builds from the DOM
+# (same text in name, ratings, categories, offers and dish_content / ratings_content) so
+# swiggyCleaner works on both without changes
+class SwiggyMenuParser:
+    def __init__(self, menu_json, logger = None):
+        if isinstance(menu_json, (str, bytes)):
+            menu_json = json.loads(menu_json)
+        self.menu = menu_json
+        self.logger = logger or setup_logger()
+
+
+    '''
+    iter_cards - yield every card of the response (the top level cards and the grouped menu cards)
+    '''
+    def iter_cards(self):
+        for card in self.menu.get('data', {}).get('cards', []):
+            inner = card.get('card', {}).get('card')
+            if inner:
+                yield inner
+            grouped = card.get('groupedCard', {}).get('cardGroupMap', {})
+            for group in grouped.values():
+                for group_card in group.get('cards', []):
+                    inner = group_card.get('card', {}).get('card')
+                    if inner:
+                        yield inner
+
+
+    '''
+    get_head_info - name, ratings, categories and offers, same text as the page head
+    '''
+    def get_head_info(self):
+        info = {}
+        offers = ['Deals for you']
+        for card in self.iter_cards():
+            if card.get('@type') == RESTAURANT_CARD:
+                info = card.get('info', {})
+            style = card.get('gridElements', {}).get('infoWithStyle', {})
+            if style.get('@type') == OFFER_CARD:
+                for offer in style.get('offers', []):
+                    offer_info = offer.get('info', {})
+                    coupon = offer_info.get('couponCode')
+                    offers.append(offer_info.get('header', ''))
+                    offers.append(offer_info.get('description') or (f"USE {coupon}" if coupon else ''))
+
+        if not info:
+            self.logger.warning("Restaurant card not found in the menu response")
+        cuisines = info.get('cuisines', [])
+        return {
+            "name": info.get('name', 'Not found'),
+            "ratings": f"{info.get('avgRatingString', '')} ({info.get('totalRatingsString', '')})\n•\n{info.get('costForTwoMessage', '')}",
+            # the page renders the cuisines as links with a trailing comma except the last one
+            "categories": [f"{c}," for c in cuisines[:-1]] + cuisines[-1:],
+            "offers": offers
+        }
+
+
+    '''
+    iter_items - yield the info dict of every dish in menu order, nested categories included
+    '''
+    def iter_items(self):
+        for card in self.iter_cards():
+            if card.get('@type') == ITEM_CATEGORY_CARD:
+                categories = [card]
+            elif card.get('@type') == NESTED_ITEM_CATEGORY_CARD:
+                categories = card.get('categories', [])
+            else:
+                continue
+            for category in categories:
+                for item in category.get('itemCards', []):
+                    yield item.get('card', {}).get('info', {})
+
+
+    '''
+    extract_dish - dish_content and ratings_content for one dish, same text as the dish element
+    params - info dict of the dish from the api
+    '''
+    def extract_dish(self, info):
+        veg = 'Veg Item' if info.get('itemAttribute', {}).get('vegClassifier') == 'VEG' else 'Non-veg item'
+        parts = [f"{veg}. {info.get('name', '')}. "]
+        if info.get('isBestseller'):
+            parts.append("This item is a Bestseller, ")
+        parts.append(f"Costs: {format_price(info.get('price') or info.get('defaultPrice') or 0)} rupees, ")
+        for tag in info.get('offerTags', [])[:1]:
+            parts.append(f"Offer: Get {tag.get('title', '')}; {tag.get('subTitle', '')}, ")
+        if info.get('description'):
+            parts.append(f"Description: {info['description']} ")
+        if info.get('addons') or info.get('variants') or info.get('variantsV2'):
+            parts.append("This item is customizable. ")
+        parts.append("Swipe right to add item to cart.")
+
+        rating = info.get('ratings', {}).get('aggregatedRating', {})
+        if rating.get('rating'):
+            ratings_content = f"{rating['rating']}\n({rating.get('ratingCountV2', '')})"
+        else:
+            ratings_content = 'Not found'
+        return {
+            "dish_content": ''.join(parts),
+            "ratings_content": ratings_content
+        }
+
+
+    '''
+    get_restaurant_data - the whole restaurant record, head info and dish_data
+    '''
+    def get_restaurant_data(self):
+        data = self.get_head_info()
+        data["dish_data"] = [self.extract_dish(info) for info in self.iter_items()]
+        return data
@@ -1,11 +1,98 @@
+import numpy as np
 import pandas as pd
 import re
+from itertools import chain, repeat
 from utils import setup_logger
+from parquetWriter import swiggy_table, write_parquet
+
+
+# dish_content as the page renders it, e.g.
+# 'Veg Item. Paneer Tikka Sub. This item is a Bestseller, Costs: 220.50 rupees, Offer: Get 20% off; on first order, Description: ... This item is customizable. Swipe right to add item to cart.'
+# the text is split at its fixed markers with str.partition, the description is sliced off between its marker and the tail
+DISH_TAIL = 'Swipe right to add item to cart.'
+CUSTOMIZABLE = 'This item is customizable. '
+CUSTOMIZABLE_TAIL = CUSTOMIZABLE + DISH_TAIL
+BESTSELLER = 'This item is a Bestseller, '
+DESCRIPTION = 'Description: '
+OFFER = 'Offer: '
+# the offer runs up to the first of these, or up to the tail
+OFFER_ENDS = (', ' + DESCRIPTION, ', ' + CUSTOMIZABLE)
+VEG_STATUSES = ('Veg Item', 'Non-veg item')
+DISH_COLUMNS = ['veg_status', 'dish_name', 'price', 'bestseller', 'offer', 'description', 'customizable']
+DISH_UNMATCHED = (None, None, float('nan'), False, None, None, False)
+# ratings_content - '4.7\n(3)', 'Not found' when the dish has no rating
+DISH_RATING_PATTERN = re.compile(r'^(?P<rating>\d+(?:\.\d+)?)\s*\((?P<reviews>[^)]*)\)')
+RATING_COLUMNS = ['rating', 'reviews']
+
+
+def split_dish_content(text):
+    """
+    Split one dish_content into the DISH_COLUMNS values, DISH_UNMATCHED if it does not match.
+    """
+    try:
+        head, rupees, rest = text.partition(' rupees, ')
+    except AttributeError:
+        return DISH_UNMATCHED
+    head, costs, price = head.rpartition('Costs: ')
+    veg_status, _, head = head.partition('. ')
+    if not rupees or not costs or veg_status not in VEG_STATUSES or not rest.endswith(DISH_TAIL):
+        return DISH_UNMATCHED
+    bestseller = head.endswith(BESTSELLER)
+    if bestseller:
+        head = head[:-len(BESTSELLER)]
+    if not head.endswith('. '):
+        return DISH_UNMATCHED
+    try:
+        price = float(price)
+    except ValueError:
+        price = to_number(price.replace(',', ''))
+        if price is None:
+            return DISH_UNMATCHED
+    offer = None
+    if rest.startswith(OFFER):
+        rest = rest[:-len(DISH_TAIL)]
+        ends = [end for end in (rest.find(separator) for separator in OFFER_ENDS) if end >= 0]
+        if rest.endswith(', '):
+            ends.append(len(rest) - 2)
+        if ends:
+            end = min(ends)
+            offer, rest = rest[len(OFFER):end], rest[end + 2:]
+        rest += DISH_TAIL
+    customizable = rest.endswith(CUSTOMIZABLE_TAIL)
+    if rest.startswith(DESCRIPTION):
+        description = rest[len(DESCRIPTION):-len(CUSTOMIZABLE_TAIL if customizable else DISH_TAIL) - 1]
+    else:
+        description = None
+    return veg_status, head[:-2], price, bestseller, offer, description, customizable
+
+
+def split_ratings_content(text):
+    """
+    Rating and number of reviews of one ratings_content, '4.7\n(1.2K)' -> (4.7, 1200), (nan, None) when there is none.
+    """
+    match = DISH_RATING_PATTERN.match(text) if isinstance(text, str) else None
+    if match is None:
+        return float('nan'), None
+    reviews = match.group('reviews').strip().upper().rstrip('+')
+    thousands = reviews.endswith('K')
+    count = to_number(reviews.rstrip('K').replace(',', ''))
+    if count is not None:
+        count = round(count * 1000 if thousands else count)
+    return float(match.group('rating')), count
+
+
+def to_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
 
 class swiggyCleaner:
     def __init__(self, dataframe):
         self.df = dataframe
         self.logger = setup_logger()
+        self.dishes = None
 
     def convert_restaurant_data(self, column_name):
         f"""
@@ -52,59 +139,59 @@ class swiggyCleaner:
         return offers
 
 
-    def dish_info(self, paragraph):
-        """
-        Extract dish information from a paragraph.
-        """
-        data_list = paragraph.split('. ')
-        veg_status = data_list[0] if len(data_list) > 0 else None
-        dish_name = data_list[1] if len(data_list) > 1 else None
-        items = paragraph.split(', ', 1)
-        data_dict = {}
-
-        for item in items:
-            # Check if ': ' is in item before attempting to split
-            if ': ' in item:
-                key, value = item.split(': ', 1)
-                data_dict[key.strip()] = value.strip()
-            else:
-                # If the item doesn't contain ': ', store the entire item with a None value
-                data_dict[item.strip()] = None
-        
-        data_dict['veg_status'] = veg_status
-        data_dict['dish_name'] = dish_name
-        return data_dict
-
-
-    def clean_rating_reviews(self, text):
-        """
-        Clean and extract ratings and reviews from text.
-        """
-        text = text.replace('\n', ' ').replace('(', '').replace(')', '')
-        parts = text.split()
-
-        if len(parts) == 2:
-            return {"rating": parts[0], "reviews": parts[1]}
-        else:
-            return {"rating": None, "reviews": None}
-
-
-    def dish_card_clean(self, dish_data):
-        """
-        Clean and extract dish card information from a list of dishes.
-        """
-        data = []
-        for dish in dish_data:
-            info = self.dish_info(dish['dish_content'])
-            rating = self.clean_rating_reviews(dish['ratings_content'])
-            new = info | rating
-            data.append(new)
-        return data
-
-
-    def apply_transformations(self):
+    def clean_dishes(self, column_name):
+        """
+        Extract veg status, name, price, offer, description, rating and reviews of every dish in the
+        column into one long frame, one row per dish, 'restaurant' is the row of the restaurant.
+        Each distinct dish text and rating text is split once, every dish keeps the code of its text
+        and the columns are taken from the split values by code.
+        """
+        dish_lists = [[dish for dish in dishes if type(dish) is dict] if isinstance(dishes, list) else [] for dishes in self.df[column_name]]
+        counts = list(map(len, dish_lists))
+        dishes = list(chain.from_iterable(dish_lists))
+
+        columns = {'restaurant': np.repeat(self.df.index.to_numpy(), counts)}
+        for key, split, names in (('dish_content', split_dish_content, DISH_COLUMNS), ('ratings_content', split_ratings_content, RATING_COLUMNS)):
+            texts = {}
+            codes = [texts.setdefault(dish.get(key), len(texts)) for dish in dishes]
+            # the split values go flat into one array, a row per distinct text, so no tuple is kept per text
+            values = np.fromiter(chain.from_iterable(map(split, texts)), dtype=object, count=len(texts) * len(names)).reshape(-1, len(names))
+            # every text distinct, the codes are the rows already
+            codes = None if len(texts) == len(codes) else np.array(codes, dtype=np.intp)
+            for position, name in enumerate(names):
+                column = values[:, position]
+                if name in ('price', 'rating'):
+                    column = column.astype(float)
+                elif name in ('bestseller', 'customizable'):
+                    column = column.astype(bool)
+                elif name == 'reviews':
+                    column = pd.array(column, dtype='Int64')
+                columns[name] = column if codes is None else column.take(codes)
+        dishes = pd.DataFrame(columns, copy=False)
+        unmatched = int(dishes['dish_name'].isna().sum())
+        if unmatched:
+            self.logger.warning(f"{unmatched} dishes did not match the dish text pattern")
+        return dishes
+
+
+    def nest_dishes(self, dishes):
+        """
+        Put the cleaned dishes back as a list of dicts per restaurant row, [] for a restaurant without dishes.
+        The dicts are made straight from the column values, the dishes are in restaurant order.
+        """
+        columns = [column for column in dishes.columns if column not in ('restaurant', 'url')]
+        values = [dishes[column].to_numpy(dtype=object, na_value=None).tolist() for column in columns]
+        records = list(map(dict, map(zip, repeat(columns), zip(*values))))
+        counts = np.bincount(self.df.index.get_indexer(dishes['restaurant']), minlength=len(self.df))
+        ends = np.cumsum(counts).tolist()
+        return pd.Series([records[end - count:end] for end, count in zip(ends, counts.tolist())], index=self.df.index, dtype=object)
+
+
+    def apply_transformations(self, nest_dishes = False):
         """
         Apply all cleaning transformations to the dataframe and log the process.
+        The dishes are cleaned into one long frame (get_dishes_dataframe) and dish_data is left out
+        of the cleaned frame, nest_dishes True puts them back into dish_data as a list of dicts per restaurant.
         """
         try:
             self.logger.info("Starting data cleaning process.")
@@ -119,8 +206,15 @@ class swiggyCleaner:
             self.logger.info('Category Column cleaning process completed successfully')
             self.df['offers'] = self.df['offers'].apply(self.clean_offer)
             self.logger.info('offers Column cleaning process completed successfully')
-            self.df['dish_data'] = self.df['dish_data'].apply(self.dish_card_clean)
-            self.logger.info('dish_data Column cleaning process completed successfully')
+            self.dishes = self.clean_dishes('dish_data')
+            if 'url' in self.df:
+                self.dishes.insert(1, 'url', self.df['url'].reindex(self.dishes['restaurant']).to_numpy())
+            if nest_dishes:
+                self.df['dish_data'] = self.nest_dishes(self.dishes)
+                self.logger.info('dish_data Column cleaning process completed successfully')
+            else:
+                self.df = self.df.drop(columns='dish_data')
+                self.logger.info(f'dish_data Column cleaned into {len(self.dishes)} dish rows, see get_dishes_dataframe')
 
             self.logger.info("Data cleaning process completed successfully.")
         except Exception as e:
@@ -134,3 +228,20 @@ class swiggyCleaner:
         return self.df
 
 
+    def get_dishes_dataframe(self):
+        """
+        Return the cleaned dishes, one row per dish, 'restaurant' is the row of the restaurant.
+        """
+        return self.dishes
+
+
+    def to_parquet(self, path):
+        """
+        Write the cleaned dataframe as parquet, dish_data as a list of typed structs.
+        """
+        df = self.df
+        if 'dish_data' not in df and self.dishes is not None:
+            df = df.assign(dish_data=self.nest_dishes(self.dishes))
+        return write_parquet(swiggy_table(df), path)
+
+
@@ -1,22 +1,74 @@
 from selenium.webdriver.common.by import By
 from seleniumwire2 import webdriver
+from seleniumwire2.utils import decode
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
 from utils import setup_logger, take_screenshot, try_element
-from time import sleep 
+from cardHarvester import CardHarvester
+from swiggyApiParser import SwiggyMenuParser, MENU_API_PATTERN
+from requestBlocking import RequestBlocker
+from pageCache import PageCache
+from driverMetrics import DriverMetrics, phase
+from pageFingerprint import page_fingerprint, SWIGGY_FINGERPRINT_SCRIPT
+from waits import AdaptiveWaiter, all_of, xpath_present, document_ready, swiggy_listing_ready, swiggy_restaurant_ready, SWIGGY_CARD_XPATH
+import json
 import re
 from urllib.parse import urlparse, parse_qs, unquote
 
 
+# patterns used by get_slug on every captured request
+RESTAURANTS_PATTERN = re.compile(r'restaurants', re.IGNORECASE)
+SLUG_PATTERN = re.compile(r'restaurants\/([\w-]+)')
+CX_LINK_PATTERN = re.compile(r'"link":"https:\/\/www.swiggy.com\/restaurants\/([\w-]+)"')
+# the records of extract_dish for every dish element passed in (all the normal-dish-item
+# elements of the page when none are) as one json array, in a single script call.
+# the ratings block is the third parent of the star's rect, like the './/*[local-name()="rect"]/../../..' lookup
+DISHES_SCRIPT = """
+const dishes = arguments[0] || document.querySelectorAll('div[data-testid="normal-dish-item"]');
+const text = node => node ? (node.innerText || node.textContent || '').trim() : 'Not found';
+const up = (node, levels) => { while (node && levels--) node = node.parentElement; return node; };
+return JSON.stringify(Array.from(dishes, dish => ({
+    dish_content: text(dish.querySelector('p')),
+    ratings_content: text(up(dish.querySelector('rect'), 3)),
+})));
+"""
+
+
+# wait_ceilings - optional dict overriding the waits.DEFAULT_CEILINGS (seconds)
+# capture_mode - 'dom' reads the rendered restaurant page, 'api' builds the record from the
+# menu api response the page fetches (captured by selenium-wire)
+# block_requests - True to drop images, fonts, media and trackers with the swiggy default blocklist,
+# or a dict of RequestBlocker arguments (resource_types, url_patterns) for a custom one
+# cache - optional PageCache (or its directory) the rendered restaurant pages and menu api responses
+# are saved to for offline re-parsing
+# metrics - True to time the webdriver calls of every phase in a new DriverMetrics, or a DriverMetrics
+# shared with other scrapers
+# fingerprints - optional callable(url) returning the page fingerprint stored by the last crawl (or None),
+# get_restaurant_delta skips the restaurants whose fingerprint has not changed
 class swiggyScraper:
-    def __init__(self, headless = True):
+    def __init__(self, headless = True, wait_ceilings = None, capture_mode = 'dom', block_requests = False, cache = None, metrics = None, fingerprints = None):
+        if capture_mode not in ('dom', 'api'):
+            raise ValueError(f"Unknown capture_mode '{capture_mode}', use 'dom' or 'api'")
         self.headless = headless
+        self.capture_mode = capture_mode
+        self.blocker = None
+        if block_requests:
+            self.blocker = RequestBlocker('swiggy', **(block_requests if isinstance(block_requests, dict) else {}))
+        self.cache = PageCache(cache) if isinstance(cache, str) else cache
+        self.fingerprints = fingerprints
         self.driver = self._setup_driver()
         self.logger = setup_logger()
+        self.waiter = AdaptiveWaiter(self.driver, logger=self.logger, ceilings=wait_ceilings)
+        self.metrics = DriverMetrics() if metrics is True else metrics
+        if self.metrics:
+            self.metrics.attach(self.driver)
         self.url = 'https://www.swiggy.com/'
         self.base_url = 'https://swiggy.com/restaurants/'
+        self.reset_slugs()
+        self._menu_scan = (0, 0)
 
 
     '''
@@ -28,18 +80,27 @@ class swiggyScraper:
             chrome_options.add_argument("--headless=new")  # Run in headless mode
             chrome_options.add_argument("--window-size=1920x1080")
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36")
-        return webdriver.Chrome(options=chrome_options)
+        if self.blocker:
+            self.blocker.apply_options(chrome_options)
+        driver = webdriver.Chrome(options=chrome_options)
+        if self.blocker:
+            self.blocker.attach_seleniumwire(driver)
+        return driver
     
 
     '''
-    this will open website url and wait 5 sec
+    this will open website url and wait until the page is ready
     params:- 
     url - website url you want to open
+    ready - readiness predicate for the page, by default the document finished loading
+    wait_name - kind of wait, picks the ceiling and groups the recorded wait time
     '''
-    def open_website(self, url):
+    def open_website(self, url, ready = document_ready, wait_name = 'website'):
         self.driver.get(url)
         self.logger.info(f"Opened website: {url}")
-        sleep(10)
+        self.waiter.until(wait_name, ready)
+        if self.blocker:
+            self.blocker.page_report(self.driver, url)
 
     '''
     this function will get the recommended location found on the swiggy website
@@ -49,14 +110,14 @@ class swiggyScraper:
     '''
     def get_location(self, location):
         # opening website
-        self.open_website(url = self.url)
+        self.open_website(url = self.url, ready = xpath_present('//span[contains(text(),"Other")]'))
         # finding the tab for search location and click on it
         self.driver.find_element(By.XPATH, '//span[contains(text(),"Other")]').click()
         # getting the input button
         search_button = self.driver.find_element(By.TAG_NAME, 'input')
         # feeding the location on the input button
         search_button.send_keys(location)
-        sleep(1)
+        self.waiter.until('search', xpath_present('//div[contains(@class,"icon-location")]/..'))
         # getting all the recommendation location elements
         location_elements = self.driver.find_elements(By.XPATH, '//div[contains(@class,"icon-location")]/..')
         # getting all the text from the location elements and converting it to the dictionary
@@ -74,94 +135,97 @@ class swiggyScraper:
         #click on the locatin_name on the swiggy website
         location_dict[location_name].click()
         self.logger.info(f"Selected location: '{location_name}'")
-        sleep(5)
+        self.waiter.until('location', swiggy_listing_ready)
 
 
     '''
     this will get the slug from the links getting from the network tab
-    and return list os slugs.     
+    and return list os slugs.
+    only the requests captured since the last call are parsed, self._request_cursor points at the first
+    request not looked at yet and restaurant requests still waiting for a response are checked again
+    next time. The captured requests are only deleted before a listing is scrolled (clear_requests)
     '''
     def get_slug(self):
-        # List to store the extracted restaurant slugs
-        restaurant_slugs = []
+        requests = self.driver.requests
+        new_indexes = self._pending_requests + list(range(self._request_cursor, len(requests)))
+        self._request_cursor = len(requests)
+        self._pending_requests = []
 
-        # Iterate through all network requests captured by Selenium-Wire
-        for request in self.driver.requests:
-            if request.response:
-                # Check if the URL contains the word "restaurants"
-                if re.search(r'restaurants', request.url, re.IGNORECASE):
-
-                    # Attempt to extract the slug directly from the URL
-                    match = re.search(r'restaurants\/([\w-]+)', request.url)
-                    if match:
-                        restaurant_slug = match.group(1)
-                        restaurant_slugs.append(restaurant_slug)
-                    else:
-                        print("No restaurant slug found directly in the URL.")
-
-                    # Parse the URL to decode the query string
-                    parsed_url = urlparse(request.url)
-                    query_params = parse_qs(parsed_url.query)
-
-                    # If 'cx' parameter exists, try extracting the slug from there
-                    cx_value = query_params.get('cx', [None])[0]
-                    if cx_value:
-                        # Decode the cx_value from URL encoding
-                        cx_value_decoded = unquote(cx_value)
-
-                        # Try to extract the restaurant link from the cx JSON
-                        match = re.search(r'"link":"https:\/\/www.swiggy.com\/restaurants\/([\w-]+)"', cx_value_decoded)
-                        if match:
-                            restaurant_slug = match.group(1)
-                            restaurant_slugs.append(restaurant_slug)
-                            print(f"Extracted slug from cx: {restaurant_slug}")
-                        else:
-                            print("No restaurant slug found in the cx parameter.")
-                    else:
-                        print("No 'cx' parameter found in the URL.")
-
-        # Print all collected restaurant slugs
-        print("Collected restaurant slugs:", restaurant_slugs)
-        return restaurant_slugs
+        for i in new_indexes:
+            request = requests[i]
+            # Check if the URL contains the word "restaurants"
+            if not RESTAURANTS_PATTERN.search(request.url):
+                continue
+            if not request.response:
+                self._pending_requests.append(i)
+                continue
+
+            # Attempt to extract the slug directly from the URL
+            match = SLUG_PATTERN.search(request.url)
+            if match:
+                self.restaurant_slugs.setdefault(match.group(1))
+
+            # If 'cx' parameter exists, try extracting the slug from the decoded cx JSON
+            cx_value = parse_qs(urlparse(request.url).query).get('cx', [None])[0]
+            if cx_value:
+                match = CX_LINK_PATTERN.search(unquote(cx_value))
+                if match:
+                    self.restaurant_slugs.setdefault(match.group(1))
+                    self.logger.debug(f"Extracted slug from cx: {match.group(1)}")
+
+        self.logger.info(f"Parsed {len(new_indexes)} new requests, {len(self.restaurant_slugs)} restaurant slugs collected")
+        return list(self.restaurant_slugs)
+
+
+    '''
+    reset_slugs - start the get_slug state over: position in driver.requests, requests without a
+    response yet and the unique slugs in the order they were found (dict used as an ordered set)
+    '''
+    def reset_slugs(self):
+        self._request_cursor = 0
+        self._pending_requests = []
+        self.restaurant_slugs = {}
+
+
+    '''
+    clear_requests - delete the requests selenium-wire captured so far, so a listing scroll does not
+    keep those of the pages opened before it or their slugs. Every cursor into driver.requests
+    starts over, the blocker's included
+    '''
+    def clear_requests(self):
+        del self.driver.requests
+        self.reset_slugs()
+        self._menu_scan = (0, 0)
+        if self.blocker:
+            self.blocker.requests_cleared()
 
 
     '''
     get_restaurant_urls method to get the links of each restaurant 
     params :-
     num :- number of restaurants data you want to scrape
+    on_urls :- optional callback(urls) called with the new urls after every scroll
     return :- list of num of number of restaurant urls.'''
-    def get_restaurant_urls(self, num):
+    @phase('get_restaurant_urls')
+    def get_restaurant_urls(self, num, on_urls = None):
         try:
             take_screenshot(self.driver, self.logger, "initial_load_swiggy.png")
-            # Initialize the list and set up an explicit wait
-            li = []
-            wait = WebDriverWait(self.driver, 10)  # Adjust the timeout as needed
-
-            while True:
-                if len(li) == 0:
-                    # Wait for the elements to be present
-                    wait.until(EC.presence_of_all_elements_located((By.XPATH, '//div[contains(@class,"sw-restaurant-card-subtext-container")]/../..')))
-                    li = self.driver.find_elements(By.XPATH, '//div[contains(@class,"sw-restaurant-card-subtext-container")]/../..')
-                
-                if len(li) == 0:
-                    # If no elements found, break the loop
-                    self.logger.warning("No restaurant cards found.")
-                    break
-                
-                element = li[-1]
-                self.driver.execute_script("arguments[0].scrollIntoView();", element)
-                
-                # Use an explicit wait to ensure new elements are loaded
-                sleep(5)
-                # finding the resturant_cards anchor element
-                li = self.driver.find_elements(By.XPATH, '//div[contains(@class,"sw-restaurant-card-subtext-container")]/../..')
-                self.logger.info(f"{len(li)} number of restaurants cards found")
-
-            # Get URLs
-                slug_list = self.get_slug()
-                restaurant_urls = [self.base_url+link for link in slug_list if link != 'list']
-                if len(restaurant_urls) >= num:
-                    break
+            self.waiter.until('listing_page', swiggy_listing_ready)
+            # the urls come from the network traffic, the harvester scrolls the listing and
+            # stops once enough slugs are collected or the feed stops growing
+            harvester = CardHarvester(self.driver, SWIGGY_CARD_XPATH, self.waiter, logger=self.logger)
+            restaurant_urls = []
+            # only the slugs of this listing, not of one opened before (batchCrawl opens one per area)
+            self.clear_requests()
+
+            def enough():
+                reported = min(len(restaurant_urls), num)
+                restaurant_urls[:] = [self.base_url+link for link in self.get_slug() if link != 'list']
+                if on_urls is not None and len(restaurant_urls) > reported:
+                    on_urls(restaurant_urls[reported:num])
+                return len(restaurant_urls) >= num
+
+            harvester.run(num, enough=enough)
             return restaurant_urls[:num]
         except Exception as e:
             self.logger.error(f"An error occurred: {str(e)}")
@@ -172,6 +236,7 @@ class swiggyScraper:
     this will get the head_info like - name, ratings, category, offers for a restaurant
     return:- return dictionary of data contains all above data
     '''
+    @phase('get_head_info')
     def get_head_info(self):
         wait = WebDriverWait(self.driver, 10)
         wait.until(EC.presence_of_all_elements_located((By.TAG_NAME, 'h1')))
@@ -198,6 +263,7 @@ class swiggyScraper:
     params - selenium element fo dish_element
     return - dictionary containing dish_content and ratings_content
     '''
+    @phase('extract_dish')
     def extract_dish(self, dish_element):
         # getting the dish_content having name, veg_type, price, description
         dish_content = try_element('tag_name', 'p', driver = dish_element, logger= self.logger).text
@@ -210,12 +276,21 @@ class swiggyScraper:
 
 
     '''
-    this will process dish_elements using for loop and apply extract_dish
+    this will extract all the dishes in one script call (DISHES_SCRIPT) instead of two lookups
+    and two .text calls per dish, extract_dish is applied one by one if the script fails
     params:- 
-    dish_elements - selenium elements of containing all the elements having dish elements
+    dish_elements - selenium elements of containing all the elements having dish elements,
+    None for every dish of the page (no find_elements call before the script)
     return :- return the data having dictionary of dish
     '''
-    def process_dish_element(self, dish_elements):
+    @phase('process_dish_element')
+    def process_dish_element(self, dish_elements = None):
+        try:
+            return json.loads(self.driver.execute_script(DISHES_SCRIPT, dish_elements))
+        except (WebDriverException, TypeError, ValueError) as e:
+            self.logger.warning(f"Batched dish extraction failed, reading the dishes one by one: {e}")
+        if dish_elements is None:
+            dish_elements = try_element('xpath', '//div[@data-testid="normal-dish-item"]', driver=self.driver, logger=self.logger, element=False)
         data = []
         # run for loop for each dish element fron dish elements
         for dish in dish_elements:
@@ -226,22 +301,141 @@ class swiggyScraper:
         return data
 
 
+    '''
+    this will find the captured menu api request made after the request number `start`
+    it is called on every readiness poll, self._menu_scan keeps (start, position) so a poll only looks at
+    the requests captured since the last one: position is the first menu request still waiting for its
+    response, or the end of the requests already looked at
+    return - selenium-wire request having the response, None if it is not captured yet
+    '''
+    def find_menu_response(self, start):
+        scan_start, position = self._menu_scan
+        if scan_start != start:
+            position = start
+        requests = self.driver.requests
+        pending = None
+        for index in range(position, len(requests)):
+            request = requests[index]
+            if not MENU_API_PATTERN.search(request.url):
+                continue
+            if request.response:
+                self._menu_scan = (start, index)
+                return request
+            if pending is None:
+                pending = index
+        self._menu_scan = (start, len(requests) if pending is None else pending)
+        return None
+
+
+    '''
+    this will decode the body of a captured response (gzip / br) into text
+    '''
+    def decode_response(self, request):
+        response = request.response
+        body = decode(response.body, response.headers.get('Content-Encoding', 'identity'))
+        return body.decode('utf-8') if isinstance(body, bytes) else body
+
+
+    '''
+    this function will get all the data for a restaurant from the menu api response the page fetches
+    params:-
+    url - url of the restaurant
+    return - dictionary having all the data of the restaurant, same as the DOM path
+    '''
+    @phase('get_restaurant_data_from_api')
+    def get_restaurant_data_from_api(self, url):
+        start = len(self.driver.requests)
+        self.open_website(url, ready = lambda driver: self.find_menu_response(start) is not None, wait_name = 'restaurant_page')
+        return self.read_menu_response(url, start)
+
+
+    '''
+    this will build the restaurant data from the menu api response captured after the request number `start`
+    '''
+    def read_menu_response(self, url, start):
+        request = self.find_menu_response(start)
+        if request is None:
+            self.logger.error(f"Menu api response not captured for {url}")
+            return {}
+        menu_text = self.decode_response(request)
+        if self.cache:
+            self.cache.put(url, 'menu_api', menu_text)
+        return SwiggyMenuParser(menu_text, logger=self.logger).get_restaurant_data()
+
+
+    '''
+    this will save the rendered page and the captured menu api response of a restaurant to the cache
+    params:-
+    url - url of the restaurant
+    start - number of captured requests before the page was opened
+    '''
+    def cache_page(self, url, start):
+        self.cache.put(url, 'html', self.driver.page_source)
+        request = self.find_menu_response(start)
+        if request is not None:
+            self.cache.put(url, 'menu_api', self.decode_response(request))
+
+
+    '''
+    this will read the head and the dishes of the restaurant page open in the driver
+    params:-
+    url - url of the restaurant
+    start - number of captured requests before the page was opened
+    '''
+    def read_restaurant_page(self, url, start):
+        # getting head info of the restaurant
+        data = self.get_head_info()
+        # getting the data of all the dishes of the restaurant page in one script call
+        data["dish_data"] = self.process_dish_element()
+        if self.cache:
+            self.cache_page(url, start)
+        # returning data
+        return data
+
+
     '''
     this function will the get all the data for a perticular restaurant
     params:- 
     url - url of the restaurant
     return - dictionary having all the data of the restaurant
     '''
+    @phase('get_restaurant_data')
     def get_restaurant_data(self, url):
+        if self.capture_mode == 'api':
+            return self.get_restaurant_data_from_api(url)
+        start = len(self.driver.requests)
         # opening restaurant url
-        self.open_website(url)
-        # getting head info of the restaurant
-        data = self.get_head_info()
-        # getting all the dish elements from the restaurant page
-        dish_elements= try_element('xpath', '//div[@data-testid="normal-dish-item"]', driver=self.driver, logger= self.driver, element =False)
-        # processing all the dish elements to get the data form it
-        data["dish_data"] = self.process_dish_element(dish_elements)
-        # returning data
-        return data
-    
+        self.open_website(url, ready = swiggy_restaurant_ready, wait_name = 'restaurant_page')
+        return self.read_restaurant_page(url, start)
+
+
+    '''
+    this function is get_restaurant_data for a re-crawl, the page is fingerprinted (pageFingerprint.py)
+    and the dishes are only read when the fingerprint differs from the one self.fingerprints has for the url
+    params:-
+    url - url of the restaurant
+    return - {'fingerprint', 'changed', 'data'}, data is None for an unchanged restaurant, {} when nothing was read
+    '''
+    @phase('get_restaurant_delta')
+    def get_restaurant_delta(self, url):
+        start = len(self.driver.requests)
+        ready = swiggy_restaurant_ready
+        if self.capture_mode == 'api':
+            # the fingerprint is read from the rendered page, the data from the menu api response
+            ready = all_of(swiggy_restaurant_ready, lambda driver: self.find_menu_response(start) is not None)
+        self.open_website(url, ready = ready, wait_name = 'restaurant_page')
+        fingerprint = page_fingerprint(self.driver, SWIGGY_FINGERPRINT_SCRIPT)
+        if self.fingerprints is not None and self.fingerprints(url) == fingerprint:
+            self.logger.info(f"Unchanged since the last crawl: {url}")
+            return {'fingerprint': fingerprint, 'changed': False, 'data': None}
+        if self.capture_mode == 'api':
+            data = self.read_menu_response(url, start)
+        else:
+            data = self.read_restaurant_page(url, start)
+        return {'fingerprint': fingerprint, 'changed': True, 'data': data} if data else {}
+
+
+    def close_driver(self):
+        self.driver.quit()  # Close the WebDriver when done
+
     
\ No newline at end of file
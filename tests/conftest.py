@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+# the modules live flat in the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from localServer import FixtureServer, SITE_ROUTES
+
+
+'''
+chrome - a headless chrome for the tests that run a fixture page, skipped where chrome is not installed
+'''
+@pytest.fixture(scope='module')
+def chrome():
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    try:
+        driver = webdriver.Chrome(options=options)
+    except WebDriverException as e:
+        pytest.skip(f"chrome is not available: {e.msg}")
+    yield driver
+    driver.quit()
+
+
+'''
+fixture_server - FixtureServer of the site the test is parametrized with, the base url
+'''
+@pytest.fixture
+def fixture_server(request):
+    with FixtureServer(SITE_ROUTES[request.param]) as server:
+        yield server.base_url
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import pytest
+from crawlEngine import CrawlEngine, Frontier, backoff_delay
+
+
+# Class FakeScraper stands in for a browser scraper, get_restaurant_data returns {} for the first
+# `failures[url]` calls of a url and its data after that
+class FakeScraper:
+    calls = {}
+    failures = {}
+    closed = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def get_restaurant_data(self, url):
+        with FakeScraper.lock:
+            attempt = FakeScraper.calls.get(url, 0)
+            FakeScraper.calls[url] = attempt + 1
+        if attempt < FakeScraper.failures.get(url, 0):
+            return {}
+        return {'name': url}
+
+    def close_driver(self):
+        with FakeScraper.lock:
+            FakeScraper.closed += 1
+
+
+@pytest.fixture(autouse=True)
+def fake_scraper():
+    FakeScraper.calls, FakeScraper.failures, FakeScraper.closed = {}, {}, 0
+    yield FakeScraper
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=2.0, cap=5.0) <= 5.0 for attempt in range(10))
+    assert backoff_delay(3, base=0) == 0
+
+
+def test_retries_until_data_or_last_attempt():
+    FakeScraper.failures = {'u/flaky': 2, 'u/broken': 10}
+    results = {}
+    with CrawlEngine(FakeScraper, workers=2, retries=2, backoff=0) as engine:
+        engine.run(['u/ok', 'u/flaky', 'u/broken'], on_result=results.__setitem__)
+
+    assert results == {'u/ok': {'name': 'u/ok'}, 'u/flaky': {'name': 'u/flaky'}, 'u/broken': {}}
+    # the first try and two retries, never more
+    assert FakeScraper.calls == {'u/ok': 1, 'u/flaky': 3, 'u/broken': 3}
+    assert engine.stats == {'scraped': 2, 'failed': 1, 'retries': 4}
+
+
+def test_scraping_overlaps_discovery():
+    first_result = threading.Event()
+    overlapped = []
+
+    def discover(on_urls):
+        on_urls(['u/1', 'u/2'])
+        # the listing keeps scrolling while the first pages are scraped
+        overlapped.append(first_result.wait(5))
+        on_urls(['u/2', 'u/3'])
+        return ['u/1', 'u/2', 'u/3', 'u/4']
+
+    def on_result(url, result):
+        first_result.set()
+
+    with CrawlEngine(FakeScraper, workers=2, backoff=0) as engine:
+        urls = engine.run(discover=discover, on_result=on_result)
+
+    assert overlapped == [True]
+    assert urls == ['u/1', 'u/2', 'u/3', 'u/4']
+    # every url once, the one only in the returned list included
+    assert FakeScraper.calls == {'u/1': 1, 'u/2': 1, 'u/3': 1, 'u/4': 1}
+
+
+def test_skip_urls_are_not_scraped():
+    results = {}
+    with CrawlEngine(FakeScraper, workers=1) as engine:
+        urls = engine.run(['u/1', 'u/2', 'u/1'], skip={'u/2'}, on_result=results.__setitem__)
+    assert urls == ['u/1', 'u/2', 'u/1']
+    assert list(results) == ['u/1']
+
+
+def test_workers_start_scrapers_lazily_and_close_them():
+    with CrawlEngine(FakeScraper, workers=3, headless=True) as engine:
+        engine.run(['u/1'])
+        assert len(engine._scrapers) == 1
+        assert engine._scrapers[0].kwargs == {'headless': True}
+    assert FakeScraper.closed == 1
+
+
+def test_frontier_stops_workers_once_discovery_and_urls_are_done():
+    async def run():
+        frontier = Frontier(workers=2, skip={'u/skip'})
+        assert frontier.add(['u/1', 'u/skip', 'u/1', None]) == 1
+        frontier.close()
+        assert frontier.queue.get_nowait() == ('u/1', 0)
+        frontier.done()
+        return [frontier.queue.get_nowait() for _ in range(2)]
+
+    assert asyncio.run(run()) == [None, None]
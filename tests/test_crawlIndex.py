@@ -0,0 +1,79 @@
+import pytest
+from crawlIndex import CrawlIndex, restaurant_key
+
+
+ZOMATO = 'https://www.zomato.com/ncr/'
+SWIGGY = 'https://www.swiggy.com/restaurants/'
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'crawl_index.db')
+
+
+@pytest.mark.parametrize('url', [
+    ZOMATO + 'haldirams-janpath-new-delhi/order',
+    ZOMATO + 'haldirams-janpath-new-delhi/info',
+    ZOMATO + 'haldirams-janpath-new-delhi/reviews',
+    ZOMATO + 'haldirams-janpath-new-delhi/',
+    ZOMATO + 'Haldirams-Janpath-New-Delhi/order?contextual_menu_params=abc',
+])
+def test_zomato_key_drops_page_tab(url):
+    assert restaurant_key('zomato', url) == '/ncr/haldirams-janpath-new-delhi'
+
+
+def test_swiggy_key_is_lowercase_slug():
+    assert restaurant_key('swiggy', SWIGGY + 'Subway-M-Block-Connaught-Place-Delhi-16418') == 'subway-m-block-connaught-place-delhi-16418'
+    assert restaurant_key('swiggy', 'https://swiggy.com/restaurants/subway-m-block-connaught-place-delhi-16418?q=1') == 'subway-m-block-connaught-place-delhi-16418'
+
+
+def test_claim_new_dedupes_across_areas(index_path):
+    with CrawlIndex(index_path) as index:
+        first = index.claim_new('zomato', 'connaught-place', [ZOMATO + 'a/order', ZOMATO + 'b/order'])
+        second = index.claim_new('zomato', 'janpath', [ZOMATO + 'b/info', ZOMATO + 'c/order', ZOMATO + 'a/order'])
+
+        assert first == [ZOMATO + 'a/order', ZOMATO + 'b/order']
+        assert second == [ZOMATO + 'c/order']
+        # every area still lists all of its restaurants, in order
+        memberships = index.memberships()
+        janpath = memberships[memberships['area'] == 'janpath']
+        assert janpath['restaurant_key'].tolist() == ['/ncr/b', '/ncr/c', '/ncr/a']
+        assert janpath['position'].tolist() == [0, 1, 2]
+        assert index.summary()['zomato'] == {'areas': 2, 'listings': 5, 'restaurants': 3, 'scraped': 0, 'changed': 0}
+
+
+def test_claim_new_keeps_sites_apart(index_path):
+    with CrawlIndex(index_path) as index:
+        assert index.claim_new('swiggy', 'connaught-place', [SWIGGY + 'subway-16418']) == [SWIGGY + 'subway-16418']
+        assert index.claim_new('swiggy', 'janpath', [SWIGGY + 'SUBWAY-16418']) == []
+        assert index.claim_new('zomato', 'connaught-place', [ZOMATO + 'subway-16418/order']) == [ZOMATO + 'subway-16418/order']
+
+
+def test_claim_new_same_area_again_continues_positions(index_path):
+    with CrawlIndex(index_path) as index:
+        index.claim_new('zomato', 'janpath', [ZOMATO + 'a/order', ZOMATO + 'b/order'])
+        assert index.claim_new('zomato', 'janpath', [ZOMATO + 'b/order', ZOMATO + 'c/order']) == [ZOMATO + 'c/order']
+        assert index.memberships()['position'].tolist() == [0, 1, 2]
+
+
+def test_resume_skips_the_scraped_restaurants(index_path):
+    with CrawlIndex(index_path) as index:
+        crawl_id = index.crawl_id
+        index.claim_new('zomato', 'janpath', [ZOMATO + 'a/order', ZOMATO + 'b/order'])
+        index.mark_scraped('zomato', ZOMATO + 'a/order', fingerprint='0123456789abcdef')
+
+    with CrawlIndex(index_path, resume=True) as index:
+        assert index.crawl_id == crawl_id
+        # a was scraped before the crawl stopped, b was only claimed and is handed out again
+        assert index.claim_new('zomato', 'janpath', [ZOMATO + 'a/info', ZOMATO + 'b/order']) == [ZOMATO + 'b/order']
+        assert index.scraped_urls('zomato') == {ZOMATO + 'a/order'}
+        assert index.fingerprint('zomato', ZOMATO + 'a/reviews') == '0123456789abcdef'
+
+
+def test_mark_unchanged_keeps_fingerprint_and_changed_crawl(index_path):
+    with CrawlIndex(index_path) as index:
+        index.claim_new('swiggy', 'janpath', [SWIGGY + 'subway-16418'])
+        index.mark_scraped('swiggy', SWIGGY + 'subway-16418', fingerprint='aaaa')
+        index.mark_unchanged('swiggy', SWIGGY + 'Subway-16418')
+        assert index.fingerprint('swiggy', SWIGGY + 'subway-16418') == 'aaaa'
+        assert index.summary()['swiggy']['changed'] == 1
@@ -0,0 +1,27 @@
+from driverMetrics import DriverMetrics, quantile
+
+
+def test_phase_durations_are_bounded():
+    metrics = DriverMetrics(reservoir_size=50)
+    for i in range(1, 1001):
+        metrics._add_duration('get_head_info', i / 1000)
+
+    row = metrics.summary()['get_head_info']
+    assert len(metrics.phases['get_head_info']['sample']) == 50
+    # count and total are exact, the quantiles come from the sample
+    assert row['count'] == 1000
+    assert abs(row['seconds'] - 500.5) < 1e-6
+    assert 0.001 <= row['p50'] <= row['p95'] <= 1.0
+
+
+def test_quantiles_are_exact_below_the_reservoir_size():
+    metrics = DriverMetrics(reservoir_size=100)
+    for i in range(1, 21):
+        metrics.run_phase('extract_dish_card', lambda: None)
+        metrics._add_duration('get_location', float(i))
+
+    row = metrics.summary()['get_location']
+    values = [float(i) for i in range(1, 21)]
+    assert (row['p50'], row['p95']) == (quantile(values, 0.5), quantile(values, 0.95))
+    assert metrics.summary()['extract_dish_card']['count'] == 20
+    assert 'scraper_phase_seconds_count{phase="get_location"} 20' in metrics.to_prometheus()
@@ -0,0 +1,60 @@
+import pytest
+from selenium.webdriver.support.ui import WebDriverWait
+from pageFingerprint import page_fingerprint, ZOMATO_FINGERPRINT_SCRIPT, SWIGGY_FINGERPRINT_SCRIPT
+from waits import zomato_restaurant_ready, swiggy_restaurant_ready
+
+
+# site -> (restaurant page path, readiness predicate, fingerprint script, js changing only the
+# volatile parts of the page: opening status, ratings and vote counts)
+PAGES = {
+    'zomato': ('/ncr/haldirams-janpath-new-delhi/order', zomato_restaurant_ready, ZOMATO_FINGERPRINT_SCRIPT, """
+        document.querySelector('div[role="tooltip"] span').textContent = 'Closes in 20 minutes';
+        document.querySelectorAll('span').forEach(span => { if (span.textContent.endsWith('votes')) span.textContent = '99 votes'; });
+        document.evaluate('//div[contains(text(),"Ratings")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+            .singleNodeValue.previousElementSibling.textContent = '5,000';
+    """),
+    'swiggy': ('/restaurants/subway-m-block-connaught-place-delhi-16418', swiggy_restaurant_ready, SWIGGY_FINGERPRINT_SCRIPT, """
+        const box = document.evaluate('//div[contains(text(),"for")]/../..', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        box.querySelector('div div div').textContent = '4.5 (2K+ ratings)';
+        document.querySelectorAll('div[data-testid="normal-dish-item"] rect').forEach(rect => {
+            rect.parentNode.parentNode.parentNode.lastChild.textContent = '(999)';
+        });
+    """),
+}
+
+
+def load(driver, base_url, site):
+    path, ready, _, _ = PAGES[site]
+    driver.get(base_url + path)
+    WebDriverWait(driver, 10).until(ready)
+
+
+@pytest.mark.parametrize('fixture_server', sorted(PAGES), indirect=True)
+def test_same_page_same_fingerprint(chrome, fixture_server, request):
+    site = request.node.callspec.params['fixture_server']
+    script = PAGES[site][2]
+    load(chrome, fixture_server, site)
+    first = page_fingerprint(chrome, script)
+    load(chrome, fixture_server, site)
+    assert page_fingerprint(chrome, script) == first
+
+
+@pytest.mark.parametrize('fixture_server', sorted(PAGES), indirect=True)
+def test_volatile_text_does_not_change_fingerprint(chrome, fixture_server, request):
+    site = request.node.callspec.params['fixture_server']
+    script, volatile = PAGES[site][2:]
+    load(chrome, fixture_server, site)
+    before = page_fingerprint(chrome, script)
+    chrome.execute_script(volatile)
+    assert page_fingerprint(chrome, script) == before
+
+
+@pytest.mark.parametrize('fixture_server', sorted(PAGES), indirect=True)
+def test_dish_change_changes_fingerprint(chrome, fixture_server, request):
+    site = request.node.callspec.params['fixture_server']
+    script = PAGES[site][2]
+    load(chrome, fixture_server, site)
+    before = page_fingerprint(chrome, script)
+    dish = 'h4' if site == 'zomato' else 'div[data-testid="normal-dish-item"] p'
+    chrome.execute_script(f"const dish = document.querySelector('{dish}'); dish.textContent += ' Special';")
+    assert page_fingerprint(chrome, script) != before
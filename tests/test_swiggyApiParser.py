@@ -0,0 +1,61 @@
+import ast
+import os
+import pandas as pd
+import pytest
+from swiggyApiParser import SwiggyMenuParser, format_price
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBWAY = 'https://swiggy.com/restaurants/subway-m-block-connaught-place-delhi-16418'
+
+
+@pytest.fixture(scope='module')
+def record():
+    with open(os.path.join(ROOT, 'fixtures', 'swiggy', 'menu.json'), encoding='utf-8') as f:
+        return SwiggyMenuParser(f.read()).get_restaurant_data()
+
+
+'''
+saved_record - the Subway row the DOM scraper saved to swiggy_uncleaned_restaurant_data.csv
+'''
+def saved_record():
+    saved = pd.read_csv(os.path.join(ROOT, 'swiggy_uncleaned_restaurant_data.csv'))
+    row = saved[saved['url'] == SUBWAY]
+    return ast.literal_eval(row['restaurant_data'].iloc[0])
+
+
+@pytest.mark.parametrize('paise, price', [(33800, '338'), (6667, '66.67'), (22050, '220.50'), ('9900', '99')])
+def test_format_price(paise, price):
+    assert format_price(paise) == price
+
+
+def test_head_info(record):
+    assert record['name'] == 'Subway'
+    assert record['ratings'] == '4.2 (10K+ ratings)\n•\n₹350 for two'
+    assert record['categories'] == ['Salads,', 'Snacks']
+    assert record['offers'] == [
+        'Deals for you', 'Extra ₹30 Off', 'APPLICABLE OVER & ABOVE COUPONS', '10% Off Upto ₹150', 'USE HSBCFEST',
+        '30% Off Upto ₹150', 'USE AXIS30', 'Flat ₹100 Off', 'USE SBIDELIGHTS', 'Flat ₹200 Off', 'USE AXIS200',
+    ]
+
+
+def test_dish_data(record):
+    dishes = record['dish_data']
+    assert len(dishes) == 129
+    assert dishes[1] == {
+        'dish_content': 'Veg Item. 3 Cheese Melt Sandwich + Side + Coke. Costs: 368 rupees, Description: Enjoy your '
+                        'favourite Grills sandwich with a choice of drink and any choice of side. This item is '
+                        'customizable. Swipe right to add item to cart.',
+        'ratings_content': 'Not found',
+    }
+    assert dishes[0]['ratings_content'] == '4.7\n(3)'
+
+
+def test_same_record_as_dom_scraper(record):
+    # the api path has to give swiggyCleaner exactly what the DOM path saved for the same restaurant
+    assert record == saved_record()
+
+
+def test_missing_restaurant_card():
+    record = SwiggyMenuParser({'data': {'cards': []}}).get_restaurant_data()
+    assert record == {'name': 'Not found', 'ratings': ' ()\n•\n', 'categories': [], 'offers': ['Deals for you'], 'dish_data': []}
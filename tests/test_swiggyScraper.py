@@ -0,0 +1,36 @@
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from utils import setup_logger
+from waits import swiggy_restaurant_ready
+
+# swiggyScraper drives chrome through selenium-wire
+pytest.importorskip('seleniumwire2')
+from swiggyScraper import swiggyScraper
+
+
+RESTAURANT = '/restaurants/subway-m-block-connaught-place-delhi-16418'
+
+
+'''
+page_scraper - a swiggyScraper reading the page open in the test chrome, without starting its own browser
+'''
+def page_scraper(driver):
+    scraper = object.__new__(swiggyScraper)
+    scraper.driver = driver
+    scraper.logger = setup_logger()
+    scraper.metrics = None
+    return scraper
+
+
+@pytest.mark.parametrize('fixture_server', ['swiggy'], indirect=True)
+def test_dishes_script_matches_extract_dish(chrome, fixture_server):
+    chrome.get(fixture_server + RESTAURANT)
+    WebDriverWait(chrome, 10).until(swiggy_restaurant_ready)
+    scraper = page_scraper(chrome)
+    elements = chrome.find_elements(By.XPATH, '//div[@data-testid="normal-dish-item"]')
+    assert elements
+    # the one script call has to give the same text as WebElement.text, with and without a rating
+    expected = [scraper.extract_dish(element) for element in elements]
+    assert scraper.process_dish_element() == expected
+    assert scraper.process_dish_element(elements) == expected
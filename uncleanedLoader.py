@@ -0,0 +1,124 @@
+'''
+Read the uncleaned csv files (restaurant_data_uncleaned.csv, swiggy_uncleaned_restaurant_data.csv)
+a chunk at a time, and migrate them to json encoded restaurant_data once so later reads are fast.
+
+run from the repo root:
+python uncleanedLoader.py --input restaurant_data_uncleaned.csv --migrate
+python streamingCleaner.py --site zomato --input restaurant_data_uncleaned.csv
+
+the restaurant_data column was written with df.to_csv, so it holds the python repr of the scraped
+dict, which only ast.literal_eval reads safely (and slowly). Migrated files hold json instead, read
+with json.loads, both are read by the same loader.
+'''
+import argparse
+import ast
+import json
+import os
+import pandas as pd
+from utils import setup_logger
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Migrate an uncleaned csv to json encoded restaurant_data.')
+    parser.add_argument('--input', type=str, required=True, help='Uncleaned csv (first column url, then restaurant_data)')
+    parser.add_argument('--migrate', action='store_true', help='Rewrite restaurant_data as json')
+    parser.add_argument('--output', type=str, default=None, help='File for the migrated csv (default: replace the input)')
+    parser.add_argument('--chunk_size', type=int, default=1000, help='Rows read and written at a time')
+    return parser.parse_args()
+
+
+'''
+is_json - the cell was written by migrate_to_json
+'''
+def is_json(text):
+    return text.startswith('{"') or text == '{}'
+
+
+'''
+parse_value - restaurant_data cell as a dict, json (migrated files) or python repr (ast.literal_eval)
+empty cells give {}
+'''
+def parse_value(text):
+    if not isinstance(text, str) or not text.strip():
+        return {}
+    if is_json(text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return ast.literal_eval(text)
+
+
+'''
+parse_column - parse a column of restaurant_data cells, an unreadable cell is logged and gives {}
+'''
+def parse_column(urls, texts, logger):
+    records = []
+    for url, text in zip(urls, texts):
+        try:
+            records.append(parse_value(text))
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError) as e:
+            logger.error(f"Could not read restaurant_data of {url}: {e}")
+            records.append({})
+    return records
+
+
+'''
+read_uncleaned - yield the csv chunk_size rows at a time, restaurant_data parsed into dicts
+the first column is the url (Web_link for zomato, url for swiggy)
+hint - log once when the file is not migrated to json yet
+'''
+def read_uncleaned(path, chunk_size = 1000, hint = True):
+    logger = setup_logger()
+    hinted = not hint
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        url_column = chunk.columns[0]
+        if not hinted and any(isinstance(text, str) and text.strip() and not is_json(text) for text in chunk['restaurant_data']):
+            logger.info(f"{path} holds python repr records, read with ast.literal_eval. "
+                        f"Migrate it once for fast json reads: python uncleanedLoader.py --input {path} --migrate")
+            hinted = True
+        chunk['restaurant_data'] = parse_column(chunk[url_column], chunk['restaurant_data'], logger)
+        yield chunk
+
+
+'''
+load_uncleaned - the whole csv as the dataframe DataCleaner / swiggyCleaner take
+'''
+def load_uncleaned(path, chunk_size = 1000):
+    chunks = list(read_uncleaned(path, chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=['url', 'restaurant_data'])
+    return pd.concat(chunks, ignore_index=True)
+
+
+'''
+migrate_to_json - rewrite restaurant_data as json, chunk by chunk
+the new file is written next to the output and renamed over it at the end, so the input
+can be its own output
+return - number of rows migrated
+'''
+def migrate_to_json(path, output = None, chunk_size = 1000):
+    output = output or path
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    rows = 0
+    try:
+        for chunk in read_uncleaned(path, chunk_size, hint=False):
+            chunk['restaurant_data'] = [json.dumps(data, ensure_ascii=False) for data in chunk['restaurant_data']]
+            chunk.to_csv(tmp_path, mode='a', header=rows == 0, index=False)
+            rows += len(chunk)
+        if rows:
+            os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    setup_logger().info(f"Migrated {rows} rows of {path} to json in {output}")
+    return rows
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.migrate:
+        migrate_to_json(args.input, args.output, args.chunk_size)
+    else:
+        df = load_uncleaned(args.input, args.chunk_size)
+        setup_logger().info(f"Read {len(df)} rows from {args.input}")
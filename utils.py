@@ -1,6 +1,9 @@
 import logging
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
+from contextlib import contextmanager
+from time import perf_counter, sleep
+from driverMetrics import record_call
 
 # This class mimics a WebElement with a .text attribute set to "Not found". 
 # This class can be returned when an element is not found.
@@ -16,9 +19,11 @@ class DummyElement:
 def setup_logger():
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(handler)
+    # every scraper / cleaner calls this, only attach the handler once so lines are not repeated
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(handler)
     return logger
 
 '''
@@ -30,17 +35,66 @@ def take_screenshot(driver, logger, filename):
     logger.info(f"Screenshot saved as {filename}")
 
 
+'''
+set_implicit_wait - driver.implicitly_wait that remembers the value on the driver, so implicit_wait
+knows what to restore and skips the round trip when the value is already set
+'''
+def set_implicit_wait(driver, seconds):
+    if getattr(driver, 'implicit_wait_seconds', 0) != seconds:
+        driver.implicitly_wait(seconds)
+        driver.implicit_wait_seconds = seconds
+
+
+'''
+implicit_wait - use another implicit wait for a block and put the old one back after it
+(a new session starts at 0, the scrapers set theirs with set_implicit_wait)
+'''
+@contextmanager
+def implicit_wait(driver, seconds):
+    previous = getattr(driver, 'implicit_wait_seconds', 0)
+    set_implicit_wait(driver, seconds)
+    try:
+        yield driver
+    finally:
+        set_implicit_wait(driver, previous)
+
+
+'''
+find_now - the elements matching now, or within timeout seconds, without the implicit wait
+driver - the webdriver or a WebElement to search in
+'''
+def find_now(driver, by_type, tag_path, timeout = 0, poll = 0.1):
+    # a WebElement's parent is its webdriver, the implicit wait is a setting of the session
+    with implicit_wait(getattr(driver, 'parent', driver), 0):
+        deadline = perf_counter() + timeout
+        while True:
+            found = driver.find_elements(by_type, tag_path)
+            if found or perf_counter() >= deadline:
+                return found
+            sleep(poll)
+
+
 '''
     try_element function - this function handles the error (elements not found)
     params:-
     tay_type - it is the type of element I am searching on it
     tag_path - is is either class ,tagname or xpath
     element - bool (either finding (element :- True) or (elements :- False))
+    timeout - None waits the session's implicit wait for a missing element, a number of seconds
+    looks the element up for that long at most, for optional fields (no votes, no description ...)
+    which are missing on many cards. Their misses are not logged as warnings
     '''
-def try_element(tag_type, tag_path, driver, logger, element = True):
+def try_element(tag_type, tag_path, driver, logger, element = True, timeout = None):
     result = None
+    start = perf_counter()
+
+    if timeout is not None:
+        by_type = getattr(By, tag_type.upper())
+        result = find_now(driver, by_type, tag_path, timeout)
+        if element:
+            result = result[0] if result else DummyElement()
 
-    if element:
+    elif element:
         try:
             by_type = getattr(By, tag_type.upper())
             result = driver.find_element(by_type, tag_path)
@@ -56,4 +110,6 @@ def try_element(tag_type, tag_path, driver, logger, element = True):
             result = DummyElement()
             logger.warning(f"Elements not found with {tag_type}='{tag_path}'")
 
+    # counted in the running phase when the scraper has DriverMetrics, misses with the time they cost
+    record_call('try_element', perf_counter() - start, miss=isinstance(result, DummyElement) or result == [])
     return result
\ No newline at end of file
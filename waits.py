@@ -0,0 +1,145 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from time import perf_counter
+from utils import setup_logger
+from driverMetrics import record_call
+
+
+# Ceilings (seconds) for each kind of wait, they are the fixed sleeps the scrapers used before
+# so `budget - waited` is the dead time an adaptive wait removed
+DEFAULT_CEILINGS = {
+    'restaurant_page': 10,
+    'listing_page': 5,
+    'scroll': 5,
+    'location': 5,
+    'search': 1,
+    'website': 10,
+}
+
+# seconds the card count has to stay the same after a scroll before it is treated as loaded
+SCROLL_SETTLE = 0.75
+
+
+'''
+count_xpath - number of nodes matching an xpath, counted inside the page with one script call
+it does not go through find_elements so the session's implicit wait is never paid while polling
+'''
+def count_xpath(driver, xpath):
+    return driver.execute_script(
+        "return document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;",
+        xpath)
+
+
+'''
+xpath_present - readiness predicate, true once at least `minimum` nodes match the xpath
+'''
+def xpath_present(xpath, minimum = 1):
+    def predicate(driver):
+        return count_xpath(driver, xpath) >= minimum
+    return predicate
+
+
+'''
+document_ready - readiness predicate, true once the document has finished loading
+'''
+def document_ready(driver):
+    return driver.execute_script("return document.readyState;") == 'complete'
+
+
+'''
+all_of - readiness predicate, true once every predicate is true
+'''
+def all_of(*predicates):
+    def predicate(driver):
+        return all(p(driver) for p in predicates)
+    return predicate
+
+
+# per site readiness predicates
+ZOMATO_RATINGS_XPATH = '//div[contains(text(),"Ratings")]'
+ZOMATO_ORDER_SECTIONS_XPATH = '//h2[contains(text(),"Order Online")]/../../../section'
+ZOMATO_CARD_XPATH = '//img[@alt="Restaurant Card"]/../..'
+SWIGGY_DISH_XPATH = '//div[@data-testid="normal-dish-item"]'
+SWIGGY_CARD_XPATH = '//div[contains(@class,"sw-restaurant-card-subtext-container")]/../..'
+
+# zomato restaurant page: ratings anchor of the head and the order sections (the first one is skipped)
+zomato_restaurant_ready = all_of(xpath_present(ZOMATO_RATINGS_XPATH), xpath_present(ZOMATO_ORDER_SECTIONS_XPATH, minimum=2))
+zomato_listing_ready = xpath_present(ZOMATO_CARD_XPATH)
+swiggy_restaurant_ready = all_of(xpath_present('//h1'), xpath_present(SWIGGY_DISH_XPATH))
+swiggy_listing_ready = xpath_present(SWIGGY_CARD_XPATH)
+
+
+# Class StableCount is the readiness predicate for a scroll:
+# ready once the card count has grown past `previous` and then not changed for `settle` seconds
+class StableCount:
+    def __init__(self, xpath, previous, settle = SCROLL_SETTLE):
+        self.xpath = xpath
+        self.previous = previous
+        self.settle = settle
+        self.count = previous
+        self._changed_at = perf_counter()
+
+    def __call__(self, driver):
+        count = count_xpath(driver, self.xpath)
+        if count != self.count:
+            self.count = count
+            self._changed_at = perf_counter()
+            return False
+        return count > self.previous and perf_counter() - self._changed_at >= self.settle
+
+
+# Class AdaptiveWaiter replaces the fixed sleeps, it polls a readiness predicate and returns as soon
+# as the page is ready (or the ceiling is hit) and records how long each wait actually took
+class AdaptiveWaiter:
+    def __init__(self, driver, logger = None, ceilings = None, poll = 0.25):
+        self.driver = driver
+        self.logger = logger or setup_logger()
+        self.ceilings = DEFAULT_CEILINGS | (ceilings or {})
+        self.poll = poll
+        self.records = []
+
+
+    '''
+    until - wait for a predicate
+    params:-
+    name - kind of wait, picks the ceiling from self.ceilings
+    predicate - callable(driver) returning True once the page is ready
+    return - True if the page became ready, False if the ceiling was hit
+    '''
+    def until(self, name, predicate):
+        ceiling = self.ceilings[name]
+        start = perf_counter()
+        try:
+            WebDriverWait(self.driver, ceiling, poll_frequency=self.poll, ignored_exceptions=(WebDriverException,)).until(predicate)
+            ready = True
+        except TimeoutException:
+            ready = False
+            self.logger.warning(f"Wait '{name}' hit its {ceiling}s ceiling before the page was ready")
+        waited = perf_counter() - start
+        self.records.append({'name': name, 'waited': waited, 'ceiling': ceiling, 'ready': ready})
+        record_call('wait', waited, miss=not ready)
+        self.logger.info(f"Wait '{name}' took {waited:.2f}s of {ceiling}s")
+        return ready
+
+
+    '''
+    summary - totals per kind of wait: number of waits, time waited, the fixed sleep budget and the time saved
+    '''
+    def summary(self):
+        return summarize_waits(self.records)
+
+
+'''
+summarize_waits - roll wait records (of one or many AdaptiveWaiter) up per kind of wait
+'''
+def summarize_waits(records):
+    summary = {}
+    for record in records:
+        row = summary.setdefault(record['name'], {'count': 0, 'timeouts': 0, 'waited': 0.0, 'budget': 0.0})
+        row['count'] += 1
+        row['timeouts'] += not record['ready']
+        row['waited'] += record['waited']
+        row['budget'] += record['ceiling']
+    for row in summary.values():
+        row['saved'] = row['budget'] - row['waited']
+    return summary
@@ -1,5 +1,19 @@
 import pandas as pd
+import re
 from utils import setup_logger
+from parquetWriter import zomato_table, write_parquet
+
+
+# position of each value in the scraped rating list
+RATING_POSITIONS = {
+    "dining_ratings": 0,
+    "dining_votes": 1,
+    "delivery_ratings": 3,
+    "delivery_votes": 4
+}
+
+# 'Opening Hours\nMon, Fri-Sun:7am – 11:30pm' - days before the first ':', hours after it
+TIME_PATTERN = re.compile(r'(?:Opening Hours\n)?([^:]*):?(.*)', re.DOTALL)
 
 
 class DataCleaner:
@@ -9,45 +23,34 @@ class DataCleaner:
 
     '''
     converting dictionary column into plan columns
+    the frame is built from the list of dicts in one go, rows without a dict get empty columns
     params - column_name you want to convert into plain column
     '''  
     def convert_dict_column(self, column_name):
         try:
             self.logger.info(f"Converting column '{column_name}' from text to dictionary.")
-            expanded_df = self.df[column_name].apply(pd.Series)
+            records = [value if isinstance(value, dict) else {} for value in self.df[column_name]]
+            expanded_df = pd.DataFrame(records, index=self.df.index)
             self.df = pd.concat([self.df.drop(columns=column_name), expanded_df], axis=1)
             self.logger.info(f"Column '{column_name}' successfully converted and expanded.")
         except Exception as e:
             self.logger.error(f"Error converting column '{column_name}': {e}")
     '''
     this is for cleaning ratings column
+    rating is the list [dining rating, dining votes, label, delivery rating, delivery votes, label],
+    the values are taken by position for the whole column, a shorter list gives None for all four
     '''
     def clean_ratings(self):
-        def ratings(rating):
-            try:
-                dining_ratings = rating[0]
-                dining_votes = rating[1]
-                delivery_ratings = rating[3]
-                delivery_votes = rating[4]
-                return {
-                    "dining_ratings": dining_ratings,
-                    "dining_votes": dining_votes,
-                    "delivery_ratings": delivery_ratings,
-                    "delivery_votes": delivery_votes
-                }
-            except IndexError as e:
-                self.logger.error(f"Error processing rating data: {e}")
-                return {
-                    "dining_ratings": None,
-                    "dining_votes": None,
-                    "delivery_ratings": None,
-                    "delivery_votes": None
-                }
-        
         try:
             self.logger.info("Cleaning 'rating' column.")
-            self.df['rating'] = self.df['rating'].apply(ratings)
-            df_ratings = self.df['rating'].apply(pd.Series)
+            rating = self.df['rating']
+            complete = rating.str.len().fillna(0) >= 5
+            if not complete.all():
+                self.logger.error(f"Error processing rating data: {(~complete).sum()} rows without dining and delivery ratings")
+            df_ratings = pd.DataFrame({
+                name: rating.str[position].where(complete, None)
+                for name, position in RATING_POSITIONS.items()
+            }, index=self.df.index)
             self.df = pd.concat([self.df.drop(columns='rating'), df_ratings], axis=1)
             self.logger.info("'rating' column cleaned and expanded.")
         except Exception as e:
@@ -59,8 +62,9 @@ class DataCleaner:
     def process_time_column(self):
         try:
             self.logger.info("Processing 'time' column.")
-            self.df['days'] = self.df['time'].apply(lambda x: x.replace('Opening Hours\n','').split(':')[0])
-            self.df['opening and closing time'] = self.df['time'].apply(lambda x: ":".join(x.replace('Opening Hours\n','').split(':')[1:]))
+            parts = self.df['time'].str.extract(TIME_PATTERN)
+            self.df['days'] = parts[0]
+            self.df['opening and closing time'] = parts[1]
             self.df.drop(columns = 'time', inplace = True)
             self.logger.info("'time' column processed.")
         except Exception as e:
@@ -69,4 +73,10 @@ class DataCleaner:
     this function is for get the cleaned dataframe
     '''
     def get_cleaned_dataframe(self):
-        return self.df
\ No newline at end of file
+        return self.df
+    '''
+    this function writes the cleaned dataframe as parquet, dish_data as a list of typed structs
+    params - path of the parquet file
+    '''
+    def to_parquet(self, path):
+        return write_parquet(zomato_table(self.df), path)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from zomatoParser import ZomatoStateParser
+from utils import setup_logger
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+# Class ZomatoHttpFetcher gets restaurant data without a browser
+# it downloads the restaurant pages over one pooled keep-alive session, `workers` at a time,
+# and reads the embedded page state with ZomatoStateParser into the same dict as
+# RestaurantScraper.get_restaurant_data. Chrome is then only needed for the listing.
+class ZomatoHttpFetcher:
+    def __init__(self, workers = 8, timeout = 20, retries = 2):
+        self.workers = workers
+        self.timeout = timeout
+        self.logger = setup_logger()
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        # one connection per worker kept alive between pages, retry on throttling / server errors
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers,
+                              max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+
+    '''
+    fetch - download the html of a page
+    '''
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+
+    '''
+    get_restaurant_data - same interface and output as RestaurantScraper.get_restaurant_data
+    params :-
+    restaurant_link - link of the restaurant
+    '''
+    def get_restaurant_data(self, restaurant_link):
+        try:
+            self.logger.info(f"Fetching restaurant data over http from URL {restaurant_link}")
+            return ZomatoStateParser(self.fetch(restaurant_link), logger=self.logger).get_restaurant_data()
+        except Exception as e:
+            self.logger.error(f"An error occurred: {str(e)}")
+            return {}
+
+
+    '''
+    get_many - fetch and parse the restaurant pages concurrently
+    params:-
+    urls - list of restaurant urls
+    progress - optional callback(done, total) called as each url finishes
+    on_result - optional callback(url, result) called as each url finishes, e.g. ResultStore.append
+    keep_results - False drops every result once on_result has it, so a long crawl does not hold them all
+    return - list of restaurant data in the same order as urls (None for each with keep_results False)
+    '''
+    def get_many(self, urls, progress = None, on_result = None, keep_results = True):
+        urls = list(urls)
+        results = [None] * len(urls)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.get_restaurant_data, url): i for i, url in enumerate(urls)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                results[i] = future.result()
+                if on_result is not None:
+                    on_result(urls[i], results[i])
+                if not keep_results:
+                    results[i] = None
+                if progress is not None:
+                    progress(done, len(urls))
+        return results
+
+
+    def close(self):
+        self.session.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
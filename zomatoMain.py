@@ -1,30 +1,148 @@
 from zomatoScraper import  RestaurantScraper
+from pageCache import PageCache
+from utils import setup_logger
 import pandas as pd
 from zomatoCleaner import DataCleaner
+from scraperPool import ScraperPool
+from crawlEngine import CrawlEngine
+from zomatoHttpFetcher import ZomatoHttpFetcher
+from waits import summarize_waits
+from driverMetrics import DriverMetrics
+from resultStore import ResultStore
+from sqliteStore import SqliteStore
+from streamingCleaner import StreamingCleaner, iter_store_records
 import argparse
+import os
 
 # funcition for parsing arguments
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Scrape Zomato restaurant data.')
     parser.add_argument('--url', type=str, required=True, help='URL of the Zomato restaurant listing')
     parser.add_argument('--num', type=int, required=True, help='Number of restaurants to fetch')
+    parser.add_argument('--parse_mode', type=str, default='driver', choices=['driver', 'source'], help='Read fields through webdriver calls or parse the page_source once')
+    parser.add_argument('--workers', type=int, default=1, help='Number of headless browsers (or http connections) scraping restaurant pages in parallel')
+    parser.add_argument('--block_requests', action='store_true', help='Drop images, fonts, media and tracking requests in chrome')
+    parser.add_argument('--store', type=str, default='restaurant_data.jsonl', help='Jsonl file every restaurant record is appended to as soon as it is scraped')
+    parser.add_argument('--resume', action='store_true', help='Keep the store and web_links.csv of the last run and only scrape the missing restaurants')
+    parser.add_argument('--cache', type=str, default=None, help='Directory to save the rendered restaurant pages in for offline re-parsing (see reparse.py)')
+    parser.add_argument('--parquet', type=str, default=None, help='Also write the cleaned data to this parquet file')
+    parser.add_argument('--sqlite', type=str, default=None, help='Also load the cleaned data into the restaurants / dishes tables of this sqlite database')
+    parser.add_argument('--stream', action='store_true', help='Clean every restaurant as soon as it is scraped and append it to the cleaned outputs, instead of cleaning the whole crawl at the end')
+    parser.add_argument('--metrics', type=str, default=None, help='Time the webdriver calls of every scraper phase and write them to METRICS.json and METRICS.prom')
+    parser.add_argument('--engine', action='store_true', help='Scrape the restaurant pages with the asyncio crawl engine while the listing is still scrolling')
+    parser.add_argument('--rate', type=float, default=None, help='With --engine, at most this many restaurant page requests per second')
+    parser.add_argument('--fetch_mode', type=str, default='browser', choices=['browser', 'http'], help='Render restaurant pages in chrome or fetch them over http and read the embedded page state')
     return parser.parse_args()
 
 # Function to scrape data
-def scrape_data(url, num):
-    scraper = RestaurantScraper(headless=False)
-    restaurant_urls = scraper.get_restaurant_urls(url, num)
-    
-    df = pd.DataFrame(restaurant_urls, columns=['Web_link'])
-    df.to_csv('web_links.csv', index=False)
+# with a StreamingCleaner every stored record is also cleaned right away, the records are not
+# collected into a dataframe (nor restaurant_data_uncleaned.csv) and None is returned
+# with a DriverMetrics the webdriver calls of every browser are timed in it (not the http fetcher)
+# with engine the restaurant pages are scraped by a CrawlEngine while the listing is still scrolling
+# the headful listing browser is only started to scroll the listing or, with one browser worker, to
+# scrape the restaurant pages too: resuming from web_links.csv with the http fetcher, the pool or
+# the engine needs no chrome of its own
+def scrape_data(url, num, parse_mode='driver', workers=1, fetch_mode='browser', block_requests=False, store_path='restaurant_data.jsonl', resume=False, cache=None, cleaner=None, metrics=None, engine=False, rate=None):
+    store = ResultStore(store_path)
+    if not resume:
+        store.clear()
+    logger = setup_logger()
+    cache = PageCache(cache) if isinstance(cache, str) else cache
+    restaurant_urls = None
+    if resume and os.path.exists('web_links.csv'):
+        # the listing of the interrupted run, so the same restaurants are finished
+        restaurant_urls = pd.read_csv('web_links.csv')['Web_link'].tolist()[:num]
+        logger.info(f"Resuming with {len(restaurant_urls)} links from web_links.csv")
+
+    scraper = None
+    if restaurant_urls is None or (not engine and fetch_mode == 'browser' and workers <= 1):
+        scraper = RestaurantScraper(headless=False, parse_mode=parse_mode, block_requests=block_requests, cache=cache, metrics=metrics)
+    if engine:
+        return crawl_with_engine(scraper, url, num, store, restaurant_urls, workers, fetch_mode, parse_mode, block_requests, cleaner, metrics, rate, cache)
+    if restaurant_urls is None:
+        restaurant_urls = scraper.get_restaurant_urls(url, num)
+        pd.DataFrame(restaurant_urls, columns=['Web_link']).to_csv('web_links.csv', index=False)
+
+    pending = store.pending(restaurant_urls)
+    logger.info(f"{len(restaurant_urls) - len(pending)} restaurants already in {store_path}, {len(pending)} to scrape")
+
+    on_result = store.append
+    if cleaner is not None:
+        # restaurants of the interrupted run go to the cleaned outputs first
+        wanted = set(restaurant_urls)
+        cleaner.add_many((link, data) for link, data in iter_store_records(store_path) if link in wanted)
+        def on_result(link, data):
+            if store.append(link, data):
+                cleaner.add(link, data)
 
-    df['restaurant_data'] = df['Web_link'].apply(scraper.get_restaurant_data)
+    wait_records = list(scraper.waiter.records) if scraper else []
+    if fetch_mode == 'http':
+        # chrome is only needed for the listing, the restaurant pages come over http
+        if scraper:
+            scraper.close_driver()
+        with ZomatoHttpFetcher(workers=max(workers, 1)) as fetcher:
+            fetcher.get_many(pending, on_result=on_result, keep_results=cleaner is None)
+    elif workers > 1:
+        # the listing browser is not needed any more, the pool starts its own headless ones
+        if scraper:
+            scraper.close_driver()
+        with ScraperPool(RestaurantScraper, workers=workers, headless=True, parse_mode=parse_mode, block_requests=block_requests, cache=cache, metrics=metrics) as pool:
+            pool.map(pending, on_result=on_result, keep_results=cleaner is None)
+            wait_records += pool.wait_records()
+    else:
+        for link in pending:
+            on_result(link, scraper.get_restaurant_data(link))
+        wait_records = scraper.waiter.records
+    log_waits(logger, wait_records)
+
+    if cleaner is not None:
+        return None
+    # the cleaning reads the store, restaurants scraped by earlier runs included
+    df = store.load(restaurant_urls)
     df.to_csv('restaurant_data_uncleaned.csv', index=False)
     
     return df
 
+# Function to log how long the adaptive waits took against the fixed sleeps they replace
+def log_waits(logger, wait_records):
+    for name, row in summarize_waits(wait_records).items():
+        logger.info(f"Waits '{name}': {row['count']} waits, {row['waited']:.1f}s waited, {row['saved']:.1f}s saved of {row['budget']:.1f}s fixed sleeps")
+
+# Function to scrape the restaurant pages with the CrawlEngine, while the listing is still scrolling
+# when restaurant_urls is None (scraper is the listing browser, None when the urls are given). The
+# restaurants already in the store (resume) are skipped and go to the cleaner after the crawl
+def crawl_with_engine(scraper, url, num, store, restaurant_urls=None, workers=1, fetch_mode='browser', parse_mode='driver', block_requests=False, cleaner=None, metrics=None, rate=None, cache=None):
+    def on_result(link, data):
+        if store.append(link, data) and cleaner is not None:
+            cleaner.add(link, data)
+
+    if fetch_mode == 'http':
+        engine = CrawlEngine(ZomatoHttpFetcher, workers=max(workers, 1), rate=rate)
+    else:
+        engine = CrawlEngine(RestaurantScraper, workers=max(workers, 1), rate=rate, headless=True, parse_mode=parse_mode,
+                             block_requests=block_requests, cache=cache, metrics=metrics)
+    discover = None
+    if restaurant_urls is None:
+        discover = lambda on_urls: scraper.get_restaurant_urls(url, num, on_urls=on_urls)
+    done = store.done_urls()
+    with engine:
+        restaurant_urls = engine.run(restaurant_urls or [], discover, skip=done, on_result=on_result)
+        wait_records = (scraper.waiter.records if scraper else []) + engine.wait_records()
+    if scraper:
+        scraper.close_driver()
+    pd.DataFrame(restaurant_urls, columns=['Web_link']).to_csv('web_links.csv', index=False)
+    log_waits(setup_logger(), wait_records)
+
+    if cleaner is not None:
+        wanted = done & set(restaurant_urls)
+        cleaner.add_many((link, data) for link, data in iter_store_records(store.path) if link in wanted)
+        return None
+    df = store.load(restaurant_urls)
+    df.to_csv('restaurant_data_uncleaned.csv', index=False)
+    return df
+
 # Function to clean data
-def clean_data(df):
+def clean_data(df, parquet_path=None, sqlite_path=None):
     cleaner = DataCleaner(df)
     cleaner.convert_dict_column('restaurant_data')
     cleaner.clean_ratings()
@@ -32,14 +150,29 @@ def clean_data(df):
     
     cleaned_df = cleaner.get_cleaned_dataframe()
     cleaned_df.to_csv('cleaned_restaurant_data.csv', index=False)
+    if parquet_path:
+        cleaner.to_parquet(parquet_path)
+    if sqlite_path:
+        with SqliteStore(sqlite_path) as db:
+            db.load_zomato(cleaned_df)
     
     return cleaned_df
 
 if __name__ == "__main__":
     args = parse_arguments()
+    metrics = DriverMetrics() if args.metrics else None
 
-    # Scrape the data
-    scraped_data = scrape_data(args.url, args.num)
-    
-    # Clean the data
-    cleaned_data = clean_data(scraped_data)
\ No newline at end of file
+    if args.stream:
+        # Scrape and clean the data together
+        with StreamingCleaner('zomato', 'cleaned_restaurant_data.csv', args.parquet, args.sqlite) as cleaner:
+            scrape_data(args.url, args.num, args.parse_mode, args.workers, args.fetch_mode, args.block_requests, args.store, args.resume, args.cache, cleaner, metrics, args.engine, args.rate)
+    else:
+        # Scrape the data
+        scraped_data = scrape_data(args.url, args.num, args.parse_mode, args.workers, args.fetch_mode, args.block_requests, args.store, args.resume, args.cache, metrics=metrics, engine=args.engine, rate=args.rate)
+
+        # Clean the data
+        cleaned_data = clean_data(scraped_data, args.parquet, args.sqlite)
+
+    if metrics:
+        metrics.to_json(f'{args.metrics}.json')
+        metrics.to_prometheus(f'{args.metrics}.prom')
@@ -0,0 +1,342 @@
+from bs4 import BeautifulSoup, NavigableString
+from urllib.parse import urlparse, parse_qs
+import json
+import re
+from utils import setup_logger
+
+
+# Colour codes zomato uses on the first <i> tag of a dish card to mark veg / non-veg
+VEG_COLOR = '#3AB757'
+NON_VEG_COLOR = '#BF4C43'
+# stop-color of the svg gradient used for the partially filled rating star
+RATING_STOP_COLOR = '#F3C117'
+# the page state zomato embeds for its frontend: window.__PRELOADED_STATE__ = JSON.parse("...")
+PRELOADED_STATE_PATTERN = re.compile(r'window\.__PRELOADED_STATE__\s*=\s*JSON\.parse\(("(?:[^"\\]|\\.)*")\)', re.S)
+
+
+'''
+text_of - returns the visible text of a tag the same way selenium's .text does for our fields
+(one line per text node, stripped) and "Not found" when the tag is missing like DummyElement
+'''
+def text_of(tag):
+    if tag is None:
+        return 'Not found'
+    return tag.get_text('\n', strip=True)
+
+
+'''
+find_by_text - soup version of the xpath `//name[contains(text(), "needle")]`
+the xpath only looks at the direct text nodes of the element, so we do the same here
+params:-
+root - tag to search under
+name - tag name to match
+needle - text the element's own text should contain
+'''
+def find_by_text(root, name, needle):
+    for tag in root.find_all(name):
+        for child in tag.children:
+            if isinstance(child, NavigableString) and needle in child:
+                return tag
+    return None
+
+
+'''
+ancestor - soup version of the xpath `/..` chain
+params:-
+tag - tag to start from
+levels - how many parents to walk up
+'''
+def ancestor(tag, levels):
+    for _ in range(levels):
+        if tag is None:
+            return None
+        tag = tag.parent
+    return tag
+
+
+'''
+child_tags - soup version of the xpath `name` step (direct children with that tag name)
+'''
+def child_tags(tag, name):
+    if tag is None:
+        return []
+    return tag.find_all(name, recursive=False)
+
+
+# Class ZomatoPageParser parses a rendered zomato restaurant page in a single pass
+# it mirrors the element-by-element methods of RestaurantScraper but works on page_source
+class ZomatoPageParser:
+    def __init__(self, page_source, logger=None):
+        self.page_source = page_source
+        self.soup = BeautifulSoup(page_source, 'html.parser')
+        self.logger = logger or setup_logger()
+
+
+    '''
+    get_location - extract the latitude and longitude from the destination_url
+    same output as RestaurantScraper.get_location
+    '''
+    def get_location(self, destination_url):
+        query_params = parse_qs(urlparse(destination_url or '').query)
+        destination = query_params.get('destination', [None])[0]
+
+        if destination:
+            latitude, longitude = destination.split(',')
+            return {
+                'latitude' : latitude,
+                'longitude' : longitude
+                }
+        else:
+            self.logger.warning("No destination parameter found in the URL")
+            return {
+                'latitude' : 'not available',
+                'longitude' : 'not available'
+                }
+
+
+    '''
+    get_head_info - extract name, ratings, category, location, time, coordinates from the page head
+    the tooltip with opening hours is only in the source once it has been hovered, without it
+    the opening hours come from the page state embedded in the same source
+    '''
+    def get_head_info(self):
+        ratings_anchor = find_by_text(self.soup, 'div', 'Ratings')
+        if ratings_anchor is None:
+            self.logger.warning('Element not found with text "Ratings"')
+
+        head_div = ancestor(ratings_anchor, 5)
+        name_element = head_div.find('h1') if head_div is not None else None
+        rating_element = ancestor(ratings_anchor, 3)
+
+        # section[1] of the 6th ancestor holds the categories div and the location anchor
+        sections = child_tags(ancestor(ratings_anchor, 6), 'section')
+        first_section = sections[0] if sections else None
+        category_divs = child_tags(first_section, 'div')
+        location_anchors = child_tags(first_section, 'a')
+
+        time_element = self.soup.find('span', attrs={'role': 'tooltip'})
+
+        direction_span = find_by_text(self.soup, 'span', 'Direction')
+        destination_element = ancestor(direction_span, 2)
+        destination_url = destination_element.get('href') if destination_element is not None else None
+
+        data = {
+            "name" : text_of(name_element),
+            "rating" : text_of(rating_element).split('\n'),
+            "category" : text_of(category_divs[0] if category_divs else None).split(', '),
+            "location" : text_of(location_anchors[0] if location_anchors else None).split(', '),
+            "time" : text_of(time_element) if time_element is not None else self.get_time(),
+            "coordinates" : self.get_location(destination_url)
+        }
+        return data
+
+
+    '''
+    get_time - opening hours from the embedded page state, "Not found" when the source has none
+    '''
+    def get_time(self):
+        try:
+            return ZomatoStateParser(self.page_source, logger=self.logger).get_time()
+        except ValueError:
+            self.logger.warning('Opening hours not found in the tooltip nor the page state')
+            return 'Not found'
+
+
+    '''
+    extract_order_sections - get all the dish card tags from the restaurant page
+    '''
+    def extract_order_sections(self):
+        order_heading = find_by_text(self.soup, 'h2', 'Order Online')
+        order_section = child_tags(ancestor(order_heading, 3), 'section')
+        order_section = order_section[1:]  # Skip the first section due not having the relevent content
+
+        dish_card = []
+        for sec in order_section:
+            for div in child_tags(sec, 'div'):
+                if text_of(div):
+                    dish_card += child_tags(div, 'div')
+        self.logger.info(f"Extracted {len(dish_card)} dish cards from page source.")
+        return dish_card
+
+
+    '''
+    ratings_dish_card - get the dish rating and veg / non-veg type from a dish card tag
+    '''
+    def ratings_dish_card(self, dish_card):
+        counter = 0
+        dish_type = None
+        i_tags = dish_card.find_all('i')
+        if not i_tags:
+            return counter, dish_type
+
+        color = i_tags[0].get('color')
+        if color == VEG_COLOR:
+            dish_type = 'veg'
+        elif color == NON_VEG_COLOR:
+            dish_type = 'non-veg'
+        else:
+            self.logger.warning(f'Unknown dish with color code: {color}')
+
+        for i_tag in i_tags[1:]:
+            if i_tag.find('title') is not None:
+                # a full star has a title element
+                counter += 1
+            else:
+                # getting the decimal of the rating from the gradient stop
+                last = i_tag.find_all('stop', attrs={'stop-color': RATING_STOP_COLOR})
+                if len(last) < 2:
+                    break
+                counter += int(last[1].get('offset', '0').replace('%', '')) * 0.01
+                break
+        return counter, dish_type
+
+
+    '''
+    extract_dish_card - get the dish info from a dish card tag, same dict as RestaurantScraper.extract_dish_card
+    '''
+    def extract_dish_card(self, dish_card):
+        rating, dish_type = self.ratings_dish_card(dish_card)
+        dish_info = {
+                "name": text_of(dish_card.find('h4')),
+                "votes": text_of(find_by_text(dish_card, 'span', 'votes')),
+                "price": text_of(find_by_text(dish_card, 'span', '₹')),
+                "description": text_of(dish_card.find('p')),
+                "rating" : rating,
+                "dish_type" : dish_type
+            }
+        return dish_info
+
+
+    '''
+    get_restaurant_data - parse the whole page, head info and every dish card
+    '''
+    def get_restaurant_data(self):
+        data = self.get_head_info()
+        data['dish_data'] = [self.extract_dish_card(dish) for dish in self.extract_order_sections()]
+        return data
+
+
+'''
+extract_preloaded_state - get the embedded page state dict out of the raw html, None if it is not there
+'''
+def extract_preloaded_state(html):
+    match = PRELOADED_STATE_PATTERN.search(html)
+    if match is None:
+        return None
+    # the state is a json string literal holding the json of the state
+    return json.loads(json.loads(match.group(1)))
+
+
+'''
+format_opening_hours - the opening_hours rows of the page state in the tooltip text format:
+"Opening Hours\nMon, Fri-Sun:7am – 11:30pm", "Not found" when there are none
+'''
+def format_opening_hours(opening_hours):
+    if not opening_hours:
+        return 'Not found'
+    return '\n'.join(['Opening Hours'] + [f"{row.get('days', '')}:{row.get('timing', '')}" for row in opening_hours])
+
+
+'''
+format_price - "₹418" for whole prices, "₹973.72" otherwise, like the dish card shows it
+'''
+def format_price(price):
+    price = float(price)
+    return f"₹{int(price)}" if price.is_integer() else f"₹{price:.2f}"
+
+
+'''
+star_rating - the dish rating the way the driver path computes it from the stars:
+number of full stars plus the offset percent of the partial star * 0.01
+'''
+def star_rating(value):
+    value = float(value or 0)
+    full = int(value)
+    offset = round((value - full) * 100)
+    return full + offset * 0.01 if offset else full
+
+
+# Class ZomatoStateParser reads a restaurant page without a browser, from the page state
+# zomato embeds in the html (window.__PRELOADED_STATE__), into the same dict as
+# RestaurantScraper.get_restaurant_data
+class ZomatoStateParser:
+    def __init__(self, html, logger=None):
+        self.logger = logger or setup_logger()
+        self.state = extract_preloaded_state(html)
+        if self.state is None:
+            raise ValueError("Embedded page state (__PRELOADED_STATE__) not found in the page")
+        pages = self.state.get('pages', {})
+        res_id = str(pages.get('current', {}).get('resId', ''))
+        restaurants = pages.get('restaurant', {})
+        if res_id not in restaurants and restaurants:
+            res_id = next(iter(restaurants))
+        self.restaurant = restaurants.get(res_id, {})
+        self.sections = self.restaurant.get('sections', {})
+
+
+    '''
+    get_time - opening hours in the tooltip text format: "Opening Hours\nMon, Fri-Sun:7am – 11:30pm"
+    '''
+    def get_time(self):
+        timings = self.sections.get('SECTION_BASIC_INFO', {}).get('timing', {})
+        return format_opening_hours(timings.get('customised_timings', {}).get('opening_hours', []))
+
+
+    '''
+    get_head_info - name, rating, category, location, time, coordinates
+    '''
+    def get_head_info(self):
+        basic_info = self.sections.get('SECTION_BASIC_INFO', {})
+        contact = self.sections.get('SECTION_RES_CONTACT', {})
+        ratings = basic_info.get('rating_new', {}).get('ratings', {})
+
+        rating = []
+        for key, label in (('DINING', 'Dining Ratings'), ('DELIVERY', 'Delivery Ratings')):
+            row = ratings.get(key, {})
+            rating += [str(row.get('rating', '-')), str(row.get('reviewCount', '0')), label]
+
+        latitude, longitude = contact.get('latitude'), contact.get('longitude')
+        return {
+            "name" : basic_info.get('name', 'Not found'),
+            "rating" : rating,
+            "category" : basic_info.get('cuisine_string', 'Not found').split(', '),
+            "location" : contact.get('locality_verbose', 'Not found').split(', '),
+            "time" : self.get_time(),
+            "coordinates" : {
+                'latitude' : str(latitude) if latitude else 'not available',
+                'longitude' : str(longitude) if longitude else 'not available'
+            }
+        }
+
+
+    '''
+    iter_items - yield every dish item of the order menus in menu order
+    '''
+    def iter_items(self):
+        menus = self.restaurant.get('order', {}).get('menuList', {}).get('menus', [])
+        for menu in menus:
+            for category in menu.get('menu', {}).get('categories', []):
+                for item in category.get('category', {}).get('items', []):
+                    yield item.get('item', {})
+
+
+    '''
+    extract_dish - same dict as RestaurantScraper.extract_dish_card for one dish item
+    '''
+    def extract_dish(self, item):
+        dietary = item.get('dietary_slugs', [])
+        rating = item.get('rating', {})
+        return {
+            "name": item.get('name', 'Not found'),
+            "votes": rating.get('total_rating_text') or 'Not found',
+            "price": format_price(item.get('price', 0)),
+            "description": item.get('desc', 'Not found'),
+            "rating" : star_rating(rating.get('value')),
+            "dish_type" : 'veg' if 'veg' in dietary else 'non-veg' if 'non-veg' in dietary else None
+        }
+
+
+    def get_restaurant_data(self):
+        data = self.get_head_info()
+        data['dish_data'] = [self.extract_dish(item) for item in self.iter_items()]
+        return data
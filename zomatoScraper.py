@@ -1,20 +1,76 @@
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
 from urllib.parse import urlparse, parse_qs
-from time import sleep
-from utils import setup_logger, take_screenshot, try_element
+from utils import setup_logger, take_screenshot, try_element, set_implicit_wait, implicit_wait
+from zomatoParser import ZomatoPageParser, format_opening_hours
+from waits import AdaptiveWaiter, zomato_listing_ready, zomato_restaurant_ready, ZOMATO_CARD_XPATH
+from cardHarvester import CardHarvester
+from requestBlocking import RequestBlocker
+from pageCache import PageCache
+from driverMetrics import DriverMetrics, phase
+from pageFingerprint import page_fingerprint, ZOMATO_FINGERPRINT_SCRIPT
+
+
+# the head fields of the restaurant page in one script call, all read relative to the
+# "Ratings" div found once (the same ancestors the old xpaths walked up to) and the opening
+# hours from the page state zomato embeds, so the tooltip does not have to be hovered
+HEAD_SCRIPT = """
+const xpath = (path, root) => document.evaluate(path, root || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const up = (node, levels) => { while (node && levels--) node = node.parentElement; return node; };
+const text = node => node ? node.innerText.trim() : null;
+const anchor = xpath('//div[contains(text(),"Ratings")]');
+const head = up(anchor, 5);
+const block = up(anchor, 6);
+const section = block && xpath('./section[1]', block);
+const direction = up(xpath('//span[contains(text(),"Direction")]'), 2);
+let openingHours = null;
+try {
+    const pages = window.__PRELOADED_STATE__.pages;
+    // the first restaurant of the state when the current resId is not one of them, like ZomatoStateParser
+    const restaurants = pages.restaurant || {};
+    const resId = pages.current && String(pages.current.resId) in restaurants ? String(pages.current.resId) : Object.keys(restaurants)[0];
+    openingHours = restaurants[resId].sections.SECTION_BASIC_INFO.timing.customised_timings.opening_hours;
+} catch (e) {}
+return {
+    name: text(head && head.querySelector('h1')),
+    rating: text(up(anchor, 3)),
+    category: text(section && xpath('./div', section)),
+    location: text(section && xpath('./a', section)),
+    tooltip: text(xpath('//span[@role="tooltip"]')),
+    href: direction && direction.getAttribute('href'),
+    opening_hours: openingHours,
+};
+"""
 
 
 # Creating a Class RestaurantScraper for all the scraping Functionality
+# parse_mode - 'driver' reads every field through webdriver calls, 'source' grabs the
+# page_source once and parses it with ZomatoPageParser
+# wait_ceilings - optional dict overriding the waits.DEFAULT_CEILINGS (seconds)
+# block_requests - True to drop images, fonts, media and trackers with the zomato default blocklist,
+# or a dict of RequestBlocker arguments (resource_types, url_patterns) for a custom one
+# cache - optional PageCache (or its directory) the rendered restaurant pages are saved to for offline re-parsing
+# metrics - True to time the webdriver calls of every phase in a new DriverMetrics, or a DriverMetrics
+# shared with other scrapers
+# fingerprints - optional callable(url) returning the page fingerprint stored by the last crawl (or None),
+# get_restaurant_delta skips the restaurants whose fingerprint has not changed
 class RestaurantScraper:
-    def __init__(self, headless = True):
+    def __init__(self, headless = True, parse_mode = 'driver', wait_ceilings = None, block_requests = False, cache = None, metrics = None, fingerprints = None):
+        if parse_mode not in ('driver', 'source'):
+            raise ValueError(f"Unknown parse_mode '{parse_mode}', use 'driver' or 'source'")
         self.headless = headless
+        self.parse_mode = parse_mode
+        self.blocker = None
+        if block_requests:
+            self.blocker = RequestBlocker('zomato', **(block_requests if isinstance(block_requests, dict) else {}))
+        self.cache = PageCache(cache) if isinstance(cache, str) else cache
+        self.fingerprints = fingerprints
         self.driver = self._setup_driver()
         self.logger = setup_logger()
+        self.waiter = AdaptiveWaiter(self.driver, logger=self.logger, ceilings=wait_ceilings)
+        self.metrics = DriverMetrics() if metrics is True else metrics
+        if self.metrics:
+            self.metrics.attach(self.driver)
 
 
     def _setup_driver(self):
@@ -23,50 +79,33 @@ class RestaurantScraper:
             chrome_options.add_argument("--headless=new")  # Run in headless mode
             chrome_options.add_argument("--window-size=1920x1080")
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36")
-        return webdriver.Chrome(options=chrome_options)
+        if self.blocker:
+            self.blocker.apply_options(chrome_options)
+        driver = webdriver.Chrome(options=chrome_options)
+        if self.blocker:
+            self.blocker.attach_cdp(driver)
+        return driver
 
     '''
     get_restaurant_urls method to get the links of each restaurant 
     params :-
     link :- link of the zomato with the area 
-    num :- number of restaurants data you want to scrape'''
-    def get_restaurant_urls(self, link, num):
+    num :- number of restaurants data you want to scrape
+    on_urls :- optional callback(urls) called with the new urls after every scroll'''
+    @phase('get_restaurant_urls')
+    def get_restaurant_urls(self, link, num, on_urls = None):
         try:
             self.logger.info(f"Fetching restaurant URLs from {link}")
             self.driver.get(link)
-            self.driver.implicitly_wait(10)
-            sleep(5)
+            set_implicit_wait(self.driver, 10)
+            self.waiter.until('listing_page', zomato_listing_ready)
 
             take_screenshot(self.driver, self.logger, "initial_load.png")
-            # Initialize the list and set up an explicit wait
-            li = []
-            wait = WebDriverWait(self.driver, 10)  # Adjust the timeout as needed
-
-            while True:
-                if len(li) == 0:
-                    # Wait for the elements to be present
-                    wait.until(EC.presence_of_all_elements_located((By.XPATH, '//img[@alt="Restaurant Card"]/../..')))
-                    li = self.driver.find_elements(By.XPATH, '//img[@alt="Restaurant Card"]/../..')
-                
-                if len(li) == 0:
-                    # If no elements found, break the loop
-                    self.logger.warning("No restaurant cards found.")
-                    break
-                
-                element = li[-1]
-                self.driver.execute_script("arguments[0].scrollIntoView();", element)
-                
-                # Use an explicit wait to ensure new elements are loaded
-                sleep(5)
-                # finding the resturant_cards anchor element
-                li = self.driver.find_elements(By.XPATH, '//img[@alt="Restaurant Card"]/../..')
-                self.logger.info(f"{len(li)} number of restaurants cards found")
-                
-                if len(li) >= num:
-                    break
-
-            # Get URLs
-            restaurant_urls = [link.get_attribute('href') for link in li[:num]]
+            # scroll the listing and collect the hrefs of the new cards after every scroll
+            harvester = CardHarvester(self.driver, ZOMATO_CARD_XPATH, self.waiter, logger=self.logger)
+            restaurant_urls = harvester.run(num, on_new=on_urls)
+            if self.blocker:
+                self.blocker.page_report(self.driver, link)
             self.logger.info(f"Successfully fetched {len(restaurant_urls)} restaurant URLs")
             return restaurant_urls
         except Exception as e:
@@ -103,73 +142,38 @@ class RestaurantScraper:
                 }
 
 
-    '''
-    get_dynamic_tooltip_text - to get the from the dynamic tooltip element
-    params: -
-    tooltip_xpath - xpath of the dynamic tool_tip
-    text_element - xpath of the tooltip text containing element 
-    '''
-    def get_dynamic_tooltip_text(self, tooltip_xpath, text_element):
-        #finding tool tip element
-        tooltip_element = try_element('xpath', tooltip_xpath, driver= self.driver, logger=self.logger)
-
-        action = ActionChains(self.driver)
-        #moving cursor to hover over the tooltip div to activate the script
-        action.move_to_element(tooltip_element).perform()
-            
-        # Capture the tooltip's text from the displayed elements
-        tooltip_text = try_element('xpath', text_element, driver= self.driver, logger=self.logger).text
-        return tooltip_text
-
-
     '''
     get_head_info - it will extract data of head element like name, ratings, category, location, time , coordinates
+    all the fields come from one HEAD_SCRIPT call, the missing ones are "Not found" like a DummyElement.
+    the opening hours are read from the page state, or the tooltip when it is already rendered
     '''
+    @phase('get_head_info')
     def get_head_info(self):
-        head_div = try_element('xpath', '//div[contains(text(),"Ratings")]/../../../../..', driver = self.driver, logger=self.logger)
-        
-        # finding name of the restaurant
-        name_element = try_element('TAG_NAME', 'h1', driver= head_div, logger=self.logger)
-        name = name_element.text
-        
-        # finding the resaurants ratings
-        rating_element = try_element('XPATH', '//div[contains(text(),"Ratings")]/../../..', driver = self.driver, logger=self.logger)
-        rating = rating_element.text.split('\n')
-        
-        # finding the categories restaurant served
-        category_element = try_element('XPATH', '//div[contains(text(),"Ratings")]/../../../../../../section[1]/div', driver = self.driver, logger=self.logger)
-        category = category_element.text.split(', ')
-        
-        #finding the location of the restaurant
-        location_element = try_element('XPATH','//div[contains(text(),"Ratings")]/../../../../../../section[1]/a', driver = self.driver, logger=self.logger)
-        location = location_element.text.split(', ')
-        
-        # finding the opening and closing time
-        tooltip_xpath = '//div[@role ="tooltip"]'
-        text_element = '//span[@role="tooltip"]'
-        time = self.get_dynamic_tooltip_text(tooltip_xpath=tooltip_xpath, text_element=text_element)
-        
-        #findnig the cordinates of the restaurant
-        destination_element = try_element('XPATH', '//span[contains(text(),"Direction")]/../..', driver= self.driver, logger=self.logger)
-        destination_url = destination_element.get_attribute('href')
-        coordinates = self.get_location(destination_url)
+        head = self.driver.execute_script(HEAD_SCRIPT)
+        for field in ('name', 'rating', 'category', 'location'):
+            if head[field] is None:
+                self.logger.warning(f"Head field '{field}' not found")
+        time = format_opening_hours(head['opening_hours'])
+        if time == 'Not found' and head['tooltip']:
+            time = head['tooltip']
 
         data = {
-            "name" : name,
-            "rating" : rating,
-            "category" : category,
-            "location" : location,
+            "name" : head['name'] or 'Not found',
+            "rating" : (head['rating'] or 'Not found').split('\n'),
+            "category" : (head['category'] or 'Not found').split(', '),
+            "location" : (head['location'] or 'Not found').split(', '),
             "time" : time,
-            "coordinates" : coordinates
+            "coordinates" : self.get_location(head['href'] or 'Not found')
         }
         return data
 
-    
+
     '''
     extract_order_sections - this function will get all the dish card elements from the restaurant page
     params: -
     no parameter required
     '''
+    @phase('extract_order_sections')
     def extract_order_sections(self):
 
         # Find the order sections after the first one
@@ -200,9 +204,10 @@ class RestaurantScraper:
     params - 
     dish_card - element of the dish_card
     '''
+    @phase('ratings_dish_card')
     def ratings_dish_card(self, dish_card):
         counter = 0
-        i_tags = try_element('tag_name', 'i', element=False, driver = dish_card, logger=self.logger)
+        i_tags = try_element('tag_name', 'i', element=False, driver = dish_card, logger=self.logger, timeout=0)
         
         # Check the color attribute of the first element to judge the dish either veg or nonveg
         color = i_tags[0].get_attribute('color')
@@ -218,13 +223,14 @@ class RestaurantScraper:
         
         # Process remaining elements
         for i_tag in i_tags[1:]:
-            i_element = try_element('tag_name', 'title', driver = i_tag, logger=self.logger)
+            # a star without a title is the partly filled one, looked up without waiting
+            i_element = try_element('tag_name', 'title', driver = i_tag, logger=self.logger, timeout=0)
             if i_element.text != 'Not found':
                 # increase the counter rating
                 counter += 1
             else:
                 # getting the decimal of the rating
-                last = try_element('xpath', './/*[local-name()="stop" and @stop-color="#F3C117"]', element=False,driver= i_tag, logger=self.logger)
+                last = try_element('xpath', './/*[local-name()="stop" and @stop-color="#F3C117"]', element=False,driver= i_tag, logger=self.logger, timeout=0)
                 if len(last) == 0:
                     break
                 else:
@@ -239,24 +245,25 @@ class RestaurantScraper:
     params:-
     dish_card - dish_card Web element
     '''
+    @phase('extract_dish_card')
     def extract_dish_card(self, dish_card):
         # Extract the dish name
         dish_name = try_element('tag_name', 'H4', driver=dish_card, logger=self.logger).text
             
-        # Extract the number of votes
-        dish_votes = try_element('xpath', './/span[contains(text(), "votes")]', driver = dish_card, logger=self.logger).text
+        # Extract the number of votes (optional fields of the card are looked up without waiting)
+        dish_votes = try_element('xpath', './/span[contains(text(), "votes")]', driver = dish_card, logger=self.logger, timeout=0).text
             
         # Extract the dish price
         dish_price = try_element('xpath', './/span[contains(text(), "₹")]', driver = dish_card, logger=self.logger).text
 
         # Check if the "read more" button for description exists and click it if found
-        dish_description_read_more = try_element('xpath', './/span[contains(text(), "read more")]', driver = dish_card, logger=self.logger)
+        dish_description_read_more = try_element('xpath', './/span[contains(text(), "read more")]', driver = dish_card, logger=self.logger, timeout=0)
         if dish_description_read_more.text != 'Not found':
             dish_description_read_more.click()
             self.logger.info("Clicked on 'read more' for dish description.")
 
         # Extract the dish description
-        dish_description = try_element('tag_name', 'p', driver = dish_card, logger=self.logger).text
+        dish_description = try_element('tag_name', 'p', driver = dish_card, logger=self.logger, timeout=0).text
 
         #Extract the rating
         rating, dish_type = self.ratings_dish_card(dish_card)
@@ -274,32 +281,116 @@ class RestaurantScraper:
         return dish_info
 
 
+    '''
+    expand_descriptions - click every "read more" of the dish descriptions in one script call
+    '''
+    def expand_descriptions(self):
+        clicked = self.driver.execute_script("""
+            const spans = document.evaluate('//span[contains(text(), "read more")]', document,
+                null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let i = 0; i < spans.snapshotLength; i++) { spans.snapshotItem(i).click(); }
+            return spans.snapshotLength;
+        """)
+        self.logger.info(f"Clicked on {clicked} 'read more' for dish descriptions.")
+
+
+    '''
+    snapshot_page - the page_source with all the data in it
+    the descriptions are expanded first so they are present in the source, the opening hours
+    are read from the page state in it (ZomatoPageParser.get_time) so nothing is hovered
+    '''
+    def snapshot_page(self):
+        self.expand_descriptions()
+        return self.driver.page_source
+
+
+    '''
+    parse_page_source - get the restaurant data from a single page_source snapshot
+    params - url of the page, the snapshot is saved to the cache under it when there is one
+    '''
+    @phase('parse_page_source')
+    def parse_page_source(self, url = None):
+        page_source = self.snapshot_page()
+        if self.cache and url:
+            self.cache.put(url, 'html', page_source)
+        return ZomatoPageParser(page_source, logger=self.logger).get_restaurant_data()
+
+
+    '''
+    open_restaurant - load the restaurant page and wait until it is rendered
+    '''
+    def open_restaurant(self, restaurant_link):
+        self.logger.info(f"Fetching restaurant data from URL {restaurant_link}")
+
+        # getting the restaurant link
+        self.driver.get(restaurant_link)
+        self.waiter.until('restaurant_page', zomato_restaurant_ready)
+        if self.blocker:
+            self.blocker.page_report(self.driver, restaurant_link)
+
+
+    '''
+    read_restaurant_page - all the info of the restaurant page open in the driver
+    '''
+    def read_restaurant_page(self, restaurant_link):
+        if self.parse_mode == 'source':
+            return self.parse_page_source(restaurant_link)
+
+        # calling the get_head_info function to get all the info of the restaurant's head
+        data = self.get_head_info()
+
+        # calling the extract_order_sectionos function to get all the dish_section elements
+        dish_section = self.extract_order_sections()
+        dish_data  = []
+        # the cards are rendered, so the implicit wait is off for all their lookups at once
+        with implicit_wait(self.driver, 0):
+            for dish in dish_section:
+                #calling extract_dish_card function to get teh dish elements from the dish_section
+                dish_data.append(self.extract_dish_card(dish))
+
+        data['dish_data'] = dish_data
+        if self.cache:
+            self.cache.put(restaurant_link, 'html', self.snapshot_page())
+
+        return data
+
+
     '''
     get_restaurant_data - this function will scrap all the info of a restaurant
     params :-
     restaurant_link - link of the restaurant
     '''
+    @phase('get_restaurant_data')
     def get_restaurant_data(self, restaurant_link):
 
         try:
-            self.logger.info(f"Fetching restaurant data from URL {restaurant_link}")
+            self.open_restaurant(restaurant_link)
+            return self.read_restaurant_page(restaurant_link)
 
-            # getting the restaurant link
-            self.driver.get(restaurant_link)
-            sleep(10)
-            # calling the get_head_info function to get all the info of the restaurant's head
-            data = self.get_head_info()
+        except Exception as e:
+            self.logger.error(f"An error occurred: {str(e)}")
+            return {
+
+            }
 
-            # calling the extract_order_sectionos function to get all the dish_section elements
-            dish_section = self.extract_order_sections()
-            dish_data  = []
-            for dish in dish_section:
-                #calling extract_dish_card function to get teh dish elements from the dish_section
-                dish_data.append(self.extract_dish_card(dish))
 
-            data['dish_data'] = dish_data
+    '''
+    get_restaurant_delta - get_restaurant_data for a re-crawl, the dishes are only extracted when
+    the page fingerprint (pageFingerprint.py) differs from the one self.fingerprints has for the url
+    return - {'fingerprint', 'changed', 'data'}, data is None for an unchanged restaurant, {} on error
+    '''
+    @phase('get_restaurant_delta')
+    def get_restaurant_delta(self, restaurant_link):
 
-            return data
+        try:
+            self.open_restaurant(restaurant_link)
+            fingerprint = page_fingerprint(self.driver, ZOMATO_FINGERPRINT_SCRIPT)
+            if self.fingerprints is not None and self.fingerprints(restaurant_link) == fingerprint:
+                self.logger.info(f"Unchanged since the last crawl: {restaurant_link}")
+                return {'fingerprint': fingerprint, 'changed': False, 'data': None}
+
+            data = self.read_restaurant_page(restaurant_link)
+            return {'fingerprint': fingerprint, 'changed': True, 'data': data} if data else {}
 
         except Exception as e:
             self.logger.error(f"An error occurred: {str(e)}")